@@ -17,12 +17,27 @@ class PerfilUsuarioAdmin(admin.ModelAdmin):
 
 @admin.register(Proyecto)
 class ProyectoAdmin(admin.ModelAdmin):
-    list_display = ("nombre", "cliente", "piezas_totales", "activo", "creado")
+    list_display = ("nombre", "cliente", "piezas_totales", "producidas", "avance", "lotes_completos", "activo", "creado")
     search_fields = ("nombre", "cliente")
     list_filter = ("activo",)
     readonly_fields = ("creado", "modificado")
     date_hierarchy = "creado"
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).con_avance()
+
+    @admin.display(description="Producidas", ordering="piezas_producidas")
+    def producidas(self, obj: Proyecto):
+        return obj.piezas_producidas
+
+    @admin.display(description="Avance %", ordering="avance_pct")
+    def avance(self, obj: Proyecto):
+        return obj.avance_pct
+
+    @admin.display(description="Lotes completos", ordering="lotes_completos")
+    def lotes_completos(self, obj: Proyecto):
+        return f"{obj.lotes_completos} / {obj.lotes_total}"
+
 
 class AuditLogInline(admin.TabularInline):
     model = AuditLog
@@ -35,26 +50,40 @@ class AuditLogInline(admin.TabularInline):
         return False
 
 
+class CompletitudFilter(admin.SimpleListFilter):
+    title = "documentación"
+    parameter_name = "documentacion"
+
+    def lookups(self, request, model_admin):
+        return (("completos", "Completa"), ("incompletos", "Incompleta"))
+
+    def queryset(self, request, queryset):
+        if self.value() == "completos":
+            return queryset.completos()
+        if self.value() == "incompletos":
+            return queryset.incompletos()
+        return queryset
+
+
 @admin.register(Lote)
 class LoteAdmin(admin.ModelAdmin):
     list_display = ("id_lote", "proyecto", "fecha", "numero_partes", "completo")
+    list_select_related = ("proyecto",)
     search_fields = ("id_lote", "proyecto__nombre")
-    list_filter = ("proyecto", "fecha")
+    list_filter = (CompletitudFilter, "proyecto", "fecha")
     date_hierarchy = "fecha"
     readonly_fields = ("creado", "modificado")
     inlines = [AuditLogInline]
 
-    @admin.display(boolean=True, description="Completo")
+    @admin.display(boolean=True, description="Completo", ordering="num_faltantes")
     def completo(self, obj: Lote):
-        try:
-            return obj.is_completo()
-        except Exception:
-            return False
+        return obj.num_faltantes == 0
 
 
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
     list_display = ("fecha", "lote", "campo", "accion", "usuario")
+    list_select_related = ("lote", "usuario")
     list_filter = ("accion", "campo", "usuario")
     search_fields = ("lote__id_lote", "detalle")
     readonly_fields = ("fecha",)
@@ -0,0 +1,370 @@
+"""
+API JSON de solo lectura para integraciones (MES/ERP).
+
+- Autenticación: sesión de Django o HTTP Basic (usuario activo). Las
+  credenciales Basic válidas se recuerdan unos minutos en la caché para no
+  recalcular el hash de la contraseña en cada sondeo. Lotes y auditoría
+  piden además calidad_app.view_lote, como la descarga de documentos.
+- Paginación por cursor: cada respuesta trae "siguiente" (URL) mientras haya
+  más resultados. Lotes y proyectos van en orden (modificado, id); auditoría,
+  en orden de id (solo se agregan filas). /api/lotes/<id>/historial/ trae
+  todo el historial de un lote, incluidas las filas archivadas.
+- Sincronización incremental: ?updated_since=<ISO 8601> devuelve lo modificado
+  desde ese instante (inclusive); en proyectos incluye también los que tienen
+  lotes modificados, porque de ellos sale el avance. El cliente usa como
+  updated_since el instante (cabecera Date) de su sondeo completo anterior.
+  Las bajas no aparecen: se detectan comparando el listado completo.
+- Peticiones condicionales: el ETag sale de una sola consulta de agregados
+  (máximo "modificado" y conteo) sobre el conjunto filtrado; con
+  If-None-Match vigente se responde 304 sin serializar. No se envía
+  Last-Modified: borrar un lote o archivar auditoría no mueve la fecha máxima
+  y If-Modified-Since daría un 304 viejo; el conteo del ETag sí cambia.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+from datetime import datetime, time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
+from django.views.decorators.http import require_safe
+
+from .auditoria import historial_lote as historial_completo
+from .basedatos import solo_lectura
+from .condicional import agregados_proyectos
+from .models import AuditLog, Lote, Proyecto
+from .paginacion import CursorInvalido, paginar
+
+ORDEN_SINCRONIZACION = ("modificado", "id")
+TAMANO_PAGINA = 100
+TAMANO_MAXIMO = 500
+BASIC_TTL = 5 * 60
+
+
+# ======================================
+# Autenticación
+# ======================================
+def _usuario_basic(request):
+    cabecera = request.META.get("HTTP_AUTHORIZATION", "")
+    tipo, _, credenciales = cabecera.partition(" ")
+    if tipo.lower() != "basic" or not credenciales:
+        return None
+    try:
+        username, _, password = base64.b64decode(credenciales).decode("utf-8").partition(":")
+    except (binascii.Error, UnicodeDecodeError):
+        return None
+
+    # La clave no contiene la contraseña: HMAC con SECRET_KEY.
+    clave = "calidad:api:basic:" + hmac.new(
+        settings.SECRET_KEY.encode(), f"{username}:{password}".encode(), hashlib.sha256).hexdigest()
+    recordado = cache.get(clave)
+    if recordado is not None:
+        pk, hash_sesion = recordado
+        usuario = get_user_model().objects.filter(pk=pk, is_active=True).first()
+        # Se guarda el HMAC de sesión (no el hash de la contraseña): si la
+        # contraseña cambió, ya no coincide.
+        if usuario is not None and hmac.compare_digest(usuario.get_session_auth_hash(), hash_sesion):
+            return usuario
+        cache.delete(clave)
+
+    usuario = authenticate(request, username=username, password=password)
+    if usuario is not None and usuario.is_active:
+        cache.set(clave, (usuario.pk, usuario.get_session_auth_hash()), BASIC_TTL)
+        return usuario
+    return None
+
+
+def api_login_required(vista):
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            usuario = _usuario_basic(request)
+            if usuario is None:
+                response = JsonResponse({"error": "Autenticación requerida."}, status=401)
+                response["WWW-Authenticate"] = 'Basic realm="calidad", charset="UTF-8"'
+                return response
+            request.user = usuario
+        return vista(request, *args, **kwargs)
+    return envoltura
+
+
+def api_permiso(perm):
+    """Como permission_required, pero responde 403 en JSON (va después de api_login_required)."""
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if not request.user.has_perm(perm):
+                return JsonResponse({"error": "Permiso denegado."}, status=403)
+            return vista(request, *args, **kwargs)
+        return envoltura
+    return decorador
+
+
+# ======================================
+# Utilidades
+# ======================================
+class ParametroInvalido(ValueError):
+    pass
+
+
+def _updated_since(request):
+    valor = request.GET.get("updated_since")
+    if not valor:
+        return None
+    fecha = parse_datetime(valor)
+    if fecha is None:
+        dia = parse_date(valor)
+        if dia is None:
+            raise ParametroInvalido("updated_since debe ser una fecha ISO 8601.")
+        fecha = datetime.combine(dia, time.min)
+    if timezone.is_naive(fecha):
+        fecha = timezone.make_aware(fecha)
+    return fecha
+
+
+def _tamano(request) -> int:
+    try:
+        return max(1, min(int(request.GET.get("limite", TAMANO_PAGINA)), TAMANO_MAXIMO))
+    except ValueError:
+        raise ParametroInvalido("limite debe ser un entero.")
+
+
+def _condicional(request, clave: str, agregados: dict):
+    """
+    (response 304 o None, etag) a partir de los agregados del conjunto pedido.
+    La clave incluye la consulta (filtros y cursor).
+    """
+    firma = f"{clave}|{request.GET.urlencode()}|" + "|".join(
+        f"{k}={v.isoformat() if hasattr(v, 'isoformat') else v}" for k, v in sorted(agregados.items()))
+    etag = quote_etag(hashlib.sha1(firma.encode()).hexdigest())
+    return get_conditional_response(request, etag=etag), etag
+
+
+def _responder(datos, etag):
+    response = JsonResponse(datos, json_dumps_params={"ensure_ascii": False})
+    response["ETag"] = etag
+    # Permite cachés intermedias privadas, pero siempre revalidando.
+    response["Cache-Control"] = "private, no-cache"
+    response["Vary"] = "Authorization, Cookie"
+    return response
+
+
+def _pagina(request, qs, orden, serializar, clave, agregados):
+    """Listado paginado por cursor con respuesta condicional."""
+    try:
+        tamano = _tamano(request)
+    except ParametroInvalido as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    no_modificado, etag = _condicional(request, clave, agregados)
+    if no_modificado is not None:
+        return no_modificado
+
+    try:
+        pagina = paginar(qs, orden, despues=request.GET.get("despues"), tamano=tamano)
+    except CursorInvalido as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    siguiente = None
+    if pagina.siguiente:
+        params = request.GET.copy()
+        params["despues"] = pagina.siguiente
+        siguiente = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+    return _responder({
+        "resultados": [serializar(obj) for obj in pagina.items],
+        "siguiente": siguiente,
+    }, etag)
+
+
+def _iso(valor):
+    return valor.isoformat() if valor else None
+
+
+# ======================================
+# Serialización
+# ======================================
+def _proyecto_json(p: Proyecto) -> dict:
+    return {
+        "id": p.id,
+        "nombre": p.nombre,
+        "cliente": p.cliente,
+        "piezas_totales": p.piezas_totales,
+        "piezas_producidas": p.piezas_producidas,
+        "piezas_restantes": p.piezas_restantes,
+        "avance_pct": p.avance_pct,
+        "lotes_total": p.lotes_total,
+        "lotes_completos": p.lotes_completos,
+        "activo": p.activo,
+        "creado": _iso(p.creado),
+        "modificado": _iso(p.modificado),
+    }
+
+
+def _documento_json(request, lote, field):
+    archivo = getattr(lote, field)
+    if not archivo or not archivo.name:
+        return None
+    try:
+        tamano = archivo.size
+    except OSError:
+        tamano = None
+    return {
+        "nombre": archivo.name.rsplit("/", 1)[-1],
+        "tamano": tamano,
+        "url": request.build_absolute_uri(reverse("descargar_documento", args=[lote.id, field])),
+    }
+
+
+def _lote_json(request, lote: Lote) -> dict:
+    return {
+        "id": lote.id,
+        "id_lote": lote.id_lote,
+        "proyecto": lote.proyecto_id,
+        "fecha": _iso(lote.fecha),
+        "numero_partes": lote.numero_partes,
+        "subido_por": lote.subido_por.username if lote.subido_por else None,
+        "completo": lote.num_faltantes == 0,
+        "faltantes": lote.archivos_faltantes(),
+        "documentos": {field: _documento_json(request, lote, field) for field in Lote.FILE_FIELDS},
+        "creado": _iso(lote.creado),
+        "modificado": _iso(lote.modificado),
+    }
+
+
+def _auditoria_json(a: AuditLog) -> dict:
+    return {
+        "id": a.id,
+        "lote": a.lote_id,
+        "id_lote": a.lote.id_lote,
+        "campo": a.campo,
+        "accion": a.accion,
+        "usuario": a.usuario.username if a.usuario else None,
+        "detalle": a.detalle,
+        "fecha": _iso(a.fecha),
+    }
+
+
+# ======================================
+# Vistas
+# ======================================
+@require_safe
+@api_login_required
+@solo_lectura()
+def proyectos(request):
+    try:
+        desde = _updated_since(request)
+    except ParametroInvalido as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    qs = Proyecto.objects.all()
+    if desde:
+        qs = qs.filter(Q(modificado__gte=desde) |
+                       Q(pk__in=Lote.objects.filter(modificado__gte=desde).values("proyecto_id")))
+    if request.GET.get("activo") in ("0", "1"):
+        qs = qs.filter(activo=request.GET["activo"] == "1")
+    return _pagina(request, qs.con_avance(), ORDEN_SINCRONIZACION, _proyecto_json,
+                   "proyectos", agregados_proyectos(qs))
+
+
+@require_safe
+@api_login_required
+@solo_lectura()
+def proyecto(request, proyecto_id):
+    qs = Proyecto.objects.filter(pk=proyecto_id)
+    agregados = agregados_proyectos(qs)
+    if not agregados["n"]:
+        return JsonResponse({"error": "No encontrado."}, status=404)
+    no_modificado, etag = _condicional(request, f"proyecto:{proyecto_id}", agregados)
+    if no_modificado is not None:
+        return no_modificado
+    return _responder(_proyecto_json(qs.con_avance().get()), etag)
+
+
+@require_safe
+@api_login_required
+@api_permiso("calidad_app.view_lote")
+@solo_lectura()
+def lotes(request):
+    try:
+        desde = _updated_since(request)
+    except ParametroInvalido as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    qs = Lote.objects.all()
+    if request.GET.get("proyecto", "").isdigit():
+        qs = qs.filter(proyecto_id=int(request.GET["proyecto"]))
+    if desde:
+        qs = qs.filter(modificado__gte=desde)
+    if request.GET.get("completo") in ("0", "1"):
+        qs = qs.completos() if request.GET["completo"] == "1" else qs.incompletos()
+    agregados = qs.aggregate(n=Count("id"), ultimo=Max("modificado"))
+    return _pagina(request, qs.select_related("subido_por"), ORDEN_SINCRONIZACION,
+                   lambda lote: _lote_json(request, lote), "lotes", agregados)
+
+
+@require_safe
+@api_login_required
+@api_permiso("calidad_app.view_lote")
+@solo_lectura()
+def lote(request, lote_id):
+    qs = Lote.objects.filter(pk=lote_id)
+    agregados = qs.aggregate(n=Count("id"), ultimo=Max("modificado"))
+    if not agregados["n"]:
+        return JsonResponse({"error": "No encontrado."}, status=404)
+    no_modificado, etag = _condicional(request, f"lote:{lote_id}", agregados)
+    if no_modificado is not None:
+        return no_modificado
+    return _responder(_lote_json(request, get_object_or_404(qs.select_related("subido_por"))), etag)
+
+
+@require_safe
+@api_login_required
+@api_permiso("calidad_app.view_lote")
+@solo_lectura()
+def auditoria(request):
+    try:
+        desde = _updated_since(request)
+    except ParametroInvalido as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    qs = AuditLog.objects.all()
+    if request.GET.get("lote", "").isdigit():
+        qs = qs.filter(lote_id=int(request.GET["lote"]))
+    if desde:
+        qs = qs.filter(fecha__gte=desde)
+    # Solo se agregan filas: el id más alto y el conteo bastan para el ETag.
+    agregados = qs.aggregate(n=Count("id"), ultimo_id=Max("id"), ultimo=Max("fecha"))
+    return _pagina(request, qs.select_related("lote", "usuario"), ("id",), _auditoria_json,
+                   "auditoria", agregados)
+
+
+@require_safe
+@api_login_required
+@api_permiso("calidad_app.view_lote")
+@solo_lectura()
+def historial_lote(request, lote_id):
+    """
+    Historial completo de un lote: la tabla más las filas ya archivadas por
+    archivar_auditoria (/api/auditoria/ solo ve la tabla).
+    """
+    if not Lote.objects.filter(pk=lote_id).exists():
+        return JsonResponse({"error": "No encontrado."}, status=404)
+    filas = historial_completo(lote_id)
+    resultados = [{
+        "id": f["id"],
+        "lote": f["lote_id"],
+        "id_lote": f["id_lote"],
+        "campo": f["campo"],
+        "accion": f["accion"],
+        "usuario": f["usuario"],
+        "detalle": f["detalle"],
+        "fecha": _iso(f["fecha"]),
+    } for f in filas]
+    return JsonResponse({"resultados": resultados}, json_dumps_params={"ensure_ascii": False})
@@ -3,4 +3,4 @@ class CalidadAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "calidad_app"
     def ready(self):
-        from . import signals  # registra señales
+        from . import basedatos, signals  # registra señales (pragmas de SQLite y modelos)
@@ -0,0 +1,179 @@
+"""
+Archivo de auditoría: las filas viejas de AuditLog salen de la tabla a
+segmentos JSONL comprimidos (solo se agregan, nunca se reescriben).
+
+Cada corrida de `manage.py archivar_auditoria` escribe segmentos en
+AUDITORIA_ARCHIVO_DIR:
+
+- segmento-<fecha>-<id_min>-<id_max>.jsonl.gz: filas ordenadas por
+  (lote, id), en bloques de ~FILAS_POR_BLOQUE filas. Cada bloque es un
+  miembro gzip independiente, así que el archivo completo se lee con zcat y
+  un bloque se puede descomprimir solo, a partir de su posición.
+- indice.jsonl: una línea por segmento con su rango de fechas/ids y, por
+  bloque, [posición, longitud, lote_min, lote_max]. Para el historial de un
+  lote solo se abren los bloques cuyo rango lo incluye.
+
+Orden de escritura: segmento (archivo temporal + rename), línea del índice
+y, al final, el DELETE en la BD. Si el proceso muere a la mitad, las filas
+quedan en ambos lados y historial_lote() las deduplica por id; un segmento
+sin línea en el índice se ignora.
+"""
+import gzip
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AuditLog
+
+FILAS_POR_BLOQUE = 1000
+INDICE = "indice.jsonl"
+
+
+def directorio() -> Path:
+    return Path(getattr(settings, "AUDITORIA_ARCHIVO_DIR", settings.BASE_DIR / "archivo" / "auditoria"))
+
+
+def fila_json(a: AuditLog) -> dict:
+    """Fila archivada: ids y también id_lote/username, por si luego se borran."""
+    return {
+        "id": a.id,
+        "lote_id": a.lote_id,
+        "id_lote": a.lote.id_lote,
+        "campo": a.campo,
+        "accion": a.accion,
+        "usuario_id": a.usuario_id,
+        "usuario": a.usuario.username if a.usuario else None,
+        "detalle": a.detalle,
+        "fecha": a.fecha.isoformat(),
+    }
+
+
+# ======================================
+# Escritura
+# ======================================
+def _escribir_atomico(ruta: Path, datos: bytes):
+    fd, tmp = tempfile.mkstemp(dir=ruta.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(datos)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, ruta)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def escribir_segmento(filas: list[dict]) -> dict:
+    """Escribe un segmento con `filas` y agrega su entrada al índice. Devuelve la entrada."""
+    carpeta = directorio()
+    carpeta.mkdir(parents=True, exist_ok=True)
+    filas = sorted(filas, key=lambda f: (f["lote_id"], f["id"]))
+
+    contenido, bloques = io.BytesIO(), []
+    for i in range(0, len(filas), FILAS_POR_BLOQUE):
+        bloque = filas[i:i + FILAS_POR_BLOQUE]
+        datos = "".join(json.dumps(f, ensure_ascii=False) + "\n" for f in bloque).encode()
+        inicio = contenido.tell()
+        contenido.write(gzip.compress(datos, mtime=0))
+        bloques.append([inicio, contenido.tell() - inicio, bloque[0]["lote_id"], bloque[-1]["lote_id"]])
+
+    ids = [f["id"] for f in filas]
+    fechas = [f["fecha"] for f in filas]
+    nombre = f"segmento-{timezone.now():%Y%m%dT%H%M%S}-{min(ids)}-{max(ids)}.jsonl.gz"
+    _escribir_atomico(carpeta / nombre, contenido.getvalue())
+
+    entrada = {
+        "segmento": nombre,
+        "filas": len(filas),
+        "id_min": min(ids),
+        "id_max": max(ids),
+        "desde": min(fechas),
+        "hasta": max(fechas),
+        "bloques": bloques,
+    }
+    with open(carpeta / INDICE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entrada) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    return entrada
+
+
+def archivar(antes_de, tamano_segmento: int = 100_000, limite: int | None = None):
+    """
+    Mueve a segmentos las filas con fecha < antes_de, de a `tamano_segmento`
+    por segmento. Genera (entrada del índice, filas borradas) por segmento.
+    """
+    archivadas = 0
+    while limite is None or archivadas < limite:
+        n = tamano_segmento if limite is None else min(tamano_segmento, limite - archivadas)
+        lote = list(
+            AuditLog.objects.filter(fecha__lt=antes_de).order_by("id")
+            .select_related("lote", "usuario")[:n]
+        )
+        if not lote:
+            return
+        entrada = escribir_segmento([fila_json(a) for a in lote])
+        ids = [a.id for a in lote]
+        borradas = 0
+        for i in range(0, len(ids), 500):
+            borradas += AuditLog.objects.filter(pk__in=ids[i:i + 500]).delete()[0]
+        archivadas += len(lote)
+        yield entrada, borradas
+
+
+# ======================================
+# Lectura
+# ======================================
+def indice() -> list[dict]:
+    try:
+        with open(directorio() / INDICE, encoding="utf-8") as f:
+            return [json.loads(linea) for linea in f if linea.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def _leer_bloque(ruta: Path, inicio: int, longitud: int):
+    with open(ruta, "rb") as f:
+        f.seek(inicio)
+        datos = gzip.decompress(f.read(longitud))
+    for linea in datos.decode().splitlines():
+        if linea:
+            yield json.loads(linea)
+
+
+def archivadas_lote(lote_id: int) -> list[dict]:
+    """Filas archivadas del lote (solo abre los bloques que pueden contenerlo)."""
+    filas = []
+    carpeta = directorio()
+    for entrada in indice():
+        ruta = carpeta / entrada["segmento"]
+        for inicio, longitud, lote_min, lote_max in entrada["bloques"]:
+            if lote_min <= lote_id <= lote_max:
+                try:
+                    filas.extend(f for f in _leer_bloque(ruta, inicio, longitud) if f["lote_id"] == lote_id)
+                except FileNotFoundError:
+                    break  # segmento borrado a mano: se omite
+    return filas
+
+
+def historial_lote(lote_id: int) -> list[dict]:
+    """
+    Historial completo del lote (tabla + archivo), del más reciente al más
+    antiguo, sin repetir ids. `fecha` es datetime en ambos casos.
+    """
+    por_id = {}
+    for fila in archivadas_lote(lote_id):
+        fila["fecha"] = parse_datetime(fila["fecha"])
+        por_id[fila["id"]] = fila
+    for a in AuditLog.objects.filter(lote_id=lote_id).select_related("lote", "usuario"):
+        fila = fila_json(a)
+        fila["fecha"] = a.fecha
+        por_id[a.id] = fila
+    return sorted(por_id.values(), key=lambda f: (f["fecha"], f["id"]), reverse=True)
@@ -0,0 +1,63 @@
+"""
+Backend de autenticación con usuario y permisos en caché.
+
+ModelBackend consulta la BD en cada petición para cargar el usuario de la
+sesión y, la primera vez que una plantilla revisa `perms`, sus permisos y los
+de sus grupos. Aquí ambos salen de la caché versionada (cache.py):
+
+- "usuario:<id>": el usuario y sus permisos. La versión cambia al guardar o
+  borrar el usuario (aprobación, baja, último acceso…) o al cambiar sus grupos
+  o permisos directos (signals.py). Del usuario se guardan sus campos menos
+  `password` (la caché es un directorio en disco) y el HMAC de sesión, que es
+  lo único que la verificación de la sesión necesita de la contraseña. El
+  objeto se arma con `password` diferido: leerlo lo consulta y save() no lo
+  sobrescribe.
+- "grupos": cambia cuando cambian los permisos de cualquier grupo; forma parte
+  de la clave de los permisos, así no hay que recorrer a los miembros.
+
+Junto con SESSION_ENGINE = cached_db, una página típica no hace consultas de
+autenticación mientras nada cambie.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from . import cache
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        def calcular():
+            usuario = super(CachedModelBackend, self).get_user(user_id)
+            if usuario is None:
+                return False  # se cachea igual (usuario inexistente o inactivo)
+            campos = {
+                f.attname: getattr(usuario, f.attname)
+                for f in usuario._meta.concrete_fields if f.attname != "password"
+            }
+            return {"campos": campos, "hash_sesion": usuario.get_session_auth_hash(), "db": usuario._state.db}
+
+        datos = cache.obtener(f"usuario:{user_id}", "usuario", calcular)
+        if not datos:
+            return None
+        usuario = get_user_model().from_db(datos["db"], list(datos["campos"]), list(datos["campos"].values()))
+        usuario._hash_sesion = datos["hash_sesion"]
+        return usuario
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, "_perm_cache"):
+            user_obj._perm_cache = cache.obtener(
+                f"usuario:{user_obj.pk}",
+                f"permisos:{cache.version('grupos')}",
+                lambda: super(CachedModelBackend, self).get_all_permissions(user_obj),
+            )
+        return user_obj._perm_cache
+
+
+def invalidar_usuarios(*user_ids):
+    cache.invalidar(*(f"usuario:{pk}" for pk in user_ids if pk))
+
+
+def invalidar_grupos():
+    cache.invalidar("grupos")
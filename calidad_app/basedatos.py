@@ -0,0 +1,95 @@
+"""
+Modo de producción de SQLite (opcional: settings.SQLITE_PRODUCCION, que se
+activa con la variable de entorno SQLITE_PRODUCCION=1). Apagado, las
+conexiones quedan como las abre Django y no existe el alias "lectura".
+
+- Pragmas al abrir cada conexión (señal connection_created):
+  journal_mode=WAL para que las lecturas no esperen a las escrituras;
+  busy_timeout para que un worker espere el bloqueo de escritura en vez de
+  fallar con "database is locked"; synchronous=NORMAL (con WAL, un corte de
+  energía puede perder el último commit pero no corrompe); mmap y caché de
+  páginas para las lecturas. settings.SQLITE_PRAGMAS sobrescribe los valores.
+- Conexión de solo lectura: el alias "lectura" abre el mismo archivo con
+  mode=ro. Las vistas marcadas con @solo_lectura leen por ella (LecturaRouter);
+  todas las escrituras, y las lecturas del resto, van por "default".
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+ALIAS_LECTURA = "lectura"
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": 5000,            # ms
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,  # bytes
+    "cache_size": -64 * 1024,        # negativo = KiB (64 MB por conexión)
+    "temp_store": "MEMORY",
+}
+# journal_mode se guarda en el archivo: lo fija quien puede escribir.
+PRAGMAS_ESCRITURA = {"journal_mode"}
+
+_estado = threading.local()
+
+
+@receiver(connection_created)
+def configurar_sqlite(sender, connection, **kwargs):
+    if connection.vendor != "sqlite" or not getattr(settings, "SQLITE_PRODUCCION", False):
+        return
+    solo_lectura_archivo = "mode=ro" in str(connection.settings_dict["NAME"])
+    pragmas = {**PRAGMAS, **getattr(settings, "SQLITE_PRAGMAS", {})}
+    # Directo sobre la conexión sqlite3: no pasa por el registro de consultas.
+    for nombre, valor in pragmas.items():
+        if valor is None or (solo_lectura_archivo and nombre in PRAGMAS_ESCRITURA):
+            continue
+        connection.connection.execute(f"PRAGMA {nombre} = {valor}")
+
+
+# ======================================
+# Lecturas por la conexión de solo lectura
+# ======================================
+@contextmanager
+def solo_lectura():
+    """
+    Decorador / gestor de contexto: las lecturas del hilo van por "lectura"
+    mientras dure. Solo para vistas que no escriben en la BD (las escrituras
+    igual irían por "default", pero no verían sus propias lecturas).
+    """
+    anterior = getattr(_estado, "activo", False)
+    _estado.activo = True
+    try:
+        yield
+    finally:
+        _estado.activo = anterior
+
+
+def alias_lectura() -> str:
+    """Alias por el que lee el hilo actual."""
+    if getattr(_estado, "activo", False) and ALIAS_LECTURA in settings.DATABASES:
+        return ALIAS_LECTURA
+    return "default"
+
+
+class LecturaRouter:
+    """
+    "lectura" es el mismo archivo que "default": las relaciones entre objetos
+    de ambos alias son válidas y las migraciones solo corren en "default".
+    Se responde siempre (sin caer en instance._state.db) para que un objeto
+    leído por "lectura" se guarde por "default".
+    """
+
+    def db_for_read(self, model, **hints):
+        return alias_lectura()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return False if db == ALIAS_LECTURA else None
@@ -0,0 +1,319 @@
+"""
+Búsqueda de texto completo en el contenido de los documentos de lote.
+
+El texto extraído de cada documento (PDF/DOCX/XLSX), junto con id_lote,
+nombre del proyecto y cliente, vive en la tabla virtual FTS5
+`calidad_app_documento_fts` (una fila por lote y campo). La extracción corre
+en el pool de tareas; la escritura en el índice es incremental: solo se
+reindexan los campos que cambiaron en cada guardado.
+
+Los resultados no se escriben desde el hilo de callbacks del pool (no tiene
+el ciclo de vida de conexiones de Django): quedan pendientes y los escribe
+recoger_extracciones() en el hilo que la llama, al empezar cada petición
+(señal request_started, ver signals.py). Fuera de una petición (shell,
+comandos que guardan lotes uno a uno) se llama con esperar=True al terminar.
+
+Las extracciones terminan en cualquier orden. Al escribir se relee el lote:
+un texto extraído de un archivo que ya no es el del campo (lo reemplazó un
+guardado posterior, que tiene su propia extracción en curso) se descarta, y
+id_lote/proyecto/cliente se toman del estado actual, no del programado.
+
+FTS5 solo existe en SQLite; con otro motor estas funciones no hacen nada.
+"""
+import html
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+import zipfile
+from xml.etree import ElementTree
+
+from django.db import connection, connections, transaction
+
+from .basedatos import alias_lectura
+
+logger = logging.getLogger(__name__)
+
+# (lote_id, rutas, futuro) de las extracciones enviadas al pool y aún no escritas.
+_pendientes = []
+_pendientes_lock = threading.Lock()
+
+TABLA = "calidad_app_documento_fts"
+MAX_TEXTO = 2 * 1024 * 1024  # caracteres por documento
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_S = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
+def disponible() -> bool:
+    return connection.vendor == "sqlite"
+
+
+# ======================================
+# Extracción (corre en el pool: solo rutas)
+# ======================================
+def extraer_texto(ruta: str) -> str:
+    ext = os.path.splitext(ruta)[1].lower()
+    try:
+        if ext == ".pdf":
+            texto = _texto_pdf(ruta)
+        elif ext == ".docx":
+            texto = _texto_docx(ruta)
+        elif ext == ".xlsx":
+            texto = _texto_xlsx(ruta)
+        else:
+            texto = ""
+    except (OSError, zipfile.BadZipFile, ElementTree.ParseError, subprocess.SubprocessError) as e:
+        logger.warning("Búsqueda: no se pudo extraer el texto de %s: %r", ruta, e)
+        texto = ""
+    return texto[:MAX_TEXTO]
+
+
+def extraer_textos(documentos):
+    """[(campo, ruta)] -> [(campo, texto)]"""
+    return [(campo, extraer_texto(ruta)) for campo, ruta in documentos]
+
+
+def _texto_pdf(ruta) -> str:
+    pdftotext = shutil.which("pdftotext")
+    if not pdftotext:
+        return ""
+    res = subprocess.run([pdftotext, "-q", "-enc", "UTF-8", ruta, "-"],
+                         capture_output=True, timeout=120)
+    return res.stdout.decode("utf-8", "replace")
+
+
+def _texto_docx(ruta) -> str:
+    partes = []
+    with zipfile.ZipFile(ruta) as z:
+        for nombre in z.namelist():
+            if re.fullmatch(r"word/(document|header\d*|footer\d*|footnotes)\.xml", nombre):
+                raiz = ElementTree.fromstring(z.read(nombre))
+                for parrafo in raiz.iter(f"{_W}p"):
+                    partes.append("".join(t.text or "" for t in parrafo.iter(f"{_W}t")))
+    return "\n".join(p for p in partes if p)
+
+
+def _texto_xlsx(ruta) -> str:
+    partes = []
+    with zipfile.ZipFile(ruta) as z:
+        nombres = z.namelist()
+        if "xl/sharedStrings.xml" in nombres:
+            raiz = ElementTree.fromstring(z.read("xl/sharedStrings.xml"))
+            for si in raiz.iter(f"{_S}si"):
+                partes.append("".join(t.text or "" for t in si.iter(f"{_S}t")))
+        for nombre in nombres:
+            if nombre.startswith("xl/worksheets/") and nombre.endswith(".xml"):
+                raiz = ElementTree.fromstring(z.read(nombre))
+                for celda in raiz.iter(f"{_S}c"):
+                    if celda.get("t") == "s":
+                        continue  # ya incluida en sharedStrings
+                    for t in celda.iter(f"{_S}t"):
+                        partes.append(t.text or "")
+                    valor = celda.find(f"{_S}v")
+                    if valor is not None and valor.text:
+                        partes.append(valor.text)
+    return "\n".join(p for p in partes if p)
+
+
+# ======================================
+# Índice
+# ======================================
+def _ruta_local(archivo) -> str | None:
+    try:
+        return archivo.path
+    except NotImplementedError:
+        return None
+
+
+def metadatos(lote) -> tuple[str, str, str]:
+    return lote.id_lote, lote.proyecto.nombre, lote.proyecto.cliente or ""
+
+
+def documentos(lote, campos=None) -> list[tuple[str, str | None]]:
+    """(campo, ruta local) de los campos indicados; ruta None si no hay archivo."""
+    resultado = []
+    for campo in campos or lote.FILE_FIELDS:
+        archivo = getattr(lote, campo, None)
+        resultado.append((campo, _ruta_local(archivo) if archivo and archivo.name else None))
+    return resultado
+
+
+def guardar(lote_id: int, datos, textos, con=None):
+    """Reemplaza en el índice las filas (lote, campo) de `textos`."""
+    con = con or connection
+    id_lote, proyecto, cliente = datos
+    with con.cursor() as cursor:
+        for campo, texto in textos:
+            cursor.execute(f"DELETE FROM {TABLA} WHERE lote_id = %s AND campo = %s", [lote_id, campo])
+            if texto:
+                cursor.execute(
+                    f"INSERT INTO {TABLA} (lote_id, campo, id_lote, proyecto, cliente, contenido) "
+                    f"VALUES (%s, %s, %s, %s, %s, %s)",
+                    [lote_id, campo, id_lote, proyecto, cliente, texto],
+                )
+
+
+def guardar_vigentes(lote_id: int, rutas: dict, textos):
+    """
+    Como guardar(), pero solo para los campos cuyo archivo sigue siendo el de
+    `rutas` (campo -> ruta extraída) y con los metadatos actuales del lote.
+    Devuelve los campos escritos.
+    """
+    from .models import Lote
+
+    with transaction.atomic(using="default"):
+        lote = Lote.objects.using("default").select_related("proyecto").filter(pk=lote_id).first()
+        if lote is None:
+            return []  # borrado mientras se extraía
+        actuales = dict(documentos(lote, [campo for campo, _ in textos]))
+        vigentes = [(campo, texto) for campo, texto in textos if actuales.get(campo) == rutas.get(campo)]
+        guardar(lote_id, metadatos(lote), vigentes, con=connections["default"])
+    return [campo for campo, _ in vigentes]
+
+
+def recoger_extracciones(esperar: bool = False) -> int:
+    """
+    Escribe en el índice las extracciones ya terminadas, con la conexión del
+    hilo que llama. Con esperar=True espera también las que siguen en curso.
+    Devuelve cuántas se procesaron.
+    """
+    with _pendientes_lock:
+        listas, siguen = [], []
+        for pendiente in _pendientes:
+            (listas if esperar or pendiente[2].done() else siguen).append(pendiente)
+        _pendientes[:] = siguen
+    for lote_id, rutas, futuro in listas:
+        try:
+            textos = futuro.result()
+        except Exception as exc:
+            logger.error("Búsqueda: falló la extracción del lote %s (%s): %r",
+                         lote_id, ", ".join(rutas), exc)
+            continue
+        try:
+            guardar_vigentes(lote_id, rutas, textos)
+        except Exception:
+            logger.exception("Búsqueda: no se pudo escribir el índice del lote %s", lote_id)
+    return len(listas)
+
+
+def programar(lote, campos):
+    """Reindexa en segundo plano los campos de archivo indicados del lote."""
+    if not disponible():
+        return
+    from .tareas import en_segundo_plano
+
+    pares = documentos(lote, campos)
+    con_archivo = [(campo, ruta) for campo, ruta in pares if ruta]
+    vacios = [(campo, "") for campo, ruta in pares if not ruta]
+    if vacios:
+        guardar(lote.pk, metadatos(lote), vacios)  # archivo quitado: solo se borra la fila
+    if con_archivo:
+        rutas = dict(con_archivo)
+        futuro = en_segundo_plano(extraer_textos, con_archivo)
+        with _pendientes_lock:
+            _pendientes.append((lote.pk, rutas, futuro))
+
+
+def actualizar_metadatos(lote):
+    """id_lote / proyecto / cliente del lote en sus filas del índice."""
+    if not disponible():
+        return
+    id_lote, proyecto, cliente = metadatos(lote)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {TABLA} SET id_lote = %s, proyecto = %s, cliente = %s WHERE lote_id = %s",
+            [id_lote, proyecto, cliente, lote.pk],
+        )
+
+
+def actualizar_proyecto(proyecto):
+    if not disponible():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {TABLA} SET proyecto = %s, cliente = %s WHERE lote_id IN "
+            f"(SELECT id FROM calidad_app_lote WHERE proyecto_id = %s)",
+            [proyecto.nombre, proyecto.cliente or "", proyecto.pk],
+        )
+
+
+def eliminar_lote(lote_id: int):
+    if not disponible():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLA} WHERE lote_id = %s", [lote_id])
+
+
+def indexar_lotes(lotes, procesos: int | None = None) -> int:
+    """
+    Indexa por completo los lotes dados (reemplaza sus filas), extrayendo el
+    texto en paralelo con un pool de procesos propio. Para cargas masivas y
+    reconstrucciones; devuelve cuántos documentos con texto se indexaron.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    if not disponible():
+        return 0
+    trabajos = []
+    for lote in lotes:
+        eliminar_lote(lote.pk)
+        con_archivo = [(campo, ruta) for campo, ruta in documentos(lote) if ruta]
+        if con_archivo:
+            trabajos.append((lote.pk, metadatos(lote), con_archivo))
+    if not trabajos:
+        return 0
+
+    indexados = 0
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        textos = pool.map(extraer_textos, [docs for _, _, docs in trabajos], chunksize=8)
+        with transaction.atomic():
+            for (lote_id, datos, _), resultado in zip(trabajos, textos):
+                guardar(lote_id, datos, resultado)
+                indexados += sum(1 for _, texto in resultado if texto)
+    return indexados
+
+
+# ======================================
+# Consulta
+# ======================================
+def _consulta_fts(q: str) -> str:
+    """
+    Convierte la búsqueda del usuario en una consulta FTS5 segura: cada palabra
+    va entre comillas (sin operadores), y un '*' final se respeta como prefijo.
+    """
+    terminos = []
+    for palabra in q.split():
+        prefijo = palabra.endswith("*")
+        palabra = palabra.rstrip("*").replace('"', '""')
+        if palabra:
+            terminos.append(f'"{palabra}"' + ("*" if prefijo else ""))
+    return " ".join(terminos)
+
+
+def buscar(q: str, limite: int = 50) -> list[dict]:
+    """
+    Resultados ordenados por relevancia (bm25, con más peso en id_lote y
+    proyecto que en el contenido), con un fragmento resaltado en HTML.
+    """
+    consulta = _consulta_fts(q)
+    if not consulta or not disponible():
+        return []
+    with connections[alias_lectura()].cursor() as cursor:
+        cursor.execute(
+            f"SELECT lote_id, campo, snippet({TABLA}, 5, char(2), char(3), '…', 16) "
+            f"FROM {TABLA} WHERE {TABLA} MATCH %s "
+            f"ORDER BY bm25({TABLA}, 0, 0, 10.0, 4.0, 4.0, 1.0) LIMIT %s",
+            [consulta, limite],
+        )
+        filas = cursor.fetchall()
+    return [
+        {
+            "lote_id": lote_id,
+            "campo": campo,
+            "fragmento": html.escape(fragmento or "").replace("\x02", "<mark>").replace("\x03", "</mark>"),
+        }
+        for lote_id, campo, fragmento in filas
+    ]
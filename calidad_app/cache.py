@@ -0,0 +1,100 @@
+"""
+Caché versionada de datos de proyecto.
+
+Cada grupo de datos tiene una clave de versión ("proyectos" para la lista con
+su avance, "proyecto:<id>" para el avance de uno). Los valores se guardan bajo
+"<grupo>:<versión>:<clave>", así que invalidar es solo cambiar la versión: las
+entradas viejas dejan de leerse y caducan solas. Las señales de Proyecto y Lote
+(signals.py) cambian las versiones al confirmar la transacción; quien escriba
+con update()/bulk_create() debe llamar a invalidar_proyectos().
+
+Usa el alias CACHE_PROYECTOS (por defecto "default"). Con varios procesos el
+backend debe ser compartido (FileBasedCache, Redis…): con LocMemCache cada
+proceso tendría sus propias versiones.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+TIMEOUT = 60 * 60  # los datos se invalidan por versión; esto solo acota la basura
+
+
+def _cache():
+    return caches[getattr(settings, "CACHE_PROYECTOS", "default")]
+
+
+def _clave_version(grupo: str) -> str:
+    return f"calidad:version:{grupo}"
+
+
+def version(grupo: str) -> str:
+    """
+    Versión vigente del grupo. Es aleatoria (no un contador), así que si la
+    clave se pierde la nueva versión nunca coincide con datos viejos.
+    """
+    cache = _cache()
+    clave = _clave_version(grupo)
+    actual = cache.get(clave)
+    if actual is None:
+        cache.add(clave, uuid.uuid4().hex, None)
+        actual = cache.get(clave)
+    return actual
+
+
+def invalidar(*grupos: str):
+    _cache().set_many({_clave_version(g): uuid.uuid4().hex for g in grupos}, None)
+
+
+def invalidar_proyectos(*proyecto_ids):
+    """
+    La lista de proyectos y, si se indican, el avance de esos proyectos.
+    Dentro de una transacción se aplica al confirmarla: antes, otra petición
+    (o la conexión de lectura) aún ve las filas viejas y las guardaría bajo
+    la versión nueva.
+    """
+    grupos = ["proyectos", *(f"proyecto:{pk}" for pk in proyecto_ids if pk)]
+    transaction.on_commit(lambda: invalidar(*grupos))
+
+
+def obtener(grupo: str, clave: str, calcular, timeout: int = TIMEOUT):
+    """Valor cacheado de `clave` en la versión vigente de `grupo`, o calcular()."""
+    cache = _cache()
+    completa = f"calidad:{grupo}:{version(grupo)}:{clave}"
+    valor = cache.get(completa)
+    if valor is None:
+        valor = calcular()
+        cache.set(completa, valor, timeout)
+    return valor
+
+
+# ======================================
+# Datos de proyecto
+# ======================================
+def proyectos(orden=("-creado", "nombre"), estado: str = "") -> list:
+    """Proyectos con su avance (con_avance), ya evaluados, por orden y estado."""
+    from .models import Proyecto
+
+    def calcular():
+        qs = Proyecto.objects.con_avance()
+        if estado == "en_curso":
+            qs = qs.filter(avance_pct__lt=100)
+        elif estado == "terminados":
+            qs = qs.filter(avance_pct__gte=100)
+        return list(qs.order_by(*orden))
+
+    return obtener("proyectos", f"lista:{','.join(orden)}:{estado}", calcular)
+
+
+def avance_proyecto(proyecto_id: int) -> dict:
+    """{"piezas_producidas", "avance_pct"} de un proyecto."""
+    from .models import Proyecto
+
+    def calcular():
+        return (
+            Proyecto.objects.filter(pk=proyecto_id).con_avance()
+            .values("piezas_producidas", "avance_pct").first()
+        ) or {"piezas_producidas": 0, "avance_pct": 0.0}
+
+    return obtener(f"proyecto:{proyecto_id}", "avance", calcular)
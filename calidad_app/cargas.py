@@ -0,0 +1,111 @@
+"""
+Subidas por partes (reanudables) de documentos de lote.
+
+Flujo:
+  1. POST  cargas/                -> crea la carga (nombre, tamaño) y devuelve su id
+  2. PATCH cargas/<id>/           -> agrega un fragmento en el offset "Upload-Offset"
+  3. GET   cargas/<id>/           -> consulta lo recibido para reanudar tras un corte
+  4. El formulario del lote envía solo el id en "<campo>_carga".
+"""
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from django.core.files import File
+from django.db.models import F
+
+from .models import CargaArchivo
+from .storage import sha256_archivo
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ParteInvalida(Exception):
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.status = status
+
+
+class ArchivoCarga(File):
+    """
+    File sobre una carga completa. Expone temporary_file_path() y sha256
+    para que el almacenamiento enlace el archivo sin volver a leerlo.
+    """
+
+    def __init__(self, carga: CargaArchivo):
+        super().__init__(open(carga.ruta, "rb"), name=carga.nombre)
+        self.sha256 = carga.sha256
+        self._ruta = carga.ruta
+
+    def temporary_file_path(self):
+        return self._ruta
+
+
+def crear(usuario, nombre: str, tamano: int) -> CargaArchivo:
+    carga = CargaArchivo.objects.create(usuario=usuario, nombre=nombre, tamano=tamano)
+    os.makedirs(os.path.dirname(carga.ruta), exist_ok=True)
+    open(carga.ruta, "wb").close()
+    if tamano == 0:
+        carga.sha256 = sha256_archivo(carga.ruta)
+        carga.save(update_fields=["sha256", "modificado"])
+    return carga
+
+
+def _bloquear(archivo) -> bool:
+    """Bloqueo exclusivo sin espera sobre el archivo de la carga (False si ya lo tiene otro)."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            archivo.seek(0)
+            msvcrt.locking(archivo.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def escribir_parte(carga: CargaArchivo, offset: int, stream, limite: int) -> CargaArchivo:
+    """
+    Escribe en `offset` lo que venga de `stream` (hasta `limite` bytes).
+    Solo se acepta continuar exactamente donde quedó la carga.
+
+    Una sola petición escribe a la vez en cada carga: el bloqueo del archivo
+    (se libera al cerrarlo) evita que dos PATCH al mismo offset se pisen los
+    bytes; con él tomado se vuelve a leer el offset de la BD.
+    """
+    escritos = 0
+    with open(carga.ruta, "r+b") as destino:
+        if not _bloquear(destino):
+            raise ParteInvalida("Otro fragmento de esta carga se está escribiendo.", status=409)
+        carga.refresh_from_db()
+        if carga.completa:
+            raise ParteInvalida("La carga ya está completa.", status=409)
+        if offset != carga.recibido:
+            raise ParteInvalida(f"Offset esperado: {carga.recibido}", status=409)
+
+        destino.seek(offset)
+        while chunk := stream.read(CHUNK_SIZE):
+            escritos += len(chunk)
+            if escritos > limite or offset + escritos > carga.tamano:
+                destino.truncate(offset)
+                raise ParteInvalida("El fragmento excede el tamaño permitido.", status=413)
+            destino.write(chunk)
+        destino.flush()
+
+        # Aún con el bloqueo: el offset avanza antes de que otra petición pueda escribir.
+        actualizadas = CargaArchivo.objects.filter(pk=carga.pk, recibido=offset).update(
+            recibido=F("recibido") + escritos
+        )
+        if not actualizadas:
+            raise ParteInvalida("La carga cambió durante la escritura; consulta el offset.", status=409)
+    carga.refresh_from_db()
+
+    if carga.recibido >= carga.tamano:
+        carga.sha256 = sha256_archivo(carga.ruta)
+        carga.save(update_fields=["sha256", "modificado"])
+    return carga
+
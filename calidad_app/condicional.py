@@ -0,0 +1,86 @@
+"""
+GET condicional para las páginas HTML de proyectos y lotes.
+
+`pagina_condicional(firma)` calcula el ETag antes de ejecutar la vista. Si el
+navegador (o un proxy) ya tiene esa versión, responde 304 sin correr la vista
+ni la plantilla. `firma(request, *args, **kwargs)` devuelve, sin consultas o
+con una sola barata, un dict que cambia cuando cambian los datos de la página
+(versiones de caché, conteos y máximos de `modificado`; los conteos detectan
+bajas) o None si la vista debe correr igual (p.ej. para responder 404).
+
+La página también depende de quién la pide, así que el ETag incluye:
+- el usuario y las versiones de caché de su cuenta y de los grupos
+  (autenticacion.py): cambian con la aprobación, grupos o permisos;
+- el secreto CSRF: los formularios de la página deben seguir siendo válidos;
+- la consulta (orden, filtros, cursor);
+- la versión "miniaturas", que cambia al generarse una (previews.py).
+
+Con mensajes pendientes (messages) no se usa: mostrarlos los consume.
+Las respuestas llevan Cache-Control: private, no-cache (siempre se revalida y
+ningún proxy compartido guarda la página de un usuario). No llevan
+Last-Modified: la fecha de los datos no refleja cambios de permisos o grupos
+y un If-Modified-Since solo daría 304 con la página de otros permisos.
+"""
+import hashlib
+from functools import wraps
+
+from django.contrib import messages
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+
+from . import cache
+
+
+def agregados_proyectos(qs) -> dict:
+    """Conteo y último cambio de los proyectos de `qs` y de sus lotes (una consulta)."""
+    datos = qs.aggregate(
+        n=Count("id", distinct=True), ultimo=Max("modificado"),
+        n_lotes=Count("lotes"), ultimo_lote=Max("lotes__modificado"),
+    )
+    # El avance depende de los lotes: su último cambio también cuenta.
+    if datos["ultimo_lote"] and (not datos["ultimo"] or datos["ultimo_lote"] > datos["ultimo"]):
+        datos["ultimo"] = datos["ultimo_lote"]
+    return datos
+
+
+def _hay_mensajes(request) -> bool:
+    # len() carga los mensajes sin marcarlos como leídos (eso lo hace iterar).
+    return bool(len(messages.get_messages(request)))
+
+
+def _etag(request, agregados: dict) -> str:
+    user = request.user
+    partes = [
+        request.path,
+        request.GET.urlencode(),
+        str(user.pk),
+        cache.version(f"usuario:{user.pk}"),
+        cache.version("grupos"),
+        cache.version("miniaturas"),
+        request.META.get("CSRF_COOKIE", ""),
+        *(f"{k}={v.isoformat() if hasattr(v, 'isoformat') else v}" for k, v in sorted(agregados.items())),
+    ]
+    return quote_etag(hashlib.sha1("|".join(partes).encode()).hexdigest())
+
+
+def pagina_condicional(firma):
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD") or _hay_mensajes(request):
+                return vista(request, *args, **kwargs)
+            agregados = firma(request, *args, **kwargs)
+            if agregados is None:
+                return vista(request, *args, **kwargs)
+
+            etag = _etag(request, agregados)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = vista(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                response.headers.setdefault("ETag", etag)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return envoltura
+    return decorador
@@ -1,8 +1,15 @@
-from .models import Proyecto
+from django.utils.functional import SimpleLazyObject
+
+from . import cache
+
 
 def proyectos_disponibles(request):
+    """
+    Lista de proyectos desde la caché versionada (cache.py), y solo si una
+    plantilla la usa: las páginas que no la muestran no tocan ni la caché.
+    """
     if request.user.is_authenticated:
         return {
-            'proyectos': Proyecto.objects.all()
+            'proyectos': SimpleLazyObject(cache.proyectos)
         }
     return {}
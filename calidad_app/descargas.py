@@ -0,0 +1,129 @@
+"""
+Envío de documentos de lote detrás de la revisión de permisos.
+
+MEDIA_ROOT ya no se publica: cada descarga pasa por una vista que revisa
+sesión y permisos y luego llama a `servir()`. Según settings.DESCARGAS_MODO:
+
+- "x-accel-redirect" (nginx): se responde solo con la cabecera
+  X-Accel-Redirect: <DESCARGAS_ACCEL_PREFIJO><nombre> y nginx envía el archivo
+  (con Range, sendfile y sin ocupar un worker de Django). Requiere:
+
+      location /media-protegida/ {
+          internal;
+          alias /ruta/a/media/;
+      }
+
+- "x-sendfile" (Apache mod_xsendfile, lighttpd): X-Sendfile: <ruta absoluta>.
+- Sin valor: Django envía el archivo, con soporte de Range (un solo rango,
+  para reanudar planos grandes) e If-Range.
+
+En todos los casos la vista responde 304 por su cuenta si el ETag (inodo,
+tamaño y mtime, como nginx) o la fecha coinciden: no se toca el archivo.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+CHUNK_SIZE = 64 * 1024
+_RANGO = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def etag_archivo(st: os.stat_result) -> str:
+    # Un documento reemplazado es otro enlace (otro inodo): el ETag cambia.
+    return quote_etag(f"{st.st_ino:x}-{st.st_size:x}-{int(st.st_mtime):x}")
+
+
+def _rango(request, tamano: int, etag: str, mtime: int):
+    """
+    (inicio, fin) inclusivo del rango pedido, None para enviar todo o
+    False si el rango no se puede satisfacer (416).
+    """
+    cabecera = request.META.get("HTTP_RANGE", "").strip()
+    if not cabecera:
+        return None
+    if_range = request.META.get("HTTP_IF_RANGE", "").strip()
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != mtime:
+        return None  # cambió desde la copia parcial del cliente: va completo
+    m = _RANGO.match(cabecera)
+    if m is None:
+        return None  # varios rangos o sintaxis desconocida: se ignora (RFC 9110)
+    if tamano == 0:
+        return False  # ningún rango de un archivo vacío es satisfacible
+    inicio, fin = m.groups()
+    if not inicio:
+        if not fin:
+            return None
+        sufijo = int(fin)  # bytes=-500: los últimos 500
+        if sufijo == 0:
+            return False
+        return max(0, tamano - sufijo), tamano - 1
+    inicio = int(inicio)
+    fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio >= tamano or fin < inicio:
+        return False
+    return inicio, fin
+
+
+def _leer(ruta, inicio: int, longitud: int):
+    with open(ruta, "rb") as f:
+        f.seek(inicio)
+        while longitud > 0:
+            bloque = f.read(min(CHUNK_SIZE, longitud))
+            if not bloque:
+                break
+            longitud -= len(bloque)
+            yield bloque
+
+
+def servir(request, archivo, adjunto: bool = False):
+    """
+    Respuesta para el FieldFile `archivo` (ya autorizado). Lanza
+    FileNotFoundError si no está en disco.
+    """
+    ruta = archivo.path
+    st = os.stat(ruta)
+    etag = etag_archivo(st)
+    mtime = int(st.st_mtime)
+
+    no_modificado = get_conditional_response(request, etag=etag, last_modified=mtime)
+    if no_modificado is not None:
+        return no_modificado
+
+    nombre = os.path.basename(archivo.name)
+    content_type = mimetypes.guess_type(nombre)[0] or "application/octet-stream"
+    modo = (getattr(settings, "DESCARGAS_MODO", "") or "").lower()
+
+    if modo == "x-accel-redirect":
+        response = HttpResponse(content_type=content_type)
+        prefijo = getattr(settings, "DESCARGAS_ACCEL_PREFIJO", "/media-protegida/")
+        response["X-Accel-Redirect"] = prefijo.rstrip("/") + "/" + quote(archivo.name.lstrip("/"))
+    elif modo == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = ruta
+    else:
+        rango = _rango(request, st.st_size, etag, mtime)
+        if rango is False:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{st.st_size}"
+            return response
+        inicio, fin = rango or (0, st.st_size - 1)
+        longitud = fin - inicio + 1 if st.st_size else 0
+        response = StreamingHttpResponse(_leer(ruta, inicio, longitud), content_type=content_type,
+                                         status=206 if rango else 200)
+        response["Content-Length"] = str(longitud)
+        if rango:
+            response["Content-Range"] = f"bytes {inicio}-{fin}/{st.st_size}"
+        response["Accept-Ranges"] = "bytes"
+
+    response["Content-Disposition"] = content_disposition_header(adjunto, nombre)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(mtime)
+    # Privado y siempre revalidado: la URL es la misma si se reemplaza el documento.
+    response["Cache-Control"] = "private, no-cache"
+    return response
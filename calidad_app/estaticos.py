@@ -0,0 +1,35 @@
+"""
+Almacenamiento de archivos estáticos para collectstatic.
+
+WhiteNoise (CompressedManifestStaticFilesStorage) escribe cada archivo con
+el hash de su contenido en el nombre más sus variantes .gz y .br, y reescribe
+las referencias url()/@import del CSS a los nombres con hash. Los nombres con
+hash se sirven con Cache-Control inmutable de un año: un navegador que ya
+tiene el CSS no vuelve a pedirlo hasta que cambie.
+"""
+import logging
+
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+
+class EstaticosComprimidos(CompressedManifestStaticFilesStorage):
+    """
+    Igual que la de WhiteNoise, pero una referencia CSS a un archivo que no
+    existe se deja tal cual en vez de abortar collectstatic. Pasa con
+    `@import "tailwindcss"` de theme/static/css/dist/styles.css cuando no se
+    compiló Tailwind (npm run build) antes del despliegue.
+    """
+
+    def url_converter(self, name, hashed_files, template=None):
+        convertir = super().url_converter(name, hashed_files, template)
+
+        def converter(matchobj):
+            try:
+                return convertir(matchobj)
+            except ValueError:
+                logger.warning("%s: no existe %r; la referencia queda sin hash.", name, matchobj["url"])
+                return matchobj[0]
+
+        return converter
@@ -1,9 +1,11 @@
 from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, UsernameField
+from django.core.files import File
 from django.core.validators import FileExtensionValidator
 
-from .models import Proyecto, Lote
+from .models import Proyecto, Lote, CargaArchivo
+from .cargas import ArchivoCarga
 
 
 class DateInput(forms.DateInput):
@@ -32,9 +34,16 @@ _FILE_VALIDATOR = FileExtensionValidator(
     allowed_extensions=["pdf", "jpg", "jpeg", "png", "docx", "xlsx"]
 )
 
+def validar_nombre_documento(nombre: str):
+    """Valida la extensión de un documento de lote a partir de su nombre."""
+    _FILE_VALIDATOR(File(None, name=nombre))
+
+
 class LoteForm(forms.ModelForm):
     """
     'proyecto' y 'subido_por' no se muestran; se fijan en la vista.
+    Cada documento puede llegar en el multipart normal o, si se subió por
+    partes, como id de carga en el campo oculto '<campo>_carga'.
     """
     analisis_espectrometrico = forms.FileField(required=False, validators=[_FILE_VALIDATOR])
     tolerancia_geometrica   = forms.FileField(required=False, validators=[_FILE_VALIDATOR])
@@ -42,8 +51,16 @@ class LoteForm(forms.ModelForm):
     evidencia_fotografica   = forms.FileField(required=False, validators=[_FILE_VALIDATOR])
     plano_original          = forms.FileField(required=False, validators=[_FILE_VALIDATOR])
 
-    def __init__(self, *args, proyecto=None, **kwargs):
+    analisis_espectrometrico_carga = forms.UUIDField(required=False, widget=forms.HiddenInput)
+    tolerancia_geometrica_carga   = forms.UUIDField(required=False, widget=forms.HiddenInput)
+    pruebas_mecanicas_carga       = forms.UUIDField(required=False, widget=forms.HiddenInput)
+    evidencia_fotografica_carga   = forms.UUIDField(required=False, widget=forms.HiddenInput)
+    plano_original_carga          = forms.UUIDField(required=False, widget=forms.HiddenInput)
+
+    def __init__(self, *args, proyecto=None, usuario=None, **kwargs):
         self.proyecto = proyecto
+        self.usuario = usuario
+        self.cargas_usadas = []
         super().__init__(*args, **kwargs)
 
         self.fields["id_lote"].widget = forms.TextInput(
@@ -80,6 +97,33 @@ class LoteForm(forms.ModelForm):
         # Ayuda
         self.fields["pruebas_mecanicas"].help_text = "Sube un único documento (preferible PDF) que incluya ambas pruebas."
 
+    def clean(self):
+        cleaned = super().clean()
+        for field in Lote.FILE_FIELDS:
+            carga_id = cleaned.get(f"{field}_carga")
+            if not carga_id or self.files.get(field):
+                continue  # sin carga por partes, o llegó el archivo directo
+            carga = CargaArchivo.objects.filter(pk=carga_id, usuario=self.usuario).first()
+            if carga is None or not carga.completa:
+                self.add_error(field, "La carga del archivo no existe o no ha terminado.")
+                continue
+            try:
+                validar_nombre_documento(carga.nombre)
+            except forms.ValidationError as e:
+                self.add_error(field, e)
+                continue
+            archivo = ArchivoCarga(carga)
+            cleaned[field] = archivo
+            self.cargas_usadas.append((carga, archivo))
+        return cleaned
+
+    def liberar_cargas(self):
+        """Tras guardar el lote, borra las cargas por partes ya adjuntadas."""
+        for carga, archivo in self.cargas_usadas:
+            archivo.close()
+            carga.descartar()
+        self.cargas_usadas = []
+
     class Meta:
         model = Lote
         fields = [
@@ -109,6 +153,92 @@ class LoteAdminForm(LoteForm):
         fields = LoteForm.Meta.fields + ["subido_por"]
 
 
+# ----------------------------
+# Exportación de documentos por proyecto
+# ----------------------------
+TIPOS_DOCUMENTO = [
+    ("analisis_espectrometrico", "Análisis espectrométrico"),
+    ("tolerancia_geometrica", "Tolerancia geométrica"),
+    ("pruebas_mecanicas", "Pruebas mecánicas (dureza + tensión)"),
+    ("evidencia_fotografica", "Evidencia fotográfica"),
+    ("plano_original", "Plano original"),
+]
+
+
+class ExportarProyectoForm(forms.Form):
+    fecha_desde = forms.DateField(required=False, label="Desde", widget=DateInput(attrs={"class": "form-control"}))
+    fecha_hasta = forms.DateField(required=False, label="Hasta", widget=DateInput(attrs={"class": "form-control"}))
+    tipos = forms.MultipleChoiceField(
+        required=False,
+        choices=TIPOS_DOCUMENTO,
+        label="Documentos",
+        widget=forms.CheckboxSelectMultiple(attrs={"class": "form-check-input"}),
+        help_text="Sin selección se exportan todos los documentos.",
+    )
+
+    def clean(self):
+        cleaned = super().clean()
+        desde, hasta = cleaned.get("fecha_desde"), cleaned.get("fecha_hasta")
+        if desde and hasta and desde > hasta:
+            raise forms.ValidationError("La fecha 'Desde' no puede ser posterior a 'Hasta'.")
+        return cleaned
+
+
+# ----------------------------
+# Búsqueda de lotes
+# ----------------------------
+class BuscarLotesForm(forms.Form):
+    ESTADOS = [
+        ("", "Todos"),
+        ("completos", "Completos"),
+        ("incompletos", "Incompletos"),
+    ]
+
+    id_lote = forms.CharField(
+        required=False, max_length=20, label="ID de lote",
+        widget=forms.TextInput(attrs={"class": "form-control", "autocomplete": "off", "placeholder": "Empieza por…"}),
+    )
+    proyecto = forms.ModelChoiceField(
+        required=False, queryset=Proyecto.objects.order_by("nombre"), label="Proyecto",
+        empty_label="Todos", widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    fecha_desde = forms.DateField(required=False, label="Desde", widget=DateInput(attrs={"class": "form-control"}))
+    fecha_hasta = forms.DateField(required=False, label="Hasta", widget=DateInput(attrs={"class": "form-control"}))
+    subido_por = forms.ModelChoiceField(
+        required=False, queryset=get_user_model().objects.filter(lotes_subidos__isnull=False).distinct().order_by("username"),
+        label="Subido por", empty_label="Cualquiera", widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    estado = forms.ChoiceField(
+        required=False, choices=ESTADOS, label="Documentación",
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+
+    def clean(self):
+        cleaned = super().clean()
+        desde, hasta = cleaned.get("fecha_desde"), cleaned.get("fecha_hasta")
+        if desde and hasta and desde > hasta:
+            raise forms.ValidationError("La fecha 'Desde' no puede ser posterior a 'Hasta'.")
+        return cleaned
+
+    def filtrar(self, lotes):
+        """Aplica los filtros válidos al queryset de lotes (requiere is_valid())."""
+        datos = self.cleaned_data
+        lotes = lotes.con_prefijo(datos.get("id_lote", "").strip())
+        if datos.get("proyecto"):
+            lotes = lotes.filter(proyecto=datos["proyecto"])
+        if datos.get("fecha_desde"):
+            lotes = lotes.filter(fecha__gte=datos["fecha_desde"])
+        if datos.get("fecha_hasta"):
+            lotes = lotes.filter(fecha__lte=datos["fecha_hasta"])
+        if datos.get("subido_por"):
+            lotes = lotes.filter(subido_por=datos["subido_por"])
+        if datos.get("estado") == "completos":
+            lotes = lotes.completos()
+        elif datos.get("estado") == "incompletos":
+            lotes = lotes.incompletos()
+        return lotes
+
+
 # ----------------------------
 # Usuarios
 # ----------------------------
@@ -138,3 +268,25 @@ class CustomAuthenticationForm(AuthenticationForm):
             }
         ),
     )
+
+
+class TableroProduccionForm(forms.Form):
+    AGRUPAR = [("dia", "Día"), ("semana", "Semana")]
+
+    proyecto = forms.ModelChoiceField(
+        required=False, queryset=Proyecto.objects.order_by("nombre"), label="Proyecto",
+        empty_label="Todos", widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    desde = forms.DateField(required=False, label="Desde", widget=DateInput(attrs={"class": "form-control"}))
+    hasta = forms.DateField(required=False, label="Hasta", widget=DateInput(attrs={"class": "form-control"}))
+    agrupar = forms.ChoiceField(
+        required=False, choices=AGRUPAR, label="Agrupar por",
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+
+    def clean(self):
+        cleaned = super().clean()
+        desde, hasta = cleaned.get("desde"), cleaned.get("hasta")
+        if desde and hasta and desde > hasta:
+            raise forms.ValidationError("La fecha 'Desde' no puede ser posterior a 'Hasta'.")
+        return cleaned
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from calidad_app import auditoria
+from calidad_app.models import AuditLog
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve las filas de auditoría más antiguas que la retención a segmentos "
+        "JSONL comprimidos (AUDITORIA_ARCHIVO_DIR) y las borra de la tabla."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=getattr(settings, "AUDITORIA_RETENCION_DIAS", 365),
+                            help="Retención en la tabla, en días.")
+        parser.add_argument("--tamano", type=int, default=100_000, help="Filas por segmento.")
+        parser.add_argument("--limite", type=int, default=None, help="Máximo de filas en esta corrida.")
+        parser.add_argument("--simular", action="store_true", help="Solo cuenta las filas a archivar.")
+
+    def handle(self, *args, **opts):
+        corte = timezone.now() - timedelta(days=opts["dias"])
+        if opts["simular"]:
+            n = AuditLog.objects.filter(fecha__lt=corte).count()
+            self.stdout.write(f"Filas anteriores a {corte:%Y-%m-%d}: {n}")
+            return
+
+        total = 0
+        for entrada, borradas in auditoria.archivar(corte, opts["tamano"], opts["limite"]):
+            total += borradas
+            self.stdout.write(f"{entrada['segmento']}: {entrada['filas']} filas, {len(entrada['bloques'])} bloques")
+        self.stdout.write(self.style.SUCCESS(f"Filas archivadas: {total}"))
@@ -0,0 +1,333 @@
+import json
+import platform
+import subprocess
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from calidad_app import zipcache
+from calidad_app.models import Lote, Proyecto
+
+ESCENARIOS = [
+    "ver_proyectos",
+    "lotes_por_proyecto",
+    "lotes_por_proyecto_profundo",
+    "detalle_lote",
+    "registrar_lote_get",
+    "registrar_lote_post",
+    "descargar_zip_frio",
+    "descargar_zip",
+]
+
+
+def percentil(valores, p: float) -> float:
+    """Percentil p (0-100) con interpolación lineal."""
+    orden = sorted(valores)
+    if not orden:
+        return 0.0
+    k = (len(orden) - 1) * p / 100
+    i = int(k)
+    j = min(i + 1, len(orden) - 1)
+    return orden[i] + (orden[j] - orden[i]) * (k - i)
+
+
+@contextmanager
+def capturar_consultas():
+    """Consultas del hilo en todas las conexiones ("default" y "lectura")."""
+    with ExitStack() as pila:
+        capturas = [pila.enter_context(CaptureQueriesContext(c)) for c in connections.all()]
+        total = []
+        yield total
+    total.append(sum(len(c.captured_queries) for c in capturas))
+
+
+def _consumir(response) -> int:
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide las vistas principales con el cliente de pruebas: latencia (p50/p90/p99), "
+        "consultas SQL y pico de memoria por escenario. Con --hilos mide además el "
+        "rendimiento concurrente (peticiones/s) y con --con-cargas lo hace mientras otro "
+        "hilo registra lotes sin parar. Guarda el resultado en JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeticiones", type=int, default=30)
+        parser.add_argument("--calentamiento", type=int, default=3)
+        parser.add_argument("--escenarios", default=",".join(ESCENARIOS),
+                            help="Lista separada por comas. Disponibles: " + ", ".join(ESCENARIOS))
+        parser.add_argument("--hilos", type=int, default=1,
+                            help="Clientes en paralelo (cada uno con sus conexiones); repeticiones por hilo.")
+        parser.add_argument("--con-cargas", action="store_true",
+                            help="Registra lotes en segundo plano durante cada escenario.")
+        parser.add_argument("--proyecto", type=int, help="Proyecto a usar (por defecto, el de más lotes).")
+        parser.add_argument("--usuario", help="Usuario con el que se navega (por defecto, un superusuario).")
+        parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto, benchmarks/<fecha>.json).")
+        parser.add_argument("--comparar", help="JSON de una corrida anterior para mostrar la diferencia.")
+
+    def handle(self, *args, **opts):
+        escenarios = [e.strip() for e in opts["escenarios"].split(",") if e.strip()]
+        desconocidos = set(escenarios) - set(ESCENARIOS)
+        if desconocidos:
+            raise CommandError(f"Escenarios desconocidos: {', '.join(sorted(desconocidos))}")
+
+        self.usuario = self._usuario(opts["usuario"])
+        self.proyecto = self._proyecto(opts["proyecto"])
+        self.lote = (self.proyecto.lotes.exclude(num_faltantes=len(Lote.REQUIRED_FILE_FIELDS))
+                     .order_by("-fecha", "id_lote").first())
+        if self.lote is None:
+            raise CommandError("El proyecto no tiene lotes con documentos: ejecuta generar_datos primero.")
+        self.creados = []
+
+        resultados = {}
+        # 'testserver' es el host del cliente de pruebas; se permite solo durante la corrida.
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            self.client = self._cliente()
+            try:
+                for nombre in escenarios:
+                    resultados[nombre] = self._medir(nombre, opts["repeticiones"], opts["calentamiento"],
+                                                     max(1, opts["hilos"]), opts["con_cargas"])
+                    r = resultados[nombre]
+                    self.stdout.write(
+                        f"{nombre:30} p50 {r['p50_ms']:8.1f} ms · p90 {r['p90_ms']:8.1f} · "
+                        f"p99 {r['p99_ms']:8.1f} · {r['peticiones_s']:7.1f} pet/s · "
+                        f"{r['consultas']:3d} consultas · pico {r['pico_memoria_kb']:,} KB"
+                        + (f" · {r['cargas']} cargas" if opts["con_cargas"] else "")
+                    )
+            finally:
+                self._borrar_creados()
+
+        informe = {
+            "fecha": timezone.now().isoformat(),
+            "commit": self._commit(),
+            "python": platform.python_version(),
+            "base_de_datos": connection.vendor,
+            "journal_mode": self._journal_mode(),
+            "conexion_lectura": "lectura" in settings.DATABASES,
+            "escala": {
+                "proyectos": Proyecto.objects.count(),
+                "lotes": Lote.objects.count(),
+                "lotes_proyecto": self.proyecto.lotes.count(),
+            },
+            "repeticiones": opts["repeticiones"],
+            "hilos": max(1, opts["hilos"]),
+            "con_cargas": opts["con_cargas"],
+            "escenarios": resultados,
+        }
+        salida = Path(opts["salida"] or settings.BASE_DIR / "benchmarks" / f"{timezone.now():%Y%m%d-%H%M%S}.json")
+        salida.parent.mkdir(parents=True, exist_ok=True)
+        salida.write_text(json.dumps(informe, indent=2, ensure_ascii=False))
+        self.stdout.write(self.style.SUCCESS(f"Resultados en {salida}"))
+
+        if opts["comparar"]:
+            self._comparar(json.loads(Path(opts["comparar"]).read_text()), informe)
+
+    # --- preparación ---
+    def _usuario(self, username):
+        User = get_user_model()
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"No existe el usuario {username!r}.")
+        usuario = User.objects.filter(is_superuser=True, is_active=True).first()
+        if usuario is None:
+            raise CommandError("No hay superusuarios: indica --usuario.")
+        return usuario
+
+    def _proyecto(self, proyecto_id):
+        if proyecto_id:
+            return Proyecto.objects.get(pk=proyecto_id)
+        proyecto = Proyecto.objects.con_avance().order_by("-lotes_total").first()
+        if proyecto is None or not proyecto.lotes_total:
+            raise CommandError("No hay lotes: ejecuta generar_datos primero.")
+        return proyecto
+
+    def _cliente(self):
+        client = Client()
+        client.force_login(self.usuario)
+        return client
+
+    # --- escenarios: cada uno devuelve una función que hace una petición ---
+    def _peticion(self, nombre, c):
+        if nombre == "ver_proyectos":
+            return lambda i: c.get(reverse("ver_proyectos"))
+        if nombre == "lotes_por_proyecto":
+            return lambda i: c.get(reverse("lotes_por_proyecto", args=[self.proyecto.id]))
+        if nombre == "lotes_por_proyecto_profundo":
+            # Última página: cursor "antes" del lote más antiguo.
+            from calidad_app.paginacion import codificar_cursor
+            from calidad_app.views import ORDEN_LOTES
+            ultimo = self.proyecto.lotes.order_by("fecha", "-id_lote").first()
+            url = reverse("lotes_por_proyecto", args=[self.proyecto.id])
+            cursor = codificar_cursor(ultimo, ORDEN_LOTES)
+            return lambda i: c.get(url, {"antes": cursor})
+        if nombre == "detalle_lote":
+            return lambda i: c.get(reverse("detalle_lote", args=[self.lote.id]))
+        if nombre == "registrar_lote_get":
+            return lambda i: c.get(reverse("registrar_lote", args=[self.proyecto.id]))
+        if nombre == "registrar_lote_post":
+            return lambda i: self._registrar(c)
+        if nombre == "descargar_zip_frio":
+            def frio(i):
+                ruta = zipcache.ruta_lote(self.lote)
+                if ruta is not None:
+                    ruta.unlink(missing_ok=True)
+                return c.get(reverse("descargar_zip", args=[self.lote.id]))
+            return frio
+        if nombre == "descargar_zip":
+            return lambda i: c.get(reverse("descargar_zip", args=[self.lote.id]))
+        raise CommandError(nombre)
+
+    def _registrar(self, client):
+        id_lote = f"BENCH{time.time_ns() % 10 ** 12:012d}"[:20]
+        datos = {"id_lote": id_lote, "fecha": timezone.localdate().isoformat(), "numero_partes": 1}
+        for field in Lote.FILE_FIELDS:
+            datos[field] = SimpleUploadedFile(f"{field}.pdf", b"%PDF-1.7\n" + b"0" * 100_000, "application/pdf")
+        response = client.post(reverse("registrar_lote", args=[self.proyecto.id]), datos)
+        self.creados.append(id_lote)
+        return response
+
+    def _borrar_creados(self):
+        for lote in Lote.objects.filter(id_lote__in=self.creados):
+            for field in Lote.FILE_FIELDS:
+                if getattr(lote, field):
+                    getattr(lote, field).delete(save=False)
+            lote.delete()
+
+    # --- medición ---
+    def _medir(self, nombre, repeticiones, calentamiento, hilos, con_cargas):
+        with self._cargas(con_cargas) as cargas:
+            inicio = threading.Barrier(hilos)
+
+            def hilo(n):
+                # El hilo principal reutiliza su cliente; los demás abren el suyo (y sus conexiones).
+                client = self.client if n == 0 else self._cliente()
+                try:
+                    peticion = self._peticion(nombre, client)
+                    for i in range(calentamiento):
+                        _consumir(peticion(i))
+                    inicio.wait()
+                    t_inicio = time.perf_counter()
+                    tiempos, consultas, estados = [], [], set()
+                    for i in range(repeticiones):
+                        with capturar_consultas() as capturadas:
+                            t0 = time.perf_counter()
+                            response = peticion(i)
+                            _consumir(response)
+                            tiempos.append((time.perf_counter() - t0) * 1000)
+                        consultas.append(capturadas[0])
+                        estados.add(response.status_code)
+                    return t_inicio, time.perf_counter(), tiempos, consultas, estados
+                except BaseException:
+                    inicio.abort()  # que los demás hilos no esperen en la barrera
+                    raise
+                finally:
+                    if n != 0:
+                        connections.close_all()
+
+            if hilos == 1:
+                partes = [hilo(0)]
+            else:
+                with ThreadPoolExecutor(max_workers=hilos - 1) as pool:
+                    futuros = [pool.submit(hilo, n) for n in range(1, hilos)]
+                    partes = [hilo(0)] + [f.result() for f in futuros]
+            n_cargas = cargas[0]
+
+        tiempos = [t for parte in partes for t in parte[2]]
+        duracion = max(p[1] for p in partes) - min(p[0] for p in partes)
+
+        # Memoria aparte: tracemalloc frena bastante y distorsionaría la latencia.
+        tracemalloc.start()
+        try:
+            _consumir(self._peticion(nombre, self.client)(repeticiones))
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "n": len(tiempos),
+            "p50_ms": round(percentil(tiempos, 50), 2),
+            "p90_ms": round(percentil(tiempos, 90), 2),
+            "p99_ms": round(percentil(tiempos, 99), 2),
+            "media_ms": round(sum(tiempos) / len(tiempos), 2),
+            "max_ms": round(max(tiempos), 2),
+            "peticiones_s": round(len(tiempos) / duracion, 1) if duracion else 0.0,
+            "consultas": max(c for p in partes for c in p[3]),
+            "pico_memoria_kb": pico // 1024,
+            "status": sorted(set().union(*(p[4] for p in partes))),
+            "cargas": n_cargas,
+        }
+
+    @contextmanager
+    def _cargas(self, activas):
+        """Con activas, un hilo registra lotes sin parar mientras dura el bloque; da [cargas hechas]."""
+        hechas = [0]
+        if not activas:
+            yield hechas
+            return
+        parar = threading.Event()
+
+        def cargar():
+            client = self._cliente()
+            try:
+                while not parar.is_set():
+                    self._registrar(client)
+                    hechas[0] += 1
+            finally:
+                connections.close_all()
+
+        hilo = threading.Thread(target=cargar, daemon=True)
+        hilo.start()
+        try:
+            yield hechas
+        finally:
+            parar.set()
+            hilo.join()
+
+    # --- utilidades ---
+    @staticmethod
+    def _journal_mode():
+        if connection.vendor != "sqlite":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            return cursor.fetchone()[0]
+
+    @staticmethod
+    def _commit():
+        try:
+            return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+                                  capture_output=True, text=True, timeout=5).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    def _comparar(self, anterior, actual):
+        self.stdout.write(f"\nComparación con {anterior.get('commit') or anterior.get('fecha')}:")
+        for nombre, r in actual["escenarios"].items():
+            previo = anterior.get("escenarios", {}).get(nombre)
+            if not previo:
+                continue
+            delta = (r["p50_ms"] - previo["p50_ms"]) / previo["p50_ms"] * 100 if previo["p50_ms"] else 0.0
+            estilo = self.style.ERROR if delta > 10 else self.style.SUCCESS if delta < -10 else str
+            self.stdout.write(estilo(
+                f"{nombre:30} p50 {previo['p50_ms']:8.1f} -> {r['p50_ms']:8.1f} ms ({delta:+.0f}%) · "
+                f"consultas {previo['consultas']} -> {r['consultas']}"
+            ))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from calidad_app import zipcache
+from calidad_app.models import Lote
+
+
+class Command(BaseCommand):
+    help = "Calienta, poda o purga la caché en disco de ZIPs de lote."
+
+    def add_arguments(self, parser):
+        accion = parser.add_mutually_exclusive_group(required=True)
+        accion.add_argument("--calentar", action="store_true", help="Construye los ZIP que falten.")
+        accion.add_argument("--podar", action="store_true", help="Aplica el tope de tamaño (LRU).")
+        accion.add_argument("--purgar", action="store_true", help="Borra toda la caché.")
+        accion.add_argument("--estado", action="store_true", help="Muestra archivos y bytes ocupados.")
+        parser.add_argument("--proyecto", type=int, help="Solo lotes de este proyecto (id).")
+        parser.add_argument("--desde", help="Solo lotes con fecha >= AAAA-MM-DD.")
+
+    def handle(self, *args, **opts):
+        if not zipcache.activa():
+            raise CommandError("La caché está desactivada (ZIP_CACHE_DIR vacío).")
+
+        if opts["purgar"]:
+            self.stdout.write(self.style.SUCCESS(f"Borrados: {zipcache.purgar()}"))
+        elif opts["podar"]:
+            self.stdout.write(self.style.SUCCESS(f"Podados: {zipcache.podar()}"))
+        elif opts["estado"]:
+            archivos, total = zipcache.uso()
+            self.stdout.write(f"{archivos} archivos · {total / 1024 ** 2:.1f} MB")
+        else:
+            lotes = Lote.objects.order_by("-fecha", "id_lote")
+            if opts["proyecto"]:
+                lotes = lotes.filter(proyecto_id=opts["proyecto"])
+            if opts["desde"]:
+                lotes = lotes.filter(fecha__gte=opts["desde"])
+            construidos = incompletos = 0
+            for lote in lotes.iterator():
+                if zipcache.buscar(lote) is None:
+                    if zipcache.construir(lote) is None:
+                        incompletos += 1  # faltó algún documento: no se cachea
+                    else:
+                        construidos += 1
+            self.stdout.write(self.style.SUCCESS(f"Construidos: {construidos}"))
+            if incompletos:
+                self.stdout.write(self.style.WARNING(f"Sin cachear (documentos ilegibles): {incompletos}"))
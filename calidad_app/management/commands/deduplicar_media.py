@@ -0,0 +1,66 @@
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from calidad_app.storage import AlmacenamientoDeduplicado, sha256_archivo
+
+
+class Command(BaseCommand):
+    help = (
+        "Pliega los archivos existentes de MEDIA_ROOT al almacén por contenido: "
+        "los duplicados pasan a ser hard links del mismo blob."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ruta", default="lotes", help="Subcarpeta de MEDIA_ROOT a procesar (default: lotes).")
+        parser.add_argument("--dry-run", action="store_true", help="Solo reporta, no modifica nada.")
+        parser.add_argument("--recolectar", action="store_true", help="Al final borra blobs sin referencias.")
+
+    def handle(self, *args, **opts):
+        storage = default_storage
+        if not isinstance(storage, AlmacenamientoDeduplicado):
+            raise CommandError("El almacenamiento por defecto no es AlmacenamientoDeduplicado (revisa STORAGES).")
+
+        raiz = storage.path(opts["ruta"])
+        if not os.path.isdir(raiz):
+            raise CommandError(f"No existe {raiz}")
+        dry_run = opts["dry_run"]
+
+        archivos = nuevos = plegados = ahorro = 0
+        vistos = set()  # blobs que "existirían" en un dry-run
+        for carpeta, _, nombres in os.walk(raiz):
+            for nombre in nombres:
+                ruta = os.path.join(carpeta, nombre)
+                archivos += 1
+                sha = sha256_archivo(ruta)
+                blob = storage.ruta_blob(sha)
+
+                existe = os.path.exists(blob)
+                if existe and os.path.samefile(ruta, blob):
+                    continue  # ya plegado
+                if not existe and sha not in vistos:
+                    # Primer archivo con este contenido: se convierte en el blob.
+                    nuevos += 1
+                    vistos.add(sha)
+                    if not dry_run:
+                        os.makedirs(os.path.dirname(blob), exist_ok=True)
+                        os.link(ruta, blob)
+                    continue
+
+                plegados += 1
+                ahorro += os.path.getsize(ruta)
+                if not dry_run:
+                    tmp = f"{ruta}.dedup"
+                    os.link(blob, tmp)
+                    os.replace(tmp, ruta)
+                self.stdout.write(f"  {os.path.relpath(ruta, storage.location)} -> {sha[:12]}")
+
+        prefijo = "[dry-run] " if dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefijo}{archivos} archivos · {nuevos} blobs nuevos · {plegados} duplicados plegados · "
+            f"{ahorro / 1024 ** 2:.1f} MB liberados"
+        ))
+        if opts["recolectar"] and not dry_run:
+            borrados, liberados = storage.recolectar_blobs()
+            self.stdout.write(f"Blobs sin referencias borrados: {borrados} ({liberados / 1024 ** 2:.1f} MB)")
@@ -0,0 +1,135 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from calidad_app import produccion
+from calidad_app.cache import invalidar_proyectos
+from calidad_app.models import Lote, Proyecto, lot_upload_path
+
+# Extensión típica de cada documento
+EXTENSIONES = {
+    "analisis_espectrometrico": "pdf",
+    "tolerancia_geometrica": "pdf",
+    "pruebas_mecanicas": "pdf",
+    "evidencia_fotografica": "jpg",
+    "plano_original": "pdf",
+}
+CABECERAS = {"pdf": b"%PDF-1.7\n", "jpg": b"\xff\xd8\xff\xe0"}
+UNIDADES = {"b": 1, "kb": 1024, "mb": 1024 ** 2, "gb": 1024 ** 3}
+
+
+def tamano_en_bytes(texto: str) -> int:
+    texto = texto.strip().lower()
+    for sufijo in ("gb", "mb", "kb", "b"):
+        if texto.endswith(sufijo):
+            return int(float(texto[: -len(sufijo)]) * UNIDADES[sufijo])
+    return int(texto)
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos (proyectos, lotes y documentos) para pruebas de "
+        "rendimiento. Todo lo generado lleva el prefijo indicado y se puede borrar con --limpiar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--proyectos", type=int, default=10)
+        parser.add_argument("--lotes", type=int, default=100, help="Lotes por proyecto.")
+        parser.add_argument("--tamanos", default="200KB,1MB",
+                            help="Tamaños de documento separados por coma (se eligen al azar), p.ej. 50KB,2MB.")
+        parser.add_argument("--faltantes", type=float, default=0.2,
+                            help="Probabilidad de que falte cada documento (0-1).")
+        parser.add_argument("--distintos", type=int, default=50,
+                            help="Contenidos distintos por tamaño (el resto se repite, como en la realidad).")
+        parser.add_argument("--usuarios", type=int, default=5)
+        parser.add_argument("--prefijo", default="BX")
+        parser.add_argument("--semilla", type=int, default=1)
+        parser.add_argument("--limpiar", action="store_true", help="Solo borra los datos con el prefijo.")
+
+    def handle(self, *args, **opts):
+        prefijo = opts["prefijo"]
+        if opts["limpiar"]:
+            self._limpiar(prefijo)
+            return
+        if len(f"{prefijo}{opts['proyectos']:04d}{opts['lotes']:06d}") > 20:
+            raise CommandError("Prefijo demasiado largo: id_lote admite 20 caracteres.")
+
+        rnd = random.Random(opts["semilla"])
+        tamanos = [tamano_en_bytes(t) for t in opts["tamanos"].split(",") if t.strip()]
+        usuarios = self._usuarios(prefijo, opts["usuarios"])
+        contenidos = {}  # (ext, tamaño, variante) -> bytes
+        hoy = timezone.localdate()
+
+        total_lotes = 0
+        for p in range(opts["proyectos"]):
+            proyecto = Proyecto.objects.create(
+                nombre=f"{prefijo} Proyecto {p:04d}",
+                cliente=f"Cliente {rnd.randint(1, max(1, opts['proyectos'] // 3)):03d}",
+                piezas_totales=opts["lotes"] * rnd.randint(5, 20),
+            )
+            lotes = []
+            for n in range(opts["lotes"]):
+                lote = Lote(
+                    proyecto=proyecto,
+                    id_lote=f"{prefijo}{p:04d}{n:06d}",
+                    fecha=hoy - timedelta(days=rnd.randint(0, 365)),
+                    numero_partes=rnd.randint(1, 20),
+                    subido_por=rnd.choice(usuarios) if usuarios else None,
+                )
+                for field, ext in EXTENSIONES.items():
+                    if rnd.random() < opts["faltantes"]:
+                        continue
+                    tamano = rnd.choice(tamanos)
+                    clave = (ext, tamano, rnd.randrange(opts["distintos"]))
+                    if clave not in contenidos:
+                        contenidos[clave] = CABECERAS[ext] + rnd.randbytes(max(0, tamano - len(CABECERAS[ext])))
+                    nombre = default_storage.save(
+                        lot_upload_path(lote, f"{field}.{ext}"), ContentFile(contenidos[clave]))
+                    setattr(lote, field, nombre)
+                # bulk_create no pasa por save(): se calcula aquí
+                lote.num_faltantes = len(lote.archivos_faltantes())
+                lotes.append(lote)
+            with transaction.atomic():
+                Lote.objects.bulk_create(lotes, batch_size=500)
+                produccion.acumular(lotes)
+            total_lotes += len(lotes)
+            self.stdout.write(f"  {proyecto.nombre}: {len(lotes)} lotes")
+
+        invalidar_proyectos()
+        self.stdout.write(self.style.SUCCESS(
+            f"Proyectos: {opts['proyectos']} · lotes: {total_lotes} · usuarios: {len(usuarios)}. "
+            f"Ejecuta reindexar_documentos/generar_previews si los necesitas."
+        ))
+
+    def _usuarios(self, prefijo, cantidad):
+        User = get_user_model()
+        usuarios = []
+        for i in range(cantidad):
+            usuario, creado = User.objects.get_or_create(username=f"{prefijo.lower()}_usuario{i}")
+            if creado:
+                usuario.set_unusable_password()
+                usuario.save(update_fields=["password"])
+            usuarios.append(usuario)
+        return usuarios
+
+    def _limpiar(self, prefijo):
+        lotes = Lote.objects.filter(proyecto__nombre__startswith=f"{prefijo} Proyecto ")
+        archivos = 0
+        for lote in lotes.iterator():
+            for field in Lote.FILE_FIELDS:
+                archivo = getattr(lote, field)
+                if archivo:
+                    archivo.delete(save=False)
+                    archivos += 1
+        borrados, _ = lotes.delete()
+        _, por_modelo = Proyecto.objects.filter(nombre__startswith=f"{prefijo} Proyecto ").delete()
+        proyectos = por_modelo.get(Proyecto._meta.label, 0)  # sin contar su ProduccionDiaria
+        get_user_model().objects.filter(username__startswith=f"{prefijo.lower()}_usuario").delete()
+        self.stdout.write(self.style.SUCCESS(
+            f"Borrados: {borrados} registros de lote, {archivos} archivos, {proyectos} proyectos."))
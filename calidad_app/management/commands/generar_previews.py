@@ -0,0 +1,40 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from calidad_app import previews
+from calidad_app.models import Lote
+
+
+class Command(BaseCommand):
+    help = "Genera las miniaturas faltantes de los documentos de lote (en paralelo)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--proyecto", type=int, help="Solo lotes de este proyecto (id).")
+        parser.add_argument("--forzar", action="store_true", help="Regenera aunque ya existan.")
+        parser.add_argument("--procesos", type=int, default=None)
+
+    def handle(self, *args, **opts):
+        lotes = Lote.objects.order_by("-fecha", "id_lote")
+        if opts["proyecto"]:
+            lotes = lotes.filter(proyecto_id=opts["proyecto"])
+        tamano = getattr(settings, "PREVIEW_TAMANO", 320)
+
+        generadas = fallidas = 0
+        with ProcessPoolExecutor(max_workers=opts["procesos"]) as pool:
+            futuros = [
+                pool.submit(previews.renderizar, origen, destino, tamano)
+                for lote in lotes.iterator()
+                for origen, destino in previews.pendientes(lote, forzar=opts["forzar"])
+            ]
+            for futuro in as_completed(futuros):
+                try:
+                    if futuro.result():
+                        generadas += 1
+                except Exception as exc:
+                    fallidas += 1
+                    self.stderr.write(f"  error: {exc!r}")
+        if generadas:
+            previews.invalidar_miniaturas()
+        self.stdout.write(self.style.SUCCESS(f"Miniaturas generadas: {generadas} · con error: {fallidas}"))
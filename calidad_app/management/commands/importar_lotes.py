@@ -0,0 +1,256 @@
+import csv
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date, datetime
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from calidad_app import busqueda, produccion
+from calidad_app.cache import invalidar_proyectos
+from calidad_app.forms import validar_nombre_documento
+from calidad_app.models import AuditLog, Lote, Proyecto, lot_upload_path
+
+COLUMNAS = ["proyecto", "id_lote", "fecha", "numero_partes"]
+FORMATOS_FECHA = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y")
+
+
+def leer_manifiesto(ruta: Path) -> list[dict]:
+    """Filas del manifiesto (CSV o XLSX) como dicts con encabezados en minúsculas."""
+    if ruta.suffix.lower() == ".xlsx":
+        try:
+            import openpyxl
+        except ImportError:
+            raise CommandError("Para leer XLSX instala openpyxl (pip install openpyxl) o exporta a CSV.")
+        libro = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+        filas = libro.active.iter_rows(values_only=True)
+        encabezados = [str(c or "").strip().lower() for c in next(filas, [])]
+        datos = [dict(zip(encabezados, fila)) for fila in filas if any(v not in (None, "") for v in fila)]
+        libro.close()
+        return datos
+
+    with open(ruta, newline="", encoding="utf-8-sig") as f:
+        muestra = f.read(4096)
+        f.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t")
+        except csv.Error:
+            dialecto = csv.excel
+        lector = csv.DictReader(f, dialect=dialecto)
+        lector.fieldnames = [c.strip().lower() for c in lector.fieldnames or []]
+        return [fila for fila in lector if any((v or "").strip() for v in fila.values() if isinstance(v, str))]
+
+
+def _fecha(valor) -> date:
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = str(valor or "").strip()
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ValueError(f"fecha inválida: {texto!r}")
+
+
+def _texto(valor) -> str:
+    if valor is None:
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)  # XLSX: 1.0 -> "1"
+    return str(valor).strip()
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa lotes históricos desde un manifiesto CSV/XLSX (proyecto, id_lote, fecha, "
+        "numero_partes y una columna por documento con su ruta relativa al directorio de origen). "
+        "Valida todo antes de escribir; los id_lote que ya existen se omiten, así que una corrida "
+        "interrumpida se reanuda volviendo a ejecutar el mismo comando."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("manifiesto")
+        parser.add_argument("--origen", help="Directorio de los archivos (por defecto, el del manifiesto).")
+        parser.add_argument("--usuario", help="Usuario que firma los lotes y la auditoría.")
+        parser.add_argument("--tamano-lote", type=int, default=500, help="Filas por transacción.")
+        parser.add_argument("--hilos", type=int, default=8, help="Copias/hash de archivos en paralelo.")
+        parser.add_argument("--simular", action="store_true", help="Solo valida; no escribe nada.")
+        parser.add_argument("--sin-indice", action="store_true", help="No actualiza el índice de búsqueda.")
+
+    def handle(self, *args, **opts):
+        manifiesto = Path(opts["manifiesto"])
+        if not manifiesto.is_file():
+            raise CommandError(f"No existe el manifiesto {manifiesto}.")
+        origen = Path(opts["origen"] or manifiesto.parent).resolve()
+        usuario = None
+        if opts["usuario"]:
+            usuario = get_user_model().objects.filter(username=opts["usuario"]).first()
+            if usuario is None:
+                raise CommandError(f"No existe el usuario {opts['usuario']!r}.")
+
+        filas = leer_manifiesto(manifiesto)
+        validas, errores = self._validar(filas, origen)
+        if errores:
+            for error in errores[:200]:
+                self.stderr.write(f"  {error}")
+            if len(errores) > 200:
+                self.stderr.write(f"  … y {len(errores) - 200} errores más")
+            raise CommandError(f"{len(errores)} errores en el manifiesto; no se importó nada.")
+
+        existentes = self._existentes([f["id_lote"] for f in validas])
+        pendientes = [f for f in validas if f["id_lote"] not in existentes]
+        self.stdout.write(
+            f"Filas válidas: {len(validas)} · ya importadas (se omiten): {len(existentes)} · "
+            f"por importar: {len(pendientes)}"
+        )
+        if opts["simular"] or not pendientes:
+            return
+
+        importados, archivos = 0, 0
+        tamano = max(1, opts["tamano_lote"])
+        with ThreadPoolExecutor(max_workers=opts["hilos"]) as pool:
+            for inicio in range(0, len(pendientes), tamano):
+                tramo = pendientes[inicio:inicio + tamano]
+                lotes = self._importar_tramo(tramo, usuario, pool, opts["sin_indice"])
+                importados += len(lotes)
+                archivos += sum(len(Lote.FILE_FIELDS) - lote.num_faltantes for lote in lotes)
+                self.stdout.write(f"  {importados}/{len(pendientes)} lotes")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Importados {importados} lotes con {archivos} documentos. "
+            f"Ejecuta generar_previews para sus miniaturas."
+        ))
+
+    # --- validación (sin escribir nada) ---
+    def _validar(self, filas, origen: Path):
+        errores, validas, vistos = [], [], set()
+        if filas:
+            faltan = [c for c in COLUMNAS if c not in filas[0]]
+            if faltan:
+                return [], [f"Faltan columnas: {', '.join(faltan)}"]
+
+        nombres = {_texto(f.get("proyecto")) for f in filas}
+        por_nombre = {p.nombre: p for p in Proyecto.objects.filter(nombre__in=nombres)}
+        ids = [int(n) for n in nombres if n.isdigit()]
+        por_id = {str(p.pk): p for p in Proyecto.objects.filter(pk__in=ids)}
+
+        for numero, fila in enumerate(filas, start=2):  # 1 = encabezados
+            problemas = []
+            nombre = _texto(fila.get("proyecto"))
+            proyecto = por_nombre.get(nombre) or por_id.get(nombre)
+            if proyecto is None:
+                problemas.append(f"proyecto desconocido {nombre!r}")
+
+            id_lote = _texto(fila.get("id_lote"))
+            if not id_lote or len(id_lote) > 20:
+                problemas.append("id_lote vacío o de más de 20 caracteres")
+            elif id_lote in vistos:
+                problemas.append(f"id_lote {id_lote!r} repetido en el manifiesto")
+            vistos.add(id_lote)
+
+            try:
+                fecha = _fecha(fila.get("fecha"))
+            except ValueError as e:
+                problemas.append(str(e))
+                fecha = None
+
+            try:
+                numero_partes = int(_texto(fila.get("numero_partes")) or 0)
+                if numero_partes < 0:
+                    raise ValueError
+            except ValueError:
+                problemas.append("numero_partes debe ser un entero >= 0")
+                numero_partes = None
+
+            documentos = {}
+            for field in Lote.FILE_FIELDS:
+                relativa = _texto(fila.get(field))
+                if not relativa:
+                    continue
+                ruta = (origen / relativa).resolve()
+                if not ruta.is_relative_to(origen):
+                    problemas.append(f"{field}: la ruta sale del directorio de origen")
+                elif not ruta.is_file():
+                    problemas.append(f"{field}: no existe {relativa}")
+                else:
+                    try:
+                        validar_nombre_documento(ruta.name)
+                    except ValidationError:
+                        problemas.append(f"{field}: extensión no permitida ({ruta.name})")
+                    documentos[field] = ruta
+
+            if problemas:
+                errores.append(f"fila {numero}: " + "; ".join(problemas))
+            else:
+                validas.append({
+                    "proyecto": proyecto, "id_lote": id_lote, "fecha": fecha,
+                    "numero_partes": numero_partes, "documentos": documentos,
+                })
+        return validas, errores
+
+    @staticmethod
+    def _existentes(ids_lote) -> set:
+        existentes = set()
+        for i in range(0, len(ids_lote), 500):
+            existentes.update(Lote.objects.filter(id_lote__in=ids_lote[i:i + 500])
+                              .values_list("id_lote", flat=True))
+        return existentes
+
+    # --- escritura ---
+    @staticmethod
+    def _copiar(lote, field, ruta: Path) -> str:
+        # El storage deduplicado calcula el SHA-256 mientras copia (una sola pasada).
+        with open(ruta, "rb") as f:
+            return default_storage.save(lot_upload_path(lote, ruta.name), File(f, name=ruta.name))
+
+    def _importar_tramo(self, tramo, usuario, pool, sin_indice):
+        lotes = [
+            Lote(proyecto=f["proyecto"], id_lote=f["id_lote"], fecha=f["fecha"],
+                 numero_partes=f["numero_partes"], subido_por=usuario)
+            for f in tramo
+        ]
+        futuros = [
+            (lote, field, pool.submit(self._copiar, lote, field, ruta))
+            for lote, fila in zip(lotes, tramo)
+            for field, ruta in fila["documentos"].items()
+        ]
+        try:
+            for lote, field, futuro in futuros:
+                setattr(lote, field, futuro.result())
+            for lote in lotes:
+                lote.num_faltantes = len(lote.archivos_faltantes())
+
+            with transaction.atomic():
+                Lote.objects.bulk_create(lotes)
+                AuditLog.objects.bulk_create([
+                    AuditLog(lote=lote, campo=field, accion=AuditLog.Accion.UPLOAD, usuario=usuario,
+                             detalle=f"Carga inicial de {field} (importación): {getattr(lote, field).name}")
+                    for lote in lotes
+                    for field in Lote.FILE_FIELDS
+                    if getattr(lote, field)
+                ])
+                # bulk_create no dispara las señales que mantienen el acumulado diario
+                # ni la caché de proyectos (esta se invalida al confirmar el tramo).
+                produccion.acumular(lotes)
+                invalidar_proyectos(*{lote.proyecto_id for lote in lotes})
+        except BaseException:
+            # Nada del tramo quedó en la BD: se borran sus copias para no dejar huérfanos.
+            pendientes = [futuro for _, _, futuro in futuros]
+            for futuro in pendientes:
+                futuro.cancel()
+            wait(pendientes)
+            for futuro in pendientes:
+                if not futuro.cancelled() and futuro.exception() is None:
+                    default_storage.delete(futuro.result())
+            raise
+
+        if not sin_indice:
+            busqueda.indexar_lotes(lotes)
+        return lotes
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from calidad_app.models import CargaArchivo
+
+
+class Command(BaseCommand):
+    help = "Borra las cargas por partes abandonadas (sin actividad en N horas)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--horas", type=int, default=48)
+
+    def handle(self, *args, **opts):
+        limite = timezone.now() - timedelta(hours=opts["horas"])
+        borradas = 0
+        for carga in CargaArchivo.objects.filter(modificado__lt=limite).iterator():
+            carga.descartar()
+            borradas += 1
+        self.stdout.write(self.style.SUCCESS(f"Cargas borradas: {borradas}"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from calidad_app import produccion
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula desde los lotes el acumulado diario de producción (ProduccionDiaria). "
+        "Úsalo tras escrituras masivas que no pasan por las señales de Lote."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--proyecto", type=int, action="append",
+                            help="Solo este proyecto (id); se puede repetir.")
+
+    def handle(self, *args, **opts):
+        filas = produccion.reconstruir(opts["proyecto"])
+        self.stdout.write(self.style.SUCCESS(f"Filas de producción diaria: {filas}"))
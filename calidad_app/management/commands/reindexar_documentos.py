@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from calidad_app import busqueda
+from calidad_app.models import Lote
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de texto completo de los documentos de lote (extracción en paralelo)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--proyecto", type=int, help="Solo lotes de este proyecto (id).")
+        parser.add_argument("--procesos", type=int, default=None)
+
+    def handle(self, *args, **opts):
+        if not busqueda.disponible():
+            self.stderr.write("La búsqueda de texto completo requiere SQLite (FTS5).")
+            return
+
+        lotes = Lote.objects.select_related("proyecto").order_by("id")
+        if opts["proyecto"]:
+            lotes = lotes.filter(proyecto_id=opts["proyecto"])
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {busqueda.TABLA}")
+
+        indexados = busqueda.indexar_lotes(lotes.iterator(), procesos=opts["procesos"])
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {busqueda.TABLA}({busqueda.TABLA}) VALUES ('optimize')")
+
+        self.stdout.write(self.style.SUCCESS(f"Documentos con texto indexados: {indexados}"))
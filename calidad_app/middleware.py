@@ -1,5 +1,12 @@
-
+import json
+import logging
+import random
 import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
 from django.utils.deprecation import MiddlewareMixin
 
 _user_storage = threading.local()
@@ -10,3 +17,241 @@ def get_current_user():
 class CurrentUserMiddleware(MiddlewareMixin):
     def process_request(self, request):
         _user_storage.user = getattr(request, 'user', None)
+
+    def process_response(self, request, response):
+        # El hilo sigue vivo: lo que guarde fuera de una petición (comandos,
+        # tareas) no debe quedar firmado por el usuario de la anterior.
+        _user_storage.user = None
+        return response
+
+
+# ======================================
+# Instrumentación por petición (Server-Timing + log de lentas)
+# ======================================
+logger = logging.getLogger('calidad_app.rendimiento')
+logger_sql = logging.getLogger('calidad_app.rendimiento.sql')
+
+_medicion_actual = threading.local()
+
+
+class Medicion:
+    """Contadores de una petición muestreada."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.sql_n = 0
+        self.sql_s = 0.0
+        self.consultas_lentas = []
+        self.plantillas_s = 0.0
+        self.io_leidos = 0
+        self.io_escritos = 0
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.inicio) * 1000
+
+
+def medicion_actual():
+    return getattr(_medicion_actual, 'medicion', None)
+
+
+class _ArchivoContado:
+    """Envuelve un archivo abierto por el storage y suma los bytes leídos."""
+
+    def __init__(self, archivo, medicion):
+        self._archivo = archivo
+        self._medicion = medicion
+
+    def read(self, *args):
+        datos = self._archivo.read(*args)
+        self._medicion.io_leidos += len(datos)
+        return datos
+
+    def __iter__(self):
+        return iter(self._archivo)
+
+    def __getattr__(self, nombre):
+        return getattr(self._archivo, nombre)
+
+
+_instrumentado = False
+
+
+def _instrumentar():
+    """
+    Parches (una sola vez por proceso) para medir plantillas y storage. Sin una
+    medición activa en el hilo solo cuestan una búsqueda en el thread-local.
+    """
+    global _instrumentado
+    if _instrumentado:
+        return
+    _instrumentado = True
+
+    from django.core.files.storage import Storage
+    from django.template.backends.django import Template
+
+    render_original = Template.render
+
+    def render(self, *args, **kwargs):
+        medicion = medicion_actual()
+        if medicion is None:
+            return render_original(self, *args, **kwargs)
+        t0 = time.perf_counter()
+        try:
+            return render_original(self, *args, **kwargs)
+        finally:
+            medicion.plantillas_s += time.perf_counter() - t0
+
+    open_original = Storage.open
+    save_original = Storage.save
+
+    def open_(self, name, mode='rb'):
+        archivo = open_original(self, name, mode)
+        medicion = medicion_actual()
+        if medicion is not None and 'r' in mode and getattr(archivo, 'file', None) is not None:
+            archivo.file = _ArchivoContado(archivo.file, medicion)
+        return archivo
+
+    def save(self, name, content, *args, **kwargs):
+        nombre = save_original(self, name, content, *args, **kwargs)
+        medicion = medicion_actual()
+        if medicion is not None:
+            medicion.io_escritos += getattr(content, 'size', 0) or 0
+        return nombre
+
+    Template.render = render
+    Storage.open = open_
+    Storage.save = save
+
+
+class _AlTerminar:
+    """
+    Iterador sobre el cuerpo en streaming que llama a fin() una sola vez: al
+    agotarse o en close(), que el servidor llama también si la descarga se
+    corta o si nunca empezó (un generador sin iniciar no correría su finally).
+    """
+
+    def __init__(self, contenido, fin):
+        self._contenido = iter(contenido)
+        self._fin = fin
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._contenido)
+        except StopIteration:
+            self.close()
+            raise
+
+    def close(self):
+        fin, self._fin = self._fin, None
+        if fin is None:
+            return
+        try:
+            cerrar = getattr(self._contenido, 'close', None)
+            if cerrar is not None:
+                cerrar()
+        finally:
+            fin()
+
+
+class RendimientoMiddleware:
+    """
+    Mide, en una fracción configurable de peticiones (RENDIMIENTO_MUESTREO,
+    0 = apagado, 1 = todas): número y tiempo de consultas SQL, tiempo de render
+    de plantillas, bytes leídos/escritos por el storage y latencia total.
+
+    - Cabecera Server-Timing (visible en las herramientas del navegador).
+    - Log JSON en 'calidad_app.rendimiento' si la petición supera
+      RENDIMIENTO_PETICION_LENTA_MS, y en 'calidad_app.rendimiento.sql' cada
+      consulta que supere RENDIMIENTO_CONSULTA_LENTA_MS.
+
+    En respuestas en streaming (ZIP) la cabecera cubre hasta el inicio del
+    envío; la medición de SQL sigue activa mientras se envía el cuerpo y el
+    log se escribe al terminar (o al cerrarse la respuesta si se corta).
+    Con el muestreo en 0 no se instala ningún parche.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.muestreo = float(getattr(settings, 'RENDIMIENTO_MUESTREO', 0.0))
+        self.lenta_ms = float(getattr(settings, 'RENDIMIENTO_PETICION_LENTA_MS', 1000))
+        self.consulta_lenta_ms = float(getattr(settings, 'RENDIMIENTO_CONSULTA_LENTA_MS', 100))
+        if self.muestreo > 0:
+            _instrumentar()
+
+    def __call__(self, request):
+        if self.muestreo <= 0 or random.random() >= self.muestreo:
+            return self.get_response(request)
+
+        medicion = Medicion()
+        _medicion_actual.medicion = medicion
+        try:
+            with ExitStack() as pila:
+                for conexion in connections.all():
+                    pila.enter_context(conexion.execute_wrapper(self._medir_sql(medicion)))
+                response = self.get_response(request)
+                response['Server-Timing'] = self._server_timing(medicion)
+                if response.streaming and not getattr(response, 'is_async', False):
+                    # El cuerpo se genera en este mismo hilo al enviarlo: la
+                    # medición de SQL se retira recién al terminar el envío.
+                    medir_sql = pila.pop_all()
+
+                    def fin():
+                        medir_sql.close()
+                        self._cerrar(request, response, medicion)
+
+                    response.streaming_content = _AlTerminar(response.streaming_content, fin)
+                    return response
+        except BaseException:
+            _medicion_actual.medicion = None
+            raise
+
+        self._cerrar(request, response, medicion)
+        return response
+
+    def _medir_sql(self, medicion):
+        def envoltura(execute, sql, params, many, context):
+            t0 = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duracion = time.perf_counter() - t0
+                medicion.sql_n += 1
+                medicion.sql_s += duracion
+                if duracion * 1000 >= self.consulta_lenta_ms:
+                    consulta = {'sql': sql[:2000], 'ms': round(duracion * 1000, 1),
+                                'alias': context['connection'].alias}
+                    medicion.consultas_lentas.append(consulta)
+                    logger_sql.warning(json.dumps(consulta, ensure_ascii=False))
+        return envoltura
+
+    @staticmethod
+    def _server_timing(medicion) -> str:
+        return ', '.join([
+            f'db;dur={medicion.sql_s * 1000:.1f};desc="{medicion.sql_n} consultas"',
+            f'tpl;dur={medicion.plantillas_s * 1000:.1f}',
+            f'io;desc="{medicion.io_leidos + medicion.io_escritos} B"',
+            f'total;dur={medicion.total_ms():.1f}',
+        ])
+
+    def _cerrar(self, request, response, medicion):
+        _medicion_actual.medicion = None
+        total = medicion.total_ms()
+        if total < self.lenta_ms:
+            return
+        match = getattr(request, 'resolver_match', None)
+        logger.warning(json.dumps({
+            'metodo': request.method,
+            'ruta': request.path,
+            'vista': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total, 1),
+            'sql_n': medicion.sql_n,
+            'sql_ms': round(medicion.sql_s * 1000, 1),
+            'plantillas_ms': round(medicion.plantillas_s * 1000, 1),
+            'io_leidos': medicion.io_leidos,
+            'io_escritos': medicion.io_escritos,
+            'consultas_lentas': medicion.consultas_lentas[:20],
+        }, ensure_ascii=False))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calidad_app', '0006_remove_lote_prueba_dureza_remove_lote_prueba_tension_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lote',
+            index=models.Index(fields=['proyecto', '-fecha', 'id_lote'], name='lote_proyecto_fecha_idx'),
+        ),
+    ]
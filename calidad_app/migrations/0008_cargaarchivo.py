@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:32
+
+import django.core.validators
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calidad_app', '0007_lote_proyecto_fecha_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CargaArchivo',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('nombre', models.CharField(max_length=255)),
+                ('tamano', models.BigIntegerField(validators=[django.core.validators.MinValueValidator(0)])),
+                ('recibido', models.BigIntegerField(default=0)),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('modificado', models.DateTimeField(auto_now=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cargas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Carga de archivo',
+                'verbose_name_plural': 'Cargas de archivo',
+                'ordering': ['-creado'],
+            },
+        ),
+    ]
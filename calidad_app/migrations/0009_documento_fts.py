@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Tabla virtual FTS5 con el texto de los documentos de lote (ver busqueda.py).
+# Solo SQLite: en otros motores la búsqueda queda deshabilitada.
+CREAR = """
+CREATE VIRTUAL TABLE IF NOT EXISTS calidad_app_documento_fts USING fts5(
+    lote_id UNINDEXED,
+    campo UNINDEXED,
+    id_lote,
+    proyecto,
+    cliente,
+    contenido,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+BORRAR = "DROP TABLE IF EXISTS calidad_app_documento_fts"
+
+
+def crear_tabla(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(CREAR)
+
+
+def borrar_tabla(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(BORRAR)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calidad_app', '0008_cargaarchivo'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_tabla, borrar_tabla),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calidad_app', '0009_documento_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lote',
+            index=models.Index(fields=['-fecha', 'id_lote'], name='lote_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lote',
+            index=models.Index(fields=['subido_por', '-fecha', 'id_lote'], name='lote_subido_por_fecha_idx'),
+        ),
+    ]
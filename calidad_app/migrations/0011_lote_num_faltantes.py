@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:38
+
+from django.db import migrations, models
+from django.db.models import Case, Q, Value, When
+
+DOCUMENTOS = [
+    "analisis_espectrometrico",
+    "tolerancia_geometrica",
+    "pruebas_mecanicas",
+    "evidencia_fotografica",
+    "plano_original",
+]
+
+
+def calcular_faltantes(apps, schema_editor):
+    # Un solo UPDATE: suma 1 por cada documento vacío de la fila.
+    Lote = apps.get_model("calidad_app", "Lote")
+    total = Value(0)
+    for field in DOCUMENTOS:
+        total = total + Case(
+            When(Q(**{f"{field}__isnull": True}) | Q(**{field: ""}), then=Value(1)),
+            default=Value(0),
+        )
+    Lote.objects.update(num_faltantes=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calidad_app', '0010_lote_busqueda_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lote',
+            name='num_faltantes',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(calcular_faltantes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calidad_app', '0011_lote_num_faltantes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lote',
+            index=models.Index(fields=['modificado', 'id'], name='lote_modificado_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def llenar_produccion(apps, schema_editor):
+    # Un GROUP BY sobre los lotes existentes; luego lo mantienen las señales.
+    Lote = apps.get_model("calidad_app", "Lote")
+    ProduccionDiaria = apps.get_model("calidad_app", "ProduccionDiaria")
+    grupos = (Lote.objects.order_by().values("proyecto_id", "fecha", "subido_por_id")
+              .annotate(n=Count("id"), piezas=Sum("numero_partes")))
+    ProduccionDiaria.objects.bulk_create(
+        [ProduccionDiaria(proyecto_id=g["proyecto_id"], dia=g["fecha"], subido_por_id=g["subido_por_id"],
+                          lotes=g["n"], piezas=g["piezas"] or 0) for g in grupos],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calidad_app', '0012_lote_modificado_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProduccionDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('lotes', models.IntegerField(default=0)),
+                ('piezas', models.BigIntegerField(default=0)),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='produccion', to='calidad_app.proyecto')),
+                ('subido_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='produccion', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Producción diaria',
+                'verbose_name_plural': 'Producción diaria',
+                'ordering': ['proyecto', 'dia'],
+                'indexes': [models.Index(fields=['dia'], name='produccion_dia_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('subido_por__isnull', False)), fields=('proyecto', 'dia', 'subido_por'), name='produccion_proyecto_dia_usuario_uniq'), models.UniqueConstraint(condition=models.Q(('subido_por__isnull', True)), fields=('proyecto', 'dia'), name='produccion_proyecto_dia_sin_usuario_uniq')],
+            },
+        ),
+        migrations.RunPython(llenar_produccion, migrations.RunPython.noop),
+    ]
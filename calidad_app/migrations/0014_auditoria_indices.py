@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calidad_app', '0013_produccion_diaria'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['lote', '-fecha'], name='auditoria_lote_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['usuario', '-fecha'], name='auditoria_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['-fecha'], name='auditoria_fecha_idx'),
+        ),
+    ]
@@ -1,5 +1,9 @@
-from django.db import models
-from django.db.models import Sum
+import os
+import uuid
+
+from django.db import models, router, transaction
+from django.db.models import Case, Count, ExpressionWrapper, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Round
 from django.conf import settings
 from django.utils import timezone
 from django.core.validators import MinValueValidator
@@ -12,7 +16,14 @@ from django.contrib.auth.models import AbstractUser
 # ======================================
 class CustomUser(AbstractUser):
     """Usuario personalizado basado en AbstractUser."""
-    pass
+
+    def get_session_auth_hash(self):
+        # El usuario que arma CachedModelBackend (autenticacion.py) no trae el
+        # hash de la contraseña: trae ya calculado el HMAC que se compara con
+        # la sesión. Si se lee `password`, se carga de la BD como campo diferido.
+        if "password" in self.get_deferred_fields() and hasattr(self, "_hash_sesion"):
+            return self._hash_sesion
+        return super().get_session_auth_hash()
 
 
 # ======================================
@@ -41,6 +52,39 @@ class PerfilUsuario(models.Model):
         return f"Perfil · {self.user.get_username()}"
 
 
+class ProyectoQuerySet(models.QuerySet):
+    def con_avance(self):
+        """
+        Anota en una sola consulta:
+          - piezas_producidas: suma de numero_partes de sus lotes
+          - piezas_restantes: piezas_totales - producidas (mínimo 0)
+          - avance_pct: % producido, redondeado a 2 decimales (0 si no hay total)
+          - lotes_total / lotes_completos: lotes y lotes con toda su documentación
+        Permite ordenar/filtrar por avance en la base de datos.
+        """
+        return self.annotate(
+            piezas_producidas=Coalesce(Sum("lotes__numero_partes"), 0),
+            lotes_total=Count("lotes"),
+            lotes_completos=Count("lotes", filter=Q(lotes__num_faltantes=0)),
+        ).annotate(
+            piezas_restantes=Case(
+                When(piezas_totales__gt=F("piezas_producidas"),
+                     then=F("piezas_totales") - F("piezas_producidas")),
+                default=Value(0),
+                output_field=models.PositiveIntegerField(),
+            ),
+            avance_pct=Case(
+                When(piezas_totales__gt=0,
+                     then=Round(ExpressionWrapper(
+                         F("piezas_producidas") * 100.0 / F("piezas_totales"),
+                         output_field=FloatField(),
+                     ), 2)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            ),
+        )
+
+
 class Proyecto(models.Model):
     nombre = models.CharField(max_length=200)
     cliente = models.CharField(max_length=200, blank=True, null=True)
@@ -49,6 +93,8 @@ class Proyecto(models.Model):
     creado = models.DateTimeField(auto_now_add=True)
     modificado = models.DateTimeField(auto_now=True)
 
+    objects = ProyectoQuerySet.as_manager()
+
     class Meta:
         ordering = ["-creado", "nombre"]
         verbose_name = "Proyecto"
@@ -57,21 +103,62 @@ class Proyecto(models.Model):
     def __str__(self) -> str:
         return self.nombre
 
+    def _avance(self) -> dict:
+        # Reutiliza la anotación de con_avance() si la instancia ya la trae.
+        if hasattr(self, "avance_pct"):
+            return {"producidas": self.piezas_producidas, "avance_pct": self.avance_pct}
+        from .cache import avance_proyecto
+
+        datos = avance_proyecto(self.pk)
+        return {"producidas": datos["piezas_producidas"], "avance_pct": datos["avance_pct"]}
+
     def calcular_avance(self) -> float:
-        total = self.piezas_totales or 0
-        producidas = self.lotes.aggregate(s=Sum("numero_partes"))["s"] or 0
-        return round((producidas / total) * 100.0, 2) if total > 0 else 0.0
+        return self._avance()["avance_pct"]
 
     def detalle_avance(self) -> dict:
-        total = self.piezas_totales or 0
-        producidas = self.lotes.aggregate(s=Sum("numero_partes"))["s"] or 0
+        avance = self._avance()
         return {
-            "piezas_totales": total,
-            "producidas": producidas,
-            "avance_pct": self.calcular_avance(),
+            "piezas_totales": self.piezas_totales or 0,
+            "producidas": avance["producidas"],
+            "avance_pct": avance["avance_pct"],
         }
 
 
+class LoteQuerySet(models.QuerySet):
+    def con_prefijo(self, prefijo: str):
+        """
+        id_lote que empieza por `prefijo`, como rango [prefijo, prefijo + U+FFFF)
+        para que use el índice único de id_lote (LIKE 'x%' en SQLite no lo usa).
+        """
+        if not prefijo:
+            return self
+        return self.filter(id_lote__gte=prefijo, id_lote__lt=prefijo + "\uffff")
+
+    def completos(self):
+        return self.filter(num_faltantes=0)
+
+    def incompletos(self):
+        return self.filter(num_faltantes__gt=0)
+
+    def recalcular_faltantes(self) -> int:
+        """
+        Recalcula num_faltantes en la BD con un solo UPDATE (p.ej. tras cambiar
+        REQUIRED_FILE_FIELDS o escribir archivos con update()/SQL directo).
+        """
+        return self.update(num_faltantes=expresion_faltantes(self.model.REQUIRED_FILE_FIELDS))
+
+
+def expresion_faltantes(campos):
+    """Expresión SQL: cuántos de `campos` (FileField) están vacíos en la fila."""
+    total = Value(0)
+    for field in campos:
+        total = total + Case(
+            When(Q(**{f"{field}__isnull": True}) | Q(**{field: ""}), then=Value(1)),
+            default=Value(0),
+        )
+    return total
+
+
 class Lote(models.Model):
     """
     Lote con un archivo único para pruebas mecánicas (dureza+tensión).
@@ -94,13 +181,28 @@ class Lote(models.Model):
     evidencia_fotografica   = models.FileField(upload_to=lot_upload_path, blank=True, null=True)
     plano_original          = models.FileField(upload_to=lot_upload_path, blank=True, null=True)
 
+    # Documentos requeridos que faltan; lo mantiene save() para poder filtrar y
+    # agregar por completitud en SQL (0 = completo).
+    num_faltantes = models.PositiveSmallIntegerField(default=0, editable=False, db_index=True)
+
     creado = models.DateTimeField(auto_now_add=True)
     modificado = models.DateTimeField(auto_now=True)
 
+    objects = LoteQuerySet.as_manager()
+
     class Meta:
         ordering = ["-fecha", "id_lote"]
         verbose_name = "Lote"
         verbose_name_plural = "Lotes"
+        indexes = [
+            # Listado por proyecto con paginación keyset sobre (-fecha, id_lote)
+            models.Index(fields=["proyecto", "-fecha", "id_lote"], name="lote_proyecto_fecha_idx"),
+            # Búsqueda entre proyectos: mismo orden, sin filtro / por responsable
+            models.Index(fields=["-fecha", "id_lote"], name="lote_fecha_idx"),
+            models.Index(fields=["subido_por", "-fecha", "id_lote"], name="lote_subido_por_fecha_idx"),
+            # Sincronización incremental de la API (updated_since + cursor)
+            models.Index(fields=["modificado", "id"], name="lote_modificado_idx"),
+        ]
 
     # Campos para auditoría/validación (solo los vigentes)
     FILE_FIELDS = [
@@ -115,6 +217,89 @@ class Lote(models.Model):
     def __str__(self) -> str:
         return f"Lote {self.id_lote} · {self.proyecto.nombre}"
 
+    # --- Seguimiento de cambios en archivos (sin SELECT extra) ---
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._guardar_archivos_originales()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None:
+            self._guardar_archivos_originales()
+            return
+        # Recarga parcial (incluye la carga de un campo diferido): solo esos
+        # campos pasan a ser el original; los demás conservan su seguimiento.
+        refrescados = {self._meta.get_field(f).attname for f in fields}
+        originales = getattr(self, "_archivos_originales", {})
+        for field in self.FILE_FIELDS:
+            if field in refrescados:
+                valor = self.__dict__.get(field)
+                originales[field] = getattr(valor, "name", valor) or ""
+        self._archivos_originales = originales
+        if "proyecto_id" in refrescados:
+            self._proyecto_id_original = self.proyecto_id
+        if "id_lote" in refrescados:
+            self._id_lote_original = self.id_lote
+
+    def save(self, *args, **kwargs):
+        if all(field in self.__dict__ for field in self.REQUIRED_FILE_FIELDS):
+            self.num_faltantes = len(self.archivos_faltantes())
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and set(update_fields) & set(self.FILE_FIELDS):
+            kwargs["update_fields"] = {*update_fields, "num_faltantes"}
+        # La fila y lo que escriben sus señales post_save (auditoría, acumulado
+        # de producción) se confirman juntos, aunque quien llama no abra una
+        # transacción. Dentro de otra no agrega savepoint.
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+        # Las señales post_save ya vieron los cambios; lo guardado pasa a ser el original.
+        self._guardar_archivos_originales()
+
+    def _guardar_archivos_originales(self):
+        """
+        Nombres de archivo, id_lote, proyecto y clave de producción
+        (ProduccionDiaria) tal como están en la BD (omite campos diferidos).
+        """
+        self._proyecto_id_original = self.__dict__.get("proyecto_id")
+        self._id_lote_original = self.__dict__.get("id_lote")
+        if all(f in self.__dict__ for f in ("proyecto_id", "fecha", "subido_por_id", "numero_partes")):
+            self._produccion_original = (self.proyecto_id, self.fecha, self.subido_por_id, self.numero_partes)
+        else:
+            self._produccion_original = None
+        originales = {}
+        for field in self.FILE_FIELDS:
+            if field in self.__dict__:
+                valor = self.__dict__[field]
+                originales[field] = getattr(valor, "name", valor) or ""
+        self._archivos_originales = originales
+
+    def changed_file_fields(self) -> dict[str, tuple[str, str]]:
+        """
+        {campo: (nombre_anterior, nombre_actual)} de los FILE_FIELDS que cambiaron
+        respecto a lo cargado de la BD. En un lote nuevo, anterior es "".
+        """
+        originales = getattr(self, "_archivos_originales", {})
+        cambios = {}
+        for field in self.FILE_FIELDS:
+            if field not in self.__dict__:
+                continue  # diferido y nunca tocado: no cambió
+            valor = self.__dict__[field]
+            actual = getattr(valor, "name", valor) or ""
+            anterior = originales.get(field, "")
+            if actual != anterior:
+                cambios[field] = (anterior, actual)
+        return cambios
+
+    def cambio_id_o_proyecto(self) -> bool:
+        """True si id_lote o proyecto cambiaron respecto a lo cargado de la BD."""
+        return (
+            self.__dict__.get("id_lote") != getattr(self, "_id_lote_original", None)
+            or self.__dict__.get("proyecto_id") != getattr(self, "_proyecto_id_original", None)
+        )
+
     def archivos_presentes(self) -> list[str]:
         presentes = []
         for field in self.REQUIRED_FILE_FIELDS:
@@ -147,6 +332,91 @@ class AuditLog(models.Model):
         ordering = ["-fecha"]
         verbose_name = "Auditoría"
         verbose_name_plural = "Auditorías"
+        indexes = [
+            # Historial de un lote y admin filtrado por lote/usuario, en orden -fecha
+            models.Index(fields=["lote", "-fecha"], name="auditoria_lote_fecha_idx"),
+            models.Index(fields=["usuario", "-fecha"], name="auditoria_usuario_fecha_idx"),
+            # Listado del admin sin filtro y corte de archivar_auditoria
+            models.Index(fields=["-fecha"], name="auditoria_fecha_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.lote.id_lote} · {self.campo} · {self.accion} · {self.fecha:%Y-%m-%d %H:%M}"
+
+
+class CargaArchivo(models.Model):
+    """
+    Subida por partes (reanudable) de un documento de lote.
+    El cliente envía fragmentos con su offset; al completar se calcula el
+    SHA-256 y el formulario del lote solo referencia el id de la carga.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="cargas")
+    nombre = models.CharField(max_length=255)
+    tamano = models.BigIntegerField(validators=[MinValueValidator(0)])
+    recibido = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    modificado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-creado"]
+        verbose_name = "Carga de archivo"
+        verbose_name_plural = "Cargas de archivo"
+
+    def __str__(self) -> str:
+        return f"{self.nombre} · {self.recibido}/{self.tamano}"
+
+    @property
+    def completa(self) -> bool:
+        return self.recibido >= self.tamano and bool(self.sha256)
+
+    @property
+    def ruta(self) -> str:
+        return os.path.join(settings.CARGAS_DIR, f"{self.id}.part")
+
+    def descartar(self):
+        try:
+            os.unlink(self.ruta)
+        except FileNotFoundError:
+            pass
+        self.delete()
+
+
+class ProduccionDiaria(models.Model):
+    """
+    Acumulado de lotes y piezas (numero_partes) por proyecto, día (Lote.fecha)
+    y responsable. Lo mantienen incrementalmente las señales de Lote (ver
+    produccion.py); `manage.py reconstruir_produccion` lo recalcula desde cero.
+    """
+    proyecto = models.ForeignKey(Proyecto, on_delete=models.CASCADE, related_name="produccion")
+    dia = models.DateField()
+    # Sin responsable (o usuario borrado): fila única por (proyecto, día).
+    subido_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True,
+        on_delete=models.CASCADE, related_name="produccion"
+    )
+    lotes = models.IntegerField(default=0)
+    piezas = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ["proyecto", "dia"]
+        verbose_name = "Producción diaria"
+        verbose_name_plural = "Producción diaria"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["proyecto", "dia", "subido_por"], condition=Q(subido_por__isnull=False),
+                name="produccion_proyecto_dia_usuario_uniq",
+            ),
+            models.UniqueConstraint(
+                fields=["proyecto", "dia"], condition=Q(subido_por__isnull=True),
+                name="produccion_proyecto_dia_sin_usuario_uniq",
+            ),
+        ]
+        indexes = [
+            # Serie de todos los proyectos por día
+            models.Index(fields=["dia"], name="produccion_dia_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.proyecto_id} · {self.dia} · {self.piezas} piezas"
@@ -0,0 +1,100 @@
+"""
+Paginación por cursor (keyset).
+
+En lugar de OFFSET, cada página se pide "después de" (o "antes de") los
+valores de orden del último (o primer) registro visto, así el costo de una
+página no crece con la profundidad. El orden debe ser total (terminar en un
+campo único) y estar respaldado por un índice compuesto.
+"""
+import base64
+import json
+
+from django.db.models import Q
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+class Pagina:
+    def __init__(self, items, siguiente=None, anterior=None):
+        self.items = items
+        self.siguiente = siguiente
+        self.anterior = anterior
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _campo(model, nombre):
+    return model._meta.get_field(nombre.lstrip("-"))
+
+
+def codificar_cursor(obj, orden) -> str:
+    valores = []
+    for nombre in orden:
+        valor = _campo(type(obj), nombre).value_from_object(obj)
+        if hasattr(valor, "isoformat"):
+            valor = valor.isoformat()
+        valores.append(valor)
+    crudo = json.dumps(valores, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+
+def decodificar_cursor(model, cursor: str, orden) -> list:
+    try:
+        crudo = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valores = json.loads(crudo)
+        if not isinstance(valores, list) or len(valores) != len(orden):
+            raise ValueError
+        return [_campo(model, nombre).to_python(v) for nombre, v in zip(orden, valores)]
+    except Exception as exc:
+        raise CursorInvalido("Cursor de paginación inválido.") from exc
+
+
+def _filtro_despues(orden, valores, invertir=False) -> Q:
+    """(c1, c2, ...) > (v1, v2, ...) respetando la dirección de cada campo."""
+    filtro = Q()
+    iguales = Q()
+    for nombre, valor in zip(orden, valores):
+        campo = nombre.lstrip("-")
+        descendente = nombre.startswith("-") != invertir
+        filtro |= iguales & Q(**{f"{campo}__{'lt' if descendente else 'gt'}": valor})
+        iguales &= Q(**{campo: valor})
+    return filtro
+
+
+def paginar(qs, orden, *, despues: str | None = None, antes: str | None = None,
+            tamano: int = 50) -> Pagina:
+    """
+    Devuelve una Pagina de `qs` ordenado por `orden` (p.ej. ("-fecha", "id_lote")).
+    `despues`/`antes` son cursores devueltos en páginas previas.
+    """
+    orden = tuple(orden)
+    if antes:
+        valores = decodificar_cursor(qs.model, antes, orden)
+        invertido = tuple(n[1:] if n.startswith("-") else f"-{n}" for n in orden)
+        filas = list(qs.filter(_filtro_despues(orden, valores, invertir=True))
+                     .order_by(*invertido)[:tamano + 1])
+        hay_mas = len(filas) > tamano
+        filas = filas[:tamano][::-1]
+        return Pagina(
+            filas,
+            siguiente=codificar_cursor(filas[-1], orden) if filas else None,
+            anterior=codificar_cursor(filas[0], orden) if (filas and hay_mas) else None,
+        )
+
+    if despues:
+        valores = decodificar_cursor(qs.model, despues, orden)
+        qs = qs.filter(_filtro_despues(orden, valores))
+    filas = list(qs.order_by(*orden)[:tamano + 1])
+    hay_mas = len(filas) > tamano
+    filas = filas[:tamano]
+    return Pagina(
+        filas,
+        siguiente=codificar_cursor(filas[-1], orden) if (filas and hay_mas) else None,
+        anterior=codificar_cursor(filas[0], orden) if (filas and despues) else None,
+    )
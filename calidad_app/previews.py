@@ -0,0 +1,159 @@
+"""
+Miniaturas de los documentos de lote.
+
+Se generan en el pool de tareas (fuera de la petición) y se guardan en
+PREVIEWS_DIR con una clave derivada del nombre del documento y del tamaño,
+mtime e inodo del archivo en disco. Un nombre sí puede reutilizarse (al
+borrar un documento, lot_upload_path puede volver a dar el mismo), pero el
+archivo nuevo es otro blob (storage.py) y la clave cambia con él; obtenerla
+cuesta un stat y no hace falta leer el original.
+
+- Imágenes (jpg/jpeg/png): Pillow.
+- PDF: primera página con `pdftoppm` (poppler-utils), si está instalado.
+- Otros formatos: sin miniatura.
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.urls import reverse
+
+from .cache import invalidar
+
+EXTENSIONES_IMAGEN = {"jpg", "jpeg", "png"}
+EXTENSIONES_PDF = {"pdf"}
+
+
+def _extension(nombre: str) -> str:
+    return os.path.splitext(nombre)[1].lower().lstrip(".")
+
+
+def soporta(nombre: str) -> bool:
+    ext = _extension(nombre)
+    return ext in EXTENSIONES_IMAGEN or ext in EXTENSIONES_PDF
+
+
+def _ruta_local(archivo) -> str | None:
+    try:
+        return archivo.path
+    except NotImplementedError:
+        return None
+
+
+def clave(archivo) -> str | None:
+    """Clave de la miniatura de un documento (FieldFile); None si no está en disco."""
+    ruta = _ruta_local(archivo)
+    if not ruta:
+        return None
+    try:
+        st = os.stat(ruta)
+    except OSError:
+        return None
+    return hashlib.sha1(f"{archivo.name}|{st.st_size}|{st.st_mtime_ns}|{st.st_ino}".encode("utf-8")).hexdigest()
+
+
+def ruta_preview(clave_miniatura: str) -> str:
+    return os.path.join(settings.PREVIEWS_DIR, clave_miniatura[:2], f"{clave_miniatura}.jpg")
+
+
+# ======================================
+# Render (corre en el pool: solo rutas y valores simples)
+# ======================================
+def renderizar(origen: str, destino: str, tamano: int) -> bool:
+    """Genera la miniatura JPEG de `origen` en `destino`. True si se generó."""
+    ext = _extension(origen)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(destino), suffix=".tmp")
+    os.close(fd)
+    try:
+        if ext in EXTENSIONES_IMAGEN:
+            ok = _renderizar_imagen(origen, tmp, tamano)
+        elif ext in EXTENSIONES_PDF:
+            ok = _renderizar_pdf(origen, tmp, tamano)
+        else:
+            ok = False
+        if ok:
+            os.replace(tmp, destino)
+        return ok
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def _renderizar_imagen(origen, destino, tamano) -> bool:
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return False
+    with Image.open(origen) as img:
+        img.draft("RGB", (tamano, tamano))  # JPEG: decodifica ya reducido
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((tamano, tamano))
+        img.convert("RGB").save(destino, "JPEG", quality=80, optimize=True)
+    return True
+
+
+def _renderizar_pdf(origen, destino, tamano) -> bool:
+    pdftoppm = shutil.which("pdftoppm")
+    if not pdftoppm:
+        return False
+    prefijo = destino[:-len(".tmp")]
+    subprocess.run(
+        [pdftoppm, "-f", "1", "-l", "1", "-jpeg", "-singlefile",
+         "-scale-to", str(tamano), origen, prefijo],
+        check=True, capture_output=True, timeout=60,
+    )
+    os.replace(f"{prefijo}.jpg", destino)
+    return True
+
+
+# ======================================
+# Integración con Lote
+# ======================================
+def pendientes(lote, campos=None, forzar: bool = False):
+    """(origen, destino) de los documentos del lote que necesitan miniatura."""
+    for field in campos or lote.FILE_FIELDS:
+        archivo = getattr(lote, field, None)
+        nombre = getattr(archivo, "name", "") or ""
+        if not nombre or not soporta(nombre):
+            continue
+        clave_miniatura = clave(archivo)
+        if clave_miniatura is None:
+            continue
+        destino = ruta_preview(clave_miniatura)
+        if forzar or not os.path.exists(destino):
+            yield _ruta_local(archivo), destino
+
+
+def programar(lote, campos=None):
+    """Encola en segundo plano las miniaturas faltantes del lote."""
+    from .tareas import en_segundo_plano
+
+    tamano = getattr(settings, "PREVIEW_TAMANO", 320)
+    for origen, destino in pendientes(lote, campos):
+        en_segundo_plano(renderizar, origen, destino, tamano).add_done_callback(_miniatura_lista)
+
+
+def _miniatura_lista(futuro):
+    # Las páginas que ya la muestran dejan de responder 304 (ver condicional.py).
+    if not futuro.cancelled() and futuro.exception() is None and futuro.result():
+        invalidar_miniaturas()
+
+
+def invalidar_miniaturas():
+    invalidar("miniaturas")
+
+
+def url(lote, field: str) -> str | None:
+    """URL de la miniatura si ya existe (un stat del documento y otro sobre PREVIEWS_DIR)."""
+    archivo = getattr(lote, field, None)
+    nombre = getattr(archivo, "name", "") or ""
+    if not nombre or not soporta(nombre):
+        return None
+    clave_miniatura = clave(archivo)
+    if clave_miniatura is None or not os.path.exists(ruta_preview(clave_miniatura)):
+        return None
+    return f"{reverse('preview_documento', args=[lote.id, field])}?v={clave_miniatura[:12]}"
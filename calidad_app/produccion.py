@@ -0,0 +1,188 @@
+"""
+Acumulado diario de producción (ProduccionDiaria).
+
+Cada guardado o borrado de un Lote aplica un delta (lotes, piezas) a la fila
+(proyecto, día, responsable) que le corresponde, dentro de la misma
+transacción: Lote.save() abre una si quien llama no lo hizo, y el borrado
+(Collector) siempre corre en una. La clave anterior sale de la foto que Lote.from_db toma al
+cargarlo (_produccion_original): mover un lote de día, proyecto o responsable
+resta en la fila vieja y suma en la nueva sin volver a consultar el lote.
+Si el lote se cargó con alguno de esos campos diferidos (only()/defer()), no
+hay foto: fijar_original() la lee de la BD antes de guardarlo o borrarlo.
+Una fila que queda sin lotes se borra.
+
+Las escrituras masivas (bulk_create/update, SQL directo) no disparan señales:
+quien las haga llama a acumular() o a reconstruir().
+El tablero lee solo esta tabla, así que su costo depende de los días
+mostrados y no del número de lotes.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import Lote, ProduccionDiaria
+
+logger = logging.getLogger(__name__)
+
+
+def aplicar(proyecto_id, dia, subido_por_id, lotes: int, piezas: int):
+    """Suma (lotes, piezas) a la fila de la clave, creándola si no existe."""
+    if not lotes and not piezas:
+        return
+    fila = ProduccionDiaria.objects.filter(proyecto_id=proyecto_id, dia=dia, subido_por_id=subido_por_id)
+    if fila.update(lotes=F("lotes") + lotes, piezas=F("piezas") + piezas):
+        if lotes < 0:
+            fila.filter(lotes__lte=0).delete()
+        return
+    if lotes < 0:
+        logger.warning("Producción: se resta de una fila inexistente (%s, %s, %s); "
+                       "ejecuta reconstruir_produccion.", proyecto_id, dia, subido_por_id)
+        return
+    try:
+        with transaction.atomic():
+            ProduccionDiaria.objects.create(proyecto_id=proyecto_id, dia=dia, subido_por_id=subido_por_id,
+                                            lotes=lotes, piezas=piezas)
+    except IntegrityError:
+        # Otro proceso la creó entre el UPDATE y el INSERT.
+        fila.update(lotes=F("lotes") + lotes, piezas=F("piezas") + piezas)
+
+
+_CLAVE = ("proyecto_id", "fecha", "subido_por_id", "numero_partes")
+
+
+def fijar_original(lote: Lote, borrando: bool = False):
+    """
+    pre_save/pre_delete: si el lote se cargó con campos de la clave diferidos,
+    lee de la BD la clave vigente (una consulta) para poder restarla después.
+    Al borrar, además la deja cargada en el lote: después del DELETE ya no se
+    podría leer un campo diferido.
+    """
+    if lote._state.adding or lote.pk is None or getattr(lote, "_produccion_original", None) is not None:
+        return
+    lote._produccion_original = (
+        Lote.objects.using(lote._state.db or "default").filter(pk=lote.pk).values_list(*_CLAVE).first()
+    )
+    if borrando and lote._produccion_original is not None:
+        for attname, valor in zip(_CLAVE, lote._produccion_original):
+            lote.__dict__.setdefault(attname, valor)
+
+
+def lote_guardado(lote: Lote, created: bool):
+    actual = (lote.proyecto_id, lote.fecha, lote.subido_por_id, lote.numero_partes or 0)
+    anterior = None if created else getattr(lote, "_produccion_original", None)
+    if anterior == actual:
+        return
+    if anterior is not None:
+        aplicar(*anterior[:3], -1, -(anterior[3] or 0))
+    elif not created:
+        # Sin foto ni fila previa en la BD (p.ej. save() con pk asignado a mano).
+        logger.warning("Producción: lote %s guardado sin clave anterior; se suma sin restar. "
+                       "Ejecuta reconstruir_produccion si ya estaba contado.", lote.pk)
+    aplicar(*actual[:3], 1, actual[3])
+
+
+def lote_borrado(lote: Lote):
+    clave = getattr(lote, "_produccion_original", None) or (
+        lote.proyecto_id, lote.fecha, lote.subido_por_id, lote.numero_partes)
+    aplicar(*clave[:3], -1, -(clave[3] or 0))
+
+
+def usuario_borrado(usuario_id):
+    """Pasa la producción del usuario a la fila sin responsable (Lote.subido_por queda en NULL)."""
+    for fila in ProduccionDiaria.objects.filter(subido_por_id=usuario_id):
+        aplicar(fila.proyecto_id, fila.dia, None, fila.lotes, fila.piezas)
+    ProduccionDiaria.objects.filter(subido_por_id=usuario_id).delete()
+
+
+def acumular(lotes, signo: int = 1):
+    """Aplica de una vez los lotes nuevos (o borrados, signo=-1) de una escritura masiva."""
+    deltas = defaultdict(lambda: [0, 0])
+    for lote in lotes:
+        delta = deltas[(lote.proyecto_id, lote.fecha, lote.subido_por_id)]
+        delta[0] += signo
+        delta[1] += signo * (lote.numero_partes or 0)
+    with transaction.atomic():
+        for clave, (n, piezas) in deltas.items():
+            aplicar(*clave, n, piezas)
+
+
+def reconstruir(proyecto_ids=None) -> int:
+    """Recalcula el acumulado desde Lote (todo o solo esos proyectos). Devuelve las filas escritas."""
+    lotes = Lote.objects.order_by()
+    filas = ProduccionDiaria.objects.all()
+    if proyecto_ids is not None:
+        lotes = lotes.filter(proyecto_id__in=proyecto_ids)
+        filas = filas.filter(proyecto_id__in=proyecto_ids)
+    grupos = (lotes.values("proyecto_id", "fecha", "subido_por_id")
+              .annotate(n=Count("id"), piezas=Sum("numero_partes")))
+    with transaction.atomic():
+        filas.delete()
+        creadas = ProduccionDiaria.objects.bulk_create(
+            (ProduccionDiaria(proyecto_id=g["proyecto_id"], dia=g["fecha"], subido_por_id=g["subido_por_id"],
+                              lotes=g["n"], piezas=g["piezas"] or 0) for g in grupos.iterator()),
+            batch_size=1000,
+        )
+    return len(creadas)
+
+
+# ======================================
+# Series para el tablero
+# ======================================
+def _inicio_periodo(dia, agrupar: str):
+    if agrupar == "semana":
+        return dia - timedelta(days=dia.weekday())  # lunes
+    return dia
+
+
+def serie(proyecto_ids=None, desde=None, hasta=None, agrupar: str = "dia") -> dict:
+    """
+    {"periodos", "piezas", "acumulado", "lotes", "previas"} por día o semana.
+    `acumulado` incluye las piezas anteriores a `desde` ("previas"), para
+    compararlo con piezas_totales.
+    """
+    filas = ProduccionDiaria.objects.all()
+    if proyecto_ids is not None:
+        filas = filas.filter(proyecto_id__in=proyecto_ids)
+    previas = 0
+    if desde:
+        previas = filas.filter(dia__lt=desde).aggregate(t=Sum("piezas"))["t"] or 0
+        filas = filas.filter(dia__gte=desde)
+    if hasta:
+        filas = filas.filter(dia__lte=hasta)
+
+    por_periodo = {}
+    for fila in filas.values("dia").annotate(piezas=Sum("piezas"), lotes=Sum("lotes")).order_by("dia"):
+        periodo = _inicio_periodo(fila["dia"], agrupar)
+        piezas, lotes = por_periodo.get(periodo, (0, 0))
+        por_periodo[periodo] = (piezas + fila["piezas"], lotes + fila["lotes"])
+
+    acumulado, total = [], previas
+    for piezas, _ in por_periodo.values():
+        total += piezas
+        acumulado.append(total)
+    return {
+        "periodos": [p.isoformat() for p in por_periodo],
+        "piezas": [piezas for piezas, _ in por_periodo.values()],
+        "lotes": [lotes for _, lotes in por_periodo.values()],
+        "acumulado": acumulado,
+        "previas": previas,
+    }
+
+
+def por_responsable(proyecto_ids=None, desde=None, hasta=None) -> list[dict]:
+    """[{"usuario", "piezas", "lotes"}] en el rango, de mayor a menor producción."""
+    filas = ProduccionDiaria.objects.all()
+    if proyecto_ids is not None:
+        filas = filas.filter(proyecto_id__in=proyecto_ids)
+    if desde:
+        filas = filas.filter(dia__gte=desde)
+    if hasta:
+        filas = filas.filter(dia__lte=hasta)
+    return [
+        {"usuario": f["subido_por__username"] or "(sin responsable)", "piezas": f["piezas"], "lotes": f["lotes"]}
+        for f in filas.values("subido_por__username")
+        .annotate(piezas=Sum("piezas"), lotes=Sum("lotes")).order_by("-piezas")
+    ]
@@ -1,10 +1,16 @@
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.contrib.auth.models import Group
+from django.core.signals import request_started
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
-from .models import PerfilUsuario, Lote, AuditLog
+from .models import PerfilUsuario, Proyecto, Lote, AuditLog
 from .middleware import get_current_user
+from . import busqueda, previews, produccion
+from .autenticacion import invalidar_grupos, invalidar_usuarios
+from .cache import invalidar_proyectos
 
 User = get_user_model()
 
@@ -22,59 +28,156 @@ def crear_perfil_usuario(sender, instance, created, **kwargs):
 
 # --- Auditoría de archivos en Lote ---
 
-@receiver(pre_save, sender=Lote)
-def lote_pre_save_snapshot(sender, instance: Lote, **kwargs):
+@receiver(post_save, sender=Lote)
+def lote_post_save_audit(sender, instance: Lote, created, **kwargs):
     """
-    Antes de guardar un Lote existente, tomamos un snapshot para comparar
-    los campos de archivo en post_save.
+    Único punto de auditoría de archivos del Lote: junta los UPLOAD/REPLACE de
+    todos los campos de archivo de este guardado y los escribe con un solo
+    bulk_create (dentro de la transacción del save).
+    Usa CurrentUserMiddleware para capturar el usuario en sesión.
     """
-    if instance.pk:
-        try:
-            instance._before = sender.objects.get(pk=instance.pk)
-        except sender.DoesNotExist:
-            instance._before = None
-    else:
-        instance._before = None
+    user = get_current_user()
+    usuario = user if (user and user.is_authenticated) else None
+    registros = []
+
+    # Cambios respecto a lo cargado de la BD (Lote.from_db), sin volver a consultar.
+    # En la creación, todo archivo presente se considera UPLOAD inicial.
+    for field, (old_name, new_name) in instance.changed_file_fields().items():
+        if created:
+            accion = AuditLog.Accion.UPLOAD
+            detalle = f"Carga inicial de {field}: {new_name}"
+        elif not new_name:
+            # Archivo eliminado (ClearableFileInput / admin)
+            accion = AuditLog.Accion.REPLACE
+            detalle = f"Archivo eliminado de {field}: {old_name}"
+        else:
+            accion = AuditLog.Accion.UPLOAD if not old_name else AuditLog.Accion.REPLACE
+            detalle = f"{accion} de {field}: {old_name or '(vacío)'} -> {new_name}"
+        registros.append(AuditLog(
+            lote=instance,
+            campo=field,
+            accion=accion,
+            usuario=usuario,
+            detalle=detalle,
+        ))
+
+    if registros:
+        AuditLog.objects.bulk_create(registros)
 
 
 @receiver(post_save, sender=Lote)
-def lote_post_save_audit(sender, instance: Lote, created, **kwargs):
+def lote_post_save_previews(sender, instance: Lote, **kwargs):
+    """Encola las miniaturas de los archivos nuevos una vez confirmada la transacción."""
+    campos = list(instance.changed_file_fields())
+    if campos:
+        transaction.on_commit(lambda: previews.programar(instance, campos))
+
+
+# --- Índice de texto completo (busqueda.py) ---
+
+@receiver(post_save, sender=Lote)
+def lote_post_save_busqueda(sender, instance: Lote, created, **kwargs):
     """
-    Registra en AuditLog los UPLOAD/REPLACE por cada campo de archivo del Lote.
-    Usa CurrentUserMiddleware para capturar el usuario en sesión.
+    Reindexa solo los documentos que cambiaron (extracción en segundo plano,
+    tras el commit). id_lote/proyecto se copian a las filas existentes solo si
+    cambiaron: el resto de los guardados no toca el índice.
     """
-    user = get_current_user()
-    before = getattr(instance, '_before', None)
+    if not created and instance.cambio_id_o_proyecto():
+        busqueda.actualizar_metadatos(instance)
+    campos = list(instance.changed_file_fields())
+    if campos:
+        transaction.on_commit(lambda: busqueda.programar(instance, campos))
 
-    # Creación: todo archivo presente se considera UPLOAD inicial
-    if created:
-        for field in Lote.FILE_FIELDS:
-            f = getattr(instance, field, None)
-            if f and getattr(f, 'name', ''):
-                AuditLog.objects.create(
-                    lote=instance,
-                    campo=field,
-                    accion=AuditLog.Accion.UPLOAD,
-                    usuario=user if (user and user.is_authenticated) else None,
-                    detalle=f"Carga inicial de {field}: {f.name}",
-                )
+
+@receiver(request_started)
+def recoger_extracciones(sender, **kwargs):
+    """Escribe en el índice las extracciones terminadas, con la conexión de la petición."""
+    busqueda.recoger_extracciones()
+
+
+@receiver(post_delete, sender=Lote)
+def lote_post_delete_busqueda(sender, instance: Lote, **kwargs):
+    busqueda.eliminar_lote(instance.pk)
+
+
+@receiver(post_save, sender=Proyecto)
+def proyecto_post_save_busqueda(sender, instance: Proyecto, created, **kwargs):
+    """Nombre/cliente del proyecto también se buscan: se copian a sus filas."""
+    if not created:
+        busqueda.actualizar_proyecto(instance)
+
+
+# --- Caché versionada de proyectos (cache.py) ---
+
+@receiver(post_save, sender=Proyecto)
+@receiver(post_delete, sender=Proyecto)
+def proyecto_invalidar_cache(sender, instance: Proyecto, **kwargs):
+    invalidar_proyectos(instance.pk)
+
+
+@receiver(post_save, sender=Lote)
+@receiver(post_delete, sender=Lote)
+def lote_invalidar_cache(sender, instance: Lote, **kwargs):
+    """El avance depende de los lotes: invalida su proyecto (y el anterior si cambió)."""
+    invalidar_proyectos(instance.proyecto_id, getattr(instance, "_proyecto_id_original", None))
+
+
+# --- Caché de usuario y permisos (autenticacion.py) ---
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def usuario_invalidar_cache(sender, instance, **kwargs):
+    """Aprobación (is_active), baja, cambio de contraseña, último acceso…"""
+    invalidar_usuarios(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def usuario_grupos_invalidar_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
         return
+    if not reverse:
+        invalidar_usuarios(instance.pk)
+    elif pk_set:
+        invalidar_usuarios(*pk_set)  # grupo.user_set.add(...)
+    else:
+        # grupo.user_set.clear(): no trae los ids, se invalidan los permisos de todos
+        invalidar_grupos()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+@receiver(post_delete, sender=Group)
+def grupo_invalidar_cache(sender, **kwargs):
+    action = kwargs.get("action", "post_delete")
+    # permissions.add() de permisos que ya tiene (_ensure_groups_and_perms) no cambia nada.
+    if action.startswith("post_") and (kwargs.get("pk_set") or action in ("post_clear", "post_delete")):
+        invalidar_grupos()
+
+
+# --- Acumulado diario de producción (produccion.py) ---
+
+@receiver(pre_save, sender=Lote)
+def lote_pre_save_produccion(sender, instance: Lote, raw=False, **kwargs):
+    if not raw:
+        produccion.fijar_original(instance)
+
+
+@receiver(pre_delete, sender=Lote)
+def lote_pre_delete_produccion(sender, instance: Lote, **kwargs):
+    produccion.fijar_original(instance, borrando=True)
+
+
+@receiver(post_save, sender=Lote)
+def lote_post_save_produccion(sender, instance: Lote, created, raw=False, **kwargs):
+    if not raw:
+        produccion.lote_guardado(instance, created)
+
+
+@receiver(post_delete, sender=Lote)
+def lote_post_delete_produccion(sender, instance: Lote, **kwargs):
+    produccion.lote_borrado(instance)
+
 
-    # Actualización: comparamos nombres de archivo antes vs después
-    if before:
-        for field in Lote.FILE_FIELDS:
-            newf = getattr(instance, field, None)
-            oldf = getattr(before, field, None)
-            new_name = getattr(newf, 'name', '') or ''
-            old_name = getattr(oldf, 'name', '') or ''
-
-            # Cambio relevante: si hay archivo nuevo y difiere del anterior
-            if new_name and new_name != old_name:
-                accion = AuditLog.Accion.UPLOAD if not old_name else AuditLog.Accion.REPLACE
-                AuditLog.objects.create(
-                    lote=instance,
-                    campo=field,
-                    accion=accion,
-                    usuario=user if (user and user.is_authenticated) else None,
-                    detalle=f"{accion} de {field}: {old_name or '(vacío)'} -> {new_name}",
-                )
+@receiver(pre_delete, sender=User)
+def usuario_pre_delete_produccion(sender, instance, **kwargs):
+    produccion.usuario_borrado(instance.pk)
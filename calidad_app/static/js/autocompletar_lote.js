@@ -0,0 +1,50 @@
+// Autocompletado de id_lote: pide sugerencias por prefijo mientras se escribe
+// (con una pequeña espera entre teclas) y las muestra en el <datalist> del input.
+// Elegir una sugerencia exacta lleva directo al detalle del lote.
+(function () {
+  const input = document.querySelector('input[data-autocompletar-url]');
+  if (!input || !window.fetch) return;
+
+  const lista = document.getElementById(input.getAttribute('list'));
+  const url = input.dataset.autocompletarUrl;
+  let urls = {};
+  let espera = null;
+  let peticion = null;
+
+  async function sugerir(prefijo) {
+    if (peticion) peticion.abort();
+    peticion = new AbortController();
+    try {
+      const r = await fetch(`${url}?q=${encodeURIComponent(prefijo)}`, {
+        credentials: 'same-origin', signal: peticion.signal,
+      });
+      if (!r.ok) return;
+      const { resultados } = await r.json();
+      urls = {};
+      lista.replaceChildren(...resultados.map((lote) => {
+        urls[lote.id_lote] = lote.url;
+        const opcion = document.createElement('option');
+        opcion.value = lote.id_lote;
+        opcion.label = lote.proyecto;
+        return opcion;
+      }));
+    } catch (err) {
+      if (err.name !== 'AbortError') throw err;
+    }
+  }
+
+  input.addEventListener('input', (evento) => {
+    const prefijo = input.value.trim();
+    // Sugerencia elegida de la lista: ir al lote.
+    if (!evento.inputType && urls[prefijo]) {
+      window.location.href = urls[prefijo];
+      return;
+    }
+    clearTimeout(espera);
+    if (!prefijo) {
+      lista.replaceChildren();
+      return;
+    }
+    espera = setTimeout(() => sugerir(prefijo), 150);
+  });
+})();
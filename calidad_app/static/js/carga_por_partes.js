@@ -0,0 +1,123 @@
+// Subida por partes (reanudable) de los documentos del lote.
+// Cada archivo elegido se sube en fragmentos a /cargas/<id>/; al terminar se
+// guarda el id en el campo oculto "<campo>_carga" y se vacía el input, así el
+// envío final del formulario no lleva archivos. Si algo falla, el archivo se
+// queda en el input y viaja en el multipart normal.
+(function () {
+  const form = document.querySelector('form[data-cargas-url]');
+  if (!form || !window.fetch || !window.Blob) return;
+
+  const urlCargas = form.dataset.cargasUrl;
+  const csrf = form.querySelector('[name=csrfmiddlewaretoken]').value;
+  const boton = form.querySelector('button[type=submit]');
+  const REINTENTOS = 20;
+  let pendientes = 0;
+
+  const esperar = (ms) => new Promise((ok) => setTimeout(ok, ms));
+  const clave = (f) => `carga:${f.name}:${f.size}:${f.lastModified}`;
+
+  function actualizarBoton() {
+    if (boton) boton.disabled = pendientes > 0;
+  }
+
+  function avisoPara(input) {
+    let aviso = form.querySelector(`[data-carga-estado="${input.name}"]`);
+    if (!aviso) {
+      aviso = document.createElement('div');
+      aviso.className = 'form-text';
+      aviso.dataset.cargaEstado = input.name;
+      (input.closest('.input-group') || input).after(aviso);
+    }
+    return aviso;
+  }
+
+  async function pedir(url, opciones) {
+    const r = await fetch(url, Object.assign({ credentials: 'same-origin' }, opciones));
+    const datos = r.status === 204 ? {} : await r.json();
+    return { r, datos };
+  }
+
+  async function estado(id) {
+    const { r, datos } = await pedir(`${urlCargas}${id}/`);
+    return r.ok ? datos : null;
+  }
+
+  async function crear(archivo) {
+    const cuerpo = new FormData();
+    cuerpo.append('nombre', archivo.name);
+    cuerpo.append('tamano', archivo.size);
+    const { r, datos } = await pedir(urlCargas, {
+      method: 'POST', body: cuerpo, headers: { 'X-CSRFToken': csrf },
+    });
+    if (!r.ok) throw new Error(datos.error || 'No se pudo iniciar la carga.');
+    return datos;
+  }
+
+  async function subir(input) {
+    const archivo = input.files[0];
+    const oculto = form.querySelector(`[name="${input.name}_carga"]`);
+    if (!archivo || !oculto) return;
+    const aviso = avisoPara(input);
+    aviso.className = 'form-text';
+    oculto.value = '';
+    pendientes += 1;
+    actualizarBoton();
+
+    try {
+      let carga = null;
+      const previa = localStorage.getItem(clave(archivo));
+      if (previa) carga = await estado(previa);  // reanuda una carga interrumpida
+      if (!carga) {
+        carga = await crear(archivo);
+        localStorage.setItem(clave(archivo), carga.id);
+      }
+
+      let offset = carga.recibido;
+      let fallos = 0;
+      while (offset < archivo.size) {
+        aviso.textContent = `Subiendo… ${Math.floor((offset / archivo.size) * 100)}%`;
+        try {
+          const { r, datos } = await pedir(`${urlCargas}${carga.id}/`, {
+            method: 'PATCH',
+            body: archivo.slice(offset, offset + carga.parte_max),
+            headers: {
+              'X-CSRFToken': csrf,
+              'Upload-Offset': String(offset),
+              'Content-Type': 'application/offset+octet-stream',
+            },
+          });
+          if (!r.ok && r.status !== 409) {
+            const error = new Error(datos.error || 'Error al subir.');
+            error.definitivo = true;
+            throw error;
+          }
+          offset = datos.recibido;  // en 409 el servidor indica desde dónde seguir
+          fallos = 0;
+        } catch (err) {
+          // Red inestable: espera y pregunta cuánto llegó antes de reintentar.
+          fallos += 1;
+          if (err.definitivo || fallos > REINTENTOS) throw err;
+          await esperar(Math.min(1000 * fallos, 10000));
+          const actual = await estado(carga.id).catch(() => null);
+          if (actual) offset = actual.recibido;
+        }
+      }
+
+      oculto.value = carga.id;
+      input.value = '';
+      localStorage.removeItem(clave(archivo));
+      aviso.textContent = `Listo: ${archivo.name}`;
+      aviso.classList.add('text-success');
+    } catch (err) {
+      aviso.textContent = `${err.message} Se enviará con el formulario.`;
+      aviso.classList.add('text-danger');
+    } finally {
+      pendientes -= 1;
+      actualizarBoton();
+    }
+  }
+
+  form.querySelectorAll('input[type=file]').forEach((input) => {
+    input.addEventListener('change', () => subir(input));
+  });
+})();
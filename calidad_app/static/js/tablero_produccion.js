@@ -0,0 +1,49 @@
+// Gráfica del tablero de producción: piezas por periodo (barras) y
+// acumulado contra piezas totales (líneas, eje derecho).
+(function () {
+  const lienzo = document.getElementById("grafica-produccion");
+  const fuente = document.getElementById("datos-produccion");
+  if (!lienzo || !fuente || typeof Chart === "undefined") return;
+  const datos = JSON.parse(fuente.textContent);
+
+  new Chart(lienzo, {
+    data: {
+      labels: datos.periodos,
+      datasets: [
+        {
+          type: "bar",
+          label: datos.agrupar === "semana" ? "Piezas por semana" : "Piezas por día",
+          data: datos.piezas,
+          backgroundColor: "rgba(11, 61, 145, 0.6)",
+          yAxisID: "y",
+        },
+        {
+          type: "line",
+          label: "Acumulado",
+          data: datos.acumulado,
+          borderColor: "#198754",
+          pointRadius: 0,
+          tension: 0.1,
+          yAxisID: "y1",
+        },
+        {
+          type: "line",
+          label: "Piezas totales",
+          data: datos.periodos.map(() => datos.meta),
+          borderColor: "#dc3545",
+          borderDash: [6, 4],
+          pointRadius: 0,
+          yAxisID: "y1",
+        },
+      ],
+    },
+    options: {
+      interaction: { mode: "index", intersect: false },
+      scales: {
+        y: { beginAtZero: true, position: "left", title: { display: true, text: "Piezas" } },
+        y1: { beginAtZero: true, position: "right", grid: { drawOnChartArea: false },
+              title: { display: true, text: "Acumulado" } },
+      },
+    },
+  });
+})();
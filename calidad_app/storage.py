@@ -0,0 +1,154 @@
+"""
+Almacenamiento de documentos con deduplicación por contenido.
+
+Cada contenido se guarda una sola vez como blob en
+<MEDIA_ROOT>/blobs/ab/cd/<sha256>, y cada nombre lógico que usa Django
+(lotes/2025/09/00001_reporte.pdf) es un hard link a ese blob. Así las rutas,
+URLs y `.path` siguen funcionando igual que con FileSystemStorage, pero subir
+el mismo PDF en otro lote o proyecto solo agrega una entrada de directorio.
+
+El conteo de referencias de un blob es su número de enlaces del sistema de
+archivos menos uno (el propio blob): lo mantiene el kernel, así que no se
+desincroniza si un proceso muere a la mitad. Un blob con un solo enlace ya no
+lo usa nadie y se puede borrar.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+CHUNK_SIZE = 64 * 1024
+
+
+def sha256_archivo(ruta) -> str:
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@deconstructible
+class AlmacenamientoDeduplicado(FileSystemStorage):
+    directorio_blobs = "blobs"
+
+    # --- blobs ---
+    def ruta_blob(self, sha: str) -> str:
+        return os.path.join(self.location, self.directorio_blobs, sha[:2], sha[2:4], sha)
+
+    def referencias(self, sha: str) -> int:
+        """Cuántos nombres lógicos apuntan al blob (0 si no existe)."""
+        try:
+            return os.stat(self.ruta_blob(sha)).st_nlink - 1
+        except FileNotFoundError:
+            return 0
+
+    def _enlazar_temporal(self, content) -> str | None:
+        """
+        Atajo para contenidos que ya están en disco con su hash conocido
+        (p.ej. cargas por partes): se enlazan al blob sin volver a leerlos.
+        """
+        sha = getattr(content, "sha256", None)
+        if not sha or not hasattr(content, "temporary_file_path"):
+            return None
+        blob = self.ruta_blob(sha)
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            try:
+                os.link(content.temporary_file_path(), blob)
+            except FileExistsError:
+                pass
+            except OSError:
+                return None  # otro sistema de archivos: se copia por el camino normal
+            if self.file_permissions_mode is not None:
+                os.chmod(blob, self.file_permissions_mode)
+        return blob
+
+    def _guardar_blob(self, content) -> str:
+        """Vuelca `content` al almacén de blobs calculando su SHA-256. Devuelve la ruta del blob."""
+        blob = self._enlazar_temporal(content)
+        if blob:
+            return blob
+        temporales = os.path.join(self.location, self.directorio_blobs, "tmp")
+        os.makedirs(temporales, exist_ok=True)
+        h = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=temporales)
+        try:
+            with os.fdopen(fd, "wb") as destino:
+                if hasattr(content, "seek"):
+                    content.seek(0)
+                for chunk in content.chunks(CHUNK_SIZE):
+                    h.update(chunk)
+                    destino.write(chunk)
+            blob = self.ruta_blob(h.hexdigest())
+            if os.path.exists(blob):
+                os.unlink(tmp)  # contenido ya conocido: solo se enlaza
+            else:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                os.replace(tmp, blob)
+                if self.file_permissions_mode is not None:
+                    os.chmod(blob, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return blob
+
+    # --- API de Storage ---
+    def _save(self, name, content):
+        blob = self._guardar_blob(content)
+        while True:
+            full_path = self.path(name)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            try:
+                os.link(blob, full_path)
+            except FileExistsError:
+                # Otro proceso tomó el nombre entre get_available_name y aquí.
+                name = self.get_available_name(name)
+                continue
+            except OSError:
+                # Sistema de archivos sin hard links: copia normal (sin deduplicar).
+                if os.path.exists(full_path):
+                    name = self.get_available_name(name)
+                    continue
+                shutil.copyfile(blob, full_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+            break
+        return str(name).replace("\\", "/")
+
+    def delete(self, name):
+        if not name:
+            raise ValueError("The name must be given to delete().")
+        full_path = self.path(name)
+        try:
+            sha = sha256_archivo(full_path)
+        except FileNotFoundError:
+            return
+        super().delete(name)
+        blob = self.ruta_blob(sha)
+        try:
+            if os.stat(blob).st_nlink == 1:
+                os.unlink(blob)
+        except FileNotFoundError:
+            pass
+
+    # --- mantenimiento ---
+    def recolectar_blobs(self) -> tuple[int, int]:
+        """Borra blobs sin referencias. Devuelve (blobs borrados, bytes liberados)."""
+        raiz = os.path.join(self.location, self.directorio_blobs)
+        borrados = liberados = 0
+        for carpeta, _, archivos in os.walk(raiz):
+            if os.path.basename(carpeta) == "tmp":
+                continue
+            for nombre in archivos:
+                ruta = os.path.join(carpeta, nombre)
+                st = os.stat(ruta)
+                if st.st_nlink == 1:
+                    os.unlink(ruta)
+                    borrados += 1
+                    liberados += st.st_size
+        return borrados, liberados
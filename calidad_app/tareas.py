@@ -0,0 +1,52 @@
+"""
+Ejecución de trabajo pesado fuera de la petición.
+
+Un ProcessPoolExecutor por proceso (se crea al primer uso) con contexto
+"spawn", que funciona igual en Linux y Windows y no hereda el estado de los
+hilos del worker. Las funciones enviadas deben ser importables a nivel de
+módulo y trabajar con rutas/valores simples, no con objetos del ORM.
+"""
+import atexit
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_lock = threading.Lock()
+
+
+def _obtener_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=getattr(settings, "TAREAS_PROCESOS", 2),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def _registrar_error(futuro):
+    exc = futuro.exception()
+    if exc is not None:
+        logger.error("Tarea en segundo plano falló: %r", exc)
+
+
+def en_segundo_plano(fn, *args, **kwargs):
+    """Envía fn(*args, **kwargs) al pool; los errores solo se registran en el log."""
+    global _pool
+    try:
+        futuro = _obtener_pool().submit(fn, *args, **kwargs)
+    except RuntimeError:
+        # Pool roto (p.ej. un proceso hijo murió): se recrea una vez.
+        with _lock:
+            _pool = None
+        futuro = _obtener_pool().submit(fn, *args, **kwargs)
+    futuro.add_done_callback(_registrar_error)
+    return futuro
@@ -0,0 +1,78 @@
+import base64
+from unittest import mock
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.models import Permission
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from calidad_app.models import Lote, Proyecto
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "pruebas-api"}}
+
+
+def _basic(usuario, password):
+    credenciales = base64.b64encode(f"{usuario}:{password}".encode()).decode()
+    return {"HTTP_AUTHORIZATION": f"Basic {credenciales}"}
+
+
+@override_settings(CACHES=LOCMEM)
+class ApiTests(TestCase):
+    databases = "__all__"  # las vistas leen por la conexión "lectura" si está configurada
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user("mes", password="clave-mes-1")
+        cls.usuario.user_permissions.add(Permission.objects.get(codename="view_lote"))
+        cls.sin_permiso = get_user_model().objects.create_user("visita", password="clave-visita-1")
+        cls.proyecto = Proyecto.objects.create(nombre="P", piezas_totales=100)
+        for i in range(3):
+            Lote.objects.create(proyecto=cls.proyecto, id_lote=f"0000{i}", numero_partes=10)
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_basic_recordado_sin_rehacer_el_hash(self):
+        url = reverse("api_lotes")
+        self.assertEqual(self.client.get(url, **_basic("mes", "clave-mes-1")).status_code, 200)
+        with mock.patch("calidad_app.api.authenticate", wraps=authenticate) as autenticar:
+            self.assertEqual(self.client.get(url, **_basic("mes", "clave-mes-1")).status_code, 200)
+        autenticar.assert_not_called()
+
+    def test_cambio_de_contrasena_invalida_lo_recordado(self):
+        url = reverse("api_lotes")
+        self.assertEqual(self.client.get(url, **_basic("mes", "clave-mes-1")).status_code, 200)
+        self.usuario.set_password("clave-mes-2")
+        self.usuario.save()
+        self.assertEqual(self.client.get(url, **_basic("mes", "clave-mes-1")).status_code, 401)
+        self.assertEqual(self.client.get(url, **_basic("mes", "clave-mes-2")).status_code, 200)
+
+    def test_sin_credenciales_o_sin_permiso(self):
+        url = reverse("api_lotes")
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 401)
+        self.assertIn("Basic", respuesta["WWW-Authenticate"])
+        self.assertEqual(self.client.get(url, **_basic("visita", "clave-visita-1")).status_code, 403)
+        self.assertEqual(self.client.get(reverse("api_proyectos"), **_basic("visita", "clave-visita-1")).status_code, 200)
+
+    def test_paginacion_por_cursor(self):
+        vistos, url = [], reverse("api_lotes") + "?limite=2"
+        while url:
+            datos = self.client.get(url, **_basic("mes", "clave-mes-1")).json()
+            vistos += [lote["id_lote"] for lote in datos["resultados"]]
+            url = datos["siguiente"]
+        self.assertEqual(sorted(vistos), ["00000", "00001", "00002"])
+
+    def test_etag_y_borrado(self):
+        url = reverse("api_lotes")
+        respuesta = self.client.get(url, **_basic("mes", "clave-mes-1"))
+        etag = respuesta["ETag"]
+        self.assertNotIn("Last-Modified", respuesta)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag, **_basic("mes", "clave-mes-1")).status_code, 304)
+        # Borrar no mueve el "modificado" máximo, pero el conteo sí cambia el ETag.
+        Lote.objects.order_by("modificado").first().delete()
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **_basic("mes", "clave-mes-1"))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.json()["resultados"]), 2)
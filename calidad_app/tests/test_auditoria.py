@@ -0,0 +1,94 @@
+import gzip
+import io
+import json
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from calidad_app import auditoria
+from calidad_app.models import AuditLog, Lote, Proyecto
+
+
+class ArchivoAuditoriaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        proyecto = Proyecto.objects.create(nombre="P", piezas_totales=10)
+        cls.lotes = [Lote.objects.create(proyecto=proyecto, id_lote=f"{i:05d}") for i in range(3)]
+        vieja = timezone.now() - timedelta(days=400)
+        for i in range(9):
+            AuditLog.objects.create(lote=cls.lotes[i % 3], campo="plano_original",
+                                    accion=AuditLog.Accion.UPLOAD, detalle=f"fila {i}")
+        AuditLog.objects.update(fecha=vieja)
+        cls.reciente = AuditLog.objects.create(lote=cls.lotes[0], campo="plano_original",
+                                               accion=AuditLog.Accion.REPLACE, detalle="reciente")
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.carpeta = Path(tmp.name)
+        ajustes = override_settings(AUDITORIA_ARCHIVO_DIR=self.carpeta)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.corte = timezone.now() - timedelta(days=365)
+
+    def test_archivar_mueve_las_filas_viejas(self):
+        with mock.patch.object(auditoria, "FILAS_POR_BLOQUE", 2):
+            resultado = list(auditoria.archivar(self.corte, tamano_segmento=5))
+
+        self.assertEqual([borradas for _, borradas in resultado], [5, 4])
+        self.assertEqual(list(AuditLog.objects.values_list("pk", flat=True)), [self.reciente.pk])
+        entradas = auditoria.indice()
+        self.assertEqual([e["filas"] for e in entradas], [5, 4])
+        self.assertEqual([len(e["bloques"]) for e in entradas], [3, 2])
+
+        # El segmento completo se lee como un gzip normal (bloques concatenados).
+        segmento = self.carpeta / entradas[0]["segmento"]
+        with gzip.open(segmento, "rt", encoding="utf-8") as f:
+            filas = [json.loads(linea) for linea in f]
+        self.assertEqual(len(filas), 5)
+        self.assertEqual(filas, sorted(filas, key=lambda f: (f["lote_id"], f["id"])))
+        self.assertEqual(filas[0]["id_lote"], self.lotes[0].id_lote)
+
+    def test_historial_une_tabla_y_archivo(self):
+        list(auditoria.archivar(self.corte))
+        lote = self.lotes[0]
+        historial = auditoria.historial_lote(lote.pk)
+
+        self.assertEqual([f["detalle"] for f in historial], ["reciente", "fila 6", "fila 3", "fila 0"])
+        self.assertTrue(all(f["lote_id"] == lote.pk for f in historial))
+        self.assertEqual(historial[0]["fecha"], self.reciente.fecha)
+        self.assertIsNotNone(historial[-1]["fecha"].tzinfo)
+
+    def test_filas_en_ambos_lados_no_se_repiten(self):
+        # Proceso interrumpido entre escribir el segmento y el DELETE.
+        filas = [auditoria.fila_json(a) for a in AuditLog.objects.filter(fecha__lt=self.corte)]
+        auditoria.escribir_segmento(filas)
+        historial = auditoria.historial_lote(self.lotes[1].pk)
+        self.assertEqual([f["detalle"] for f in historial], ["fila 7", "fila 4", "fila 1"])
+
+    def test_solo_lee_los_bloques_del_lote(self):
+        with mock.patch.object(auditoria, "FILAS_POR_BLOQUE", 3):
+            list(auditoria.archivar(self.corte))
+        with mock.patch.object(auditoria, "_leer_bloque", wraps=auditoria._leer_bloque) as leer:
+            filas = auditoria.archivadas_lote(self.lotes[2].pk)
+        self.assertEqual(len(filas), 3)
+        self.assertEqual(leer.call_count, 1)  # 3 bloques, uno por lote
+
+    def test_segmento_sin_indice_se_ignora(self):
+        (self.carpeta / "segmento-huerfano.jsonl.gz").write_bytes(gzip.compress(b"{}\n"))
+        self.assertEqual(auditoria.archivadas_lote(self.lotes[0].pk), [])
+
+    def test_comando(self):
+        salida = io.StringIO()
+        call_command("archivar_auditoria", "--simular", stdout=salida)
+        self.assertIn(": 9", salida.getvalue())
+        self.assertEqual(AuditLog.objects.count(), 10)
+
+        call_command("archivar_auditoria", "--limite", "4", stdout=salida)
+        self.assertIn("Filas archivadas: 4", salida.getvalue())
+        self.assertEqual(AuditLog.objects.count(), 6)
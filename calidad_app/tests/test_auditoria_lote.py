@@ -0,0 +1,66 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from calidad_app.models import AuditLog, Lote, Proyecto
+
+
+def _consultas(ctx, inicio, tabla):
+    return [q["sql"] for q in ctx.captured_queries if q["sql"].startswith(inicio) and tabla in q["sql"]]
+
+
+class AuditoriaArchivosTests(TestCase):
+    """Una fila de auditoría por documento que cambia, escritas con un solo INSERT."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proyecto = Proyecto.objects.create(nombre="P", piezas_totales=10)
+
+    def test_alta_con_varios_documentos(self):
+        with CaptureQueriesContext(connection) as ctx:
+            lote = Lote.objects.create(
+                proyecto=self.proyecto, id_lote="00001", fecha=date(2024, 1, 1),
+                plano_original="lotes/2024/01/00001_plano.pdf",
+                pruebas_mecanicas="lotes/2024/01/00001_pruebas.pdf",
+            )
+        self.assertEqual(len(_consultas(ctx, "INSERT", '"calidad_app_auditlog"')), 1)
+        self.assertEqual(
+            set(lote.auditorias.values_list("campo", "accion")),
+            {("plano_original", "UPLOAD"), ("pruebas_mecanicas", "UPLOAD")},
+        )
+
+    def test_reemplazo_y_borrado(self):
+        lote = Lote.objects.create(
+            proyecto=self.proyecto, id_lote="00001", fecha=date(2024, 1, 1),
+            plano_original="lotes/a.pdf", pruebas_mecanicas="lotes/b.pdf",
+        )
+        AuditLog.objects.all().delete()
+
+        lote = Lote.objects.get(pk=lote.pk)
+        lote.plano_original = "lotes/a_v2.pdf"
+        lote.pruebas_mecanicas = None
+        lote.evidencia_fotografica = "lotes/c.jpg"
+        lote.save()
+        self.assertEqual(
+            {(a.campo, a.accion, a.detalle) for a in lote.auditorias.all()},
+            {
+                ("plano_original", "REPLACE", "REPLACE de plano_original: lotes/a.pdf -> lotes/a_v2.pdf"),
+                ("pruebas_mecanicas", "REPLACE", "Archivo eliminado de pruebas_mecanicas: lotes/b.pdf"),
+                ("evidencia_fotografica", "UPLOAD", "UPLOAD de evidencia_fotografica: (vacío) -> lotes/c.jpg"),
+            },
+        )
+
+        # Guardar de nuevo sin tocar archivos no audita nada.
+        lote.numero_partes = 5
+        lote.save()
+        self.assertEqual(lote.auditorias.count(), 3)
+
+    def test_fuera_de_una_peticion_no_hereda_el_usuario(self):
+        self.client.force_login(get_user_model().objects.create_user("operador", password="x"))
+        self.client.get(reverse("ver_proyectos"))
+        lote = Lote.objects.create(proyecto=self.proyecto, id_lote="00001", plano_original="lotes/a.pdf")
+        self.assertIsNone(lote.auditorias.get().usuario)
@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache as cache_django
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from calidad_app.autenticacion import CachedModelBackend
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "pruebas-auth"}}
+
+
+@override_settings(CACHES=LOCMEM)
+class CachedModelBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user("operador", password="clave-1")
+        cls.grupo = Group.objects.create(name="Calidad")
+        cls.usuario.groups.add(cls.grupo)
+
+    def setUp(self):
+        cache_django.clear()
+
+    def test_usuario_y_permisos_sin_consultas(self):
+        backend = CachedModelBackend()
+        backend.get_all_permissions(backend.get_user(self.usuario.pk))
+        with self.assertNumQueries(0):
+            usuario = backend.get_user(self.usuario.pk)
+            self.assertEqual(usuario.username, "operador")
+            self.assertEqual(backend.get_all_permissions(usuario), set())
+            self.assertEqual(usuario.get_session_auth_hash(), self.usuario.get_session_auth_hash())
+
+    def test_la_cache_no_guarda_el_hash_de_la_contrasena(self):
+        CachedModelBackend().get_user(self.usuario.pk)
+        contenido = b"".join(cache_django._cache.values())  # LocMemCache guarda los valores serializados
+        self.assertNotIn(self.usuario.password.encode(), contenido)
+
+    def test_save_no_pisa_la_contrasena(self):
+        usuario = CachedModelBackend().get_user(self.usuario.pk)
+        usuario.first_name = "Ana"
+        usuario.save()
+        self.assertTrue(get_user_model().objects.get(pk=self.usuario.pk).check_password("clave-1"))
+
+    def test_permisos_de_grupo_invalidan(self):
+        backend = CachedModelBackend()
+        self.assertEqual(backend.get_all_permissions(backend.get_user(self.usuario.pk)), set())
+        self.grupo.permissions.add(Permission.objects.get(codename="view_lote"))
+        self.assertEqual(backend.get_all_permissions(backend.get_user(self.usuario.pk)), {"calidad_app.view_lote"})
+
+    def test_cambio_de_contrasena_cierra_la_sesion(self):
+        self.client.login(username="operador", password="clave-1")
+        self.assertEqual(self.client.get(reverse("ver_proyectos")).status_code, 200)
+        self.usuario.set_password("clave-2")
+        self.usuario.save()
+        self.assertEqual(self.client.get(reverse("ver_proyectos")).status_code, 302)
@@ -0,0 +1,37 @@
+import os
+import sqlite3
+import tempfile
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase, override_settings
+
+from calidad_app.basedatos import configurar_sqlite
+
+
+class ModoProduccionTests(SimpleTestCase):
+    def _conectar(self, nombre=None):
+        fd, ruta = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        self.addCleanup(os.unlink, ruta)
+        con = sqlite3.connect(ruta)
+        self.addCleanup(con.close)
+        configurar_sqlite(None, SimpleNamespace(vendor="sqlite", settings_dict={"NAME": nombre or ruta},
+                                                connection=con))
+        return con
+
+    @override_settings(SQLITE_PRODUCCION=False)
+    def test_apagado_no_toca_el_archivo(self):
+        con = self._conectar()
+        self.assertEqual(con.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+
+    @override_settings(SQLITE_PRODUCCION=True, SQLITE_PRAGMAS={"mmap_size": None})
+    def test_encendido_aplica_los_pragmas(self):
+        con = self._conectar()
+        self.assertEqual(con.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(con.execute("PRAGMA busy_timeout").fetchone()[0], 5000)
+        self.assertEqual(con.execute("PRAGMA mmap_size").fetchone()[0], 0)  # None: no se aplica
+
+    @override_settings(SQLITE_PRODUCCION=True)
+    def test_conexion_de_solo_lectura_no_cambia_el_modo(self):
+        con = self._conectar(nombre="file:x.sqlite3?mode=ro")
+        self.assertEqual(con.execute("PRAGMA journal_mode").fetchone()[0], "delete")
@@ -0,0 +1,81 @@
+from concurrent.futures import Future
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from calidad_app import busqueda
+from calidad_app.models import Lote, Proyecto
+
+
+def _terminado(resultado=None, error=None) -> Future:
+    futuro = Future()
+    if error is not None:
+        futuro.set_exception(error)
+    else:
+        futuro.set_result(resultado)
+    return futuro
+
+
+class BusquedaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.p1 = Proyecto.objects.create(nombre="Carcasas", cliente="ACME", piezas_totales=10)
+        cls.p2 = Proyecto.objects.create(nombre="Bridas", piezas_totales=10)
+        cls.lote = Lote.objects.create(proyecto=cls.p1, id_lote="00001", plano_original="lotes/00001_plano.pdf")
+
+    def setUp(self):
+        self.addCleanup(busqueda._pendientes.clear)
+
+    def _indexar(self, texto="tolerancia de planitud"):
+        busqueda.guardar(self.lote.pk, busqueda.metadatos(self.lote), [("plano_original", texto)])
+
+    def _fila(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT id_lote, proyecto, cliente, contenido FROM {busqueda.TABLA} WHERE lote_id = %s",
+                           [self.lote.pk])
+            return cursor.fetchall()
+
+    def test_guardar_sin_cambiar_id_ni_proyecto_no_toca_el_indice(self):
+        self._indexar()
+        lote = Lote.objects.get(pk=self.lote.pk)
+        lote.numero_partes = 7
+        with CaptureQueriesContext(connection) as ctx:
+            lote.save()
+        consultas = " ".join(q["sql"] for q in ctx.captured_queries)
+        self.assertNotIn(busqueda.TABLA, consultas)
+        self.assertNotIn('FROM "calidad_app_proyecto"', consultas)
+
+    def test_cambio_de_id_y_proyecto_se_copia_al_indice(self):
+        self._indexar()
+        lote = Lote.objects.get(pk=self.lote.pk)
+        lote.id_lote = "00099"
+        lote.save()
+        self.assertEqual(self._fila(), [("00099", "Carcasas", "ACME", "tolerancia de planitud")])
+
+        lote.proyecto = self.p2
+        lote.save()
+        self.assertEqual(self._fila(), [("00099", "Bridas", "", "tolerancia de planitud")])
+        self.assertEqual([r["lote_id"] for r in busqueda.buscar("bridas")], [self.lote.pk])
+
+    def test_recoger_extracciones_en_el_hilo_que_llama(self):
+        rutas = dict(busqueda.documentos(self.lote, ["plano_original"]))
+        en_curso = Future()
+        busqueda._pendientes[:] = [
+            (self.lote.pk, rutas, _terminado([("plano_original", "rugosidad superficial")])),
+            (self.lote.pk, rutas, en_curso),
+        ]
+        self.assertEqual(busqueda.recoger_extracciones(), 1)
+        self.assertEqual(self._fila(), [("00001", "Carcasas", "ACME", "rugosidad superficial")])
+        self.assertEqual(len(busqueda._pendientes), 1)  # la que sigue en curso queda pendiente
+
+    def test_extraccion_vieja_o_fallida_se_descarta(self):
+        self._indexar()
+        viejas = {"plano_original": "/otra/ruta/plano_anterior.pdf"}
+        busqueda._pendientes[:] = [
+            (self.lote.pk, viejas, _terminado([("plano_original", "texto del archivo anterior")])),
+            (self.lote.pk, viejas, _terminado(error=RuntimeError("pool roto"))),
+        ]
+        with self.assertLogs("calidad_app.busqueda", "ERROR"):
+            self.assertEqual(busqueda.recoger_extracciones(), 2)
+        self.assertEqual(self._fila(), [("00001", "Carcasas", "ACME", "tolerancia de planitud")])
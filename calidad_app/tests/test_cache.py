@@ -0,0 +1,60 @@
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from calidad_app import cache
+from calidad_app.models import Lote, Proyecto
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "pruebas-cache"}}
+
+
+@override_settings(CACHES=LOCMEM)
+class CacheProyectosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.proyecto = Proyecto.objects.create(nombre="P", piezas_totales=100)
+
+    def setUp(self):
+        cache._cache().clear()
+
+    def test_lectura_cacheada(self):
+        self.assertEqual([p.nombre for p in cache.proyectos()], ["P"])
+        with self.assertNumQueries(0):
+            cache.proyectos()
+            self.assertEqual(cache.proyectos()[0].avance_pct, 0)
+
+    def test_guardar_un_lote_invalida_al_confirmar(self):
+        self.assertEqual(cache.avance_proyecto(self.proyecto.pk)["piezas_producidas"], 0)
+        version = cache.version("proyectos")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Lote.objects.create(proyecto=self.proyecto, id_lote="00001", numero_partes=25)
+                # Aún sin confirmar: la versión no cambia.
+                self.assertEqual(cache.version("proyectos"), version)
+        self.assertNotEqual(cache.version("proyectos"), version)
+        self.assertEqual(cache.avance_proyecto(self.proyecto.pk),
+                         {"piezas_producidas": 25, "avance_pct": 25.0})
+
+    def test_mover_un_lote_invalida_ambos_proyectos(self):
+        otro = Proyecto.objects.create(nombre="Q", piezas_totales=100)
+        with self.captureOnCommitCallbacks(execute=True):
+            lote = Lote.objects.create(proyecto=self.proyecto, id_lote="00001", numero_partes=10)
+        self.assertEqual(cache.avance_proyecto(self.proyecto.pk)["piezas_producidas"], 10)
+        self.assertEqual(cache.avance_proyecto(otro.pk)["piezas_producidas"], 0)
+
+        lote.proyecto = otro
+        with self.captureOnCommitCallbacks(execute=True):
+            lote.save()
+        self.assertEqual(cache.avance_proyecto(self.proyecto.pk)["piezas_producidas"], 0)
+        self.assertEqual(cache.avance_proyecto(otro.pk)["piezas_producidas"], 10)
+
+    def test_transaccion_revertida_no_invalida(self):
+        version = cache.version("proyectos")
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Lote.objects.create(proyecto=self.proyecto, id_lote="00001", numero_partes=25)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(cache.version("proyectos"), version)
@@ -0,0 +1,63 @@
+import hashlib
+import io
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from calidad_app import cargas
+
+
+class EscribirParteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user("editor", password="x")
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        ajustes = override_settings(CARGAS_DIR=directorio)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_fragmentos_en_orden(self):
+        datos = b"0123456789" * 10
+        carga = cargas.crear(self.usuario, "plano.pdf", len(datos))
+        carga = cargas.escribir_parte(carga, 0, io.BytesIO(datos[:60]), limite=1000)
+        self.assertEqual(carga.recibido, 60)
+        self.assertFalse(carga.completa)
+
+        carga = cargas.escribir_parte(carga, 60, io.BytesIO(datos[60:]), limite=1000)
+        self.assertTrue(carga.completa)
+        self.assertEqual(carga.sha256, hashlib.sha256(datos).hexdigest())
+        with open(carga.ruta, "rb") as f:
+            self.assertEqual(f.read(), datos)
+
+    def test_offset_incorrecto(self):
+        carga = cargas.crear(self.usuario, "plano.pdf", 100)
+        cargas.escribir_parte(carga, 0, io.BytesIO(b"a" * 10), limite=1000)
+        # Reintento del mismo fragmento (p.ej. tras un corte): ya no corresponde.
+        with self.assertRaises(cargas.ParteInvalida) as ctx:
+            cargas.escribir_parte(carga, 0, io.BytesIO(b"b" * 10), limite=1000)
+        self.assertEqual(ctx.exception.status, 409)
+        carga.refresh_from_db()
+        self.assertEqual(carga.recibido, 10)
+
+    def test_excede_el_tamano(self):
+        carga = cargas.crear(self.usuario, "plano.pdf", 10)
+        with self.assertRaises(cargas.ParteInvalida) as ctx:
+            cargas.escribir_parte(carga, 0, io.BytesIO(b"a" * 11), limite=1000)
+        self.assertEqual(ctx.exception.status, 413)
+        carga.refresh_from_db()
+        self.assertEqual(carga.recibido, 0)
+
+    def test_escritura_concurrente_rechazada(self):
+        carga = cargas.crear(self.usuario, "plano.pdf", 10)
+        with open(carga.ruta, "r+b") as otro:
+            self.assertTrue(cargas._bloquear(otro))  # otra petición escribiendo
+            with self.assertRaises(cargas.ParteInvalida) as ctx:
+                cargas.escribir_parte(carga, 0, io.BytesIO(b"a" * 10), limite=1000)
+        self.assertEqual(ctx.exception.status, 409)
+        carga = cargas.escribir_parte(carga, 0, io.BytesIO(b"a" * 10), limite=1000)
+        self.assertTrue(carga.completa)
@@ -0,0 +1,50 @@
+from django.test import TestCase
+
+from calidad_app.models import Lote, Proyecto
+
+TODOS = {campo: f"lotes/x/{campo}.pdf" for campo in Lote.REQUIRED_FILE_FIELDS}
+
+
+class CompletitudTests(TestCase):
+    """num_faltantes sigue a los documentos y permite filtrar/agregar en SQL."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proyecto = Proyecto.objects.create(nombre="P", piezas_totales=10)
+
+    def test_save_mantiene_num_faltantes(self):
+        lote = Lote.objects.create(proyecto=self.proyecto, id_lote="00001", plano_original="lotes/x/plano.pdf")
+        self.assertEqual(lote.num_faltantes, len(Lote.REQUIRED_FILE_FIELDS) - 1)
+
+        for campo, nombre in TODOS.items():
+            setattr(lote, campo, nombre)
+        lote.save()
+        self.assertEqual(Lote.objects.get(pk=lote.pk).num_faltantes, 0)
+
+        lote.plano_original = None
+        lote.save(update_fields=["plano_original"])  # también con update_fields
+        self.assertEqual(Lote.objects.get(pk=lote.pk).num_faltantes, 1)
+
+    def test_campos_diferidos_no_se_recalculan(self):
+        lote = Lote.objects.create(proyecto=self.proyecto, id_lote="00001", **TODOS)
+        diferido = Lote.objects.only("id", "numero_partes").get(pk=lote.pk)
+        diferido.numero_partes = 3
+        diferido.save(update_fields=["numero_partes"])
+        self.assertEqual(Lote.objects.get(pk=lote.pk).num_faltantes, 0)
+
+    def test_filtros_y_agregados(self):
+        completo = Lote.objects.create(proyecto=self.proyecto, id_lote="00001", **TODOS)
+        incompleto = Lote.objects.create(proyecto=self.proyecto, id_lote="00002")
+        self.assertEqual(list(Lote.objects.completos()), [completo])
+        self.assertEqual(list(Lote.objects.incompletos()), [incompleto])
+
+        proyecto = Proyecto.objects.con_avance().get(pk=self.proyecto.pk)
+        self.assertEqual((proyecto.lotes_total, proyecto.lotes_completos), (2, 1))
+
+    def test_recalcular_faltantes(self):
+        lote = Lote.objects.create(proyecto=self.proyecto, id_lote="00001")
+        Lote.objects.filter(pk=lote.pk).update(**TODOS)  # update() no pasa por save()
+        self.assertEqual(Lote.objects.get(pk=lote.pk).num_faltantes, len(TODOS))
+
+        self.assertEqual(Lote.objects.recalcular_faltantes(), 1)
+        self.assertEqual(Lote.objects.get(pk=lote.pk).num_faltantes, 0)
@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from calidad_app.models import Lote, Proyecto
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "pruebas-condicional"}}
+
+
+@override_settings(CACHES=LOCMEM)
+class PaginaCondicionalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user("operador", password="x")
+        cls.proyecto = Proyecto.objects.create(nombre="P", piezas_totales=100)
+        cls.lote = Lote.objects.create(proyecto=cls.proyecto, id_lote="00001", numero_partes=10)
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client.force_login(self.usuario)
+
+    def _etag(self, url):
+        self.client.get(url)  # fija la cookie CSRF, que forma parte del ETag
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotIn("Last-Modified", respuesta)
+        self.assertIn("no-cache", respuesta["Cache-Control"])
+        return respuesta["ETag"]
+
+    def test_lista_de_proyectos_304_sin_consultas(self):
+        url = reverse("ver_proyectos")
+        etag = self._etag(url)
+        self.client.get(url)  # usuario y permisos en caché
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_cambio_en_un_lote_invalida_la_lista(self):
+        url = reverse("ver_proyectos")
+        etag = self._etag(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lote.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detalle_de_lote(self):
+        url = reverse("detalle_lote", args=[self.lote.id])
+        etag = self._etag(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.lote.numero_partes = 11
+        self.lote.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_el_etag_depende_del_usuario(self):
+        url = reverse("detalle_lote", args=[self.lote.id])
+        etag = self._etag(url)
+        self.client.force_login(get_user_model().objects.create_user("otro", password="x"))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
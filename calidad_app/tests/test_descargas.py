@@ -0,0 +1,112 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.files.base import ContentFile
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from calidad_app.descargas import _rango
+from calidad_app.models import Lote, Proyecto
+
+ETAG = '"abc-64-1"'
+MTIME = 1_700_000_000
+
+
+class RangoTests(SimpleTestCase):
+    def _rango(self, tamano=100, **cabeceras):
+        request = RequestFactory().get("/", **cabeceras)
+        return _rango(request, tamano, ETAG, MTIME)
+
+    def test_sin_cabecera(self):
+        self.assertIsNone(self._rango())
+
+    def test_rango_simple_y_abierto(self):
+        self.assertEqual(self._rango(HTTP_RANGE="bytes=0-9"), (0, 9))
+        self.assertEqual(self._rango(HTTP_RANGE="bytes=90-"), (90, 99))
+        self.assertEqual(self._rango(HTTP_RANGE="bytes=90-500"), (90, 99))  # fin recortado
+
+    def test_sufijo(self):
+        self.assertEqual(self._rango(HTTP_RANGE="bytes=-5"), (95, 99))
+        self.assertEqual(self._rango(HTTP_RANGE="bytes=-500"), (0, 99))
+        self.assertIs(self._rango(HTTP_RANGE="bytes=-0"), False)
+
+    def test_no_satisfacible(self):
+        self.assertIs(self._rango(HTTP_RANGE="bytes=100-"), False)
+        self.assertIs(self._rango(HTTP_RANGE="bytes=9-3"), False)
+
+    def test_archivo_vacio(self):
+        for rango in ("bytes=-5", "bytes=0-", "bytes=0-0"):
+            with self.subTest(rango=rango):
+                self.assertIs(self._rango(tamano=0, HTTP_RANGE=rango), False)
+
+    def test_varios_rangos_o_sintaxis_desconocida_se_ignoran(self):
+        self.assertIsNone(self._rango(HTTP_RANGE="bytes=0-1,5-9"))
+        self.assertIsNone(self._rango(HTTP_RANGE="items=0-1"))
+        self.assertIsNone(self._rango(HTTP_RANGE="bytes=-"))
+
+    def test_if_range(self):
+        self.assertEqual(self._rango(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=ETAG), (0, 9))
+        self.assertEqual(self._rango(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=http_date(MTIME)), (0, 9))
+        # La copia del cliente es de otra versión: va el archivo completo.
+        self.assertIsNone(self._rango(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"otro"'))
+        self.assertIsNone(self._rango(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=http_date(MTIME - 60)))
+
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "pruebas-descargas"}}
+
+
+class DescargaDocumentoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.con_permiso = get_user_model().objects.create_user("calidad", password="x")
+        cls.con_permiso.user_permissions.add(Permission.objects.get(codename="view_lote"))
+        cls.sin_permiso = get_user_model().objects.create_user("visita", password="x")
+        cls.proyecto = Proyecto.objects.create(nombre="P", piezas_totales=10)
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=directorio, ZIP_CACHE_DIR=f"{directorio}/zips",
+                                    PREVIEWS_DIR=f"{directorio}/previews", CACHES=LOCMEM, DESCARGAS_MODO="")
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.lote = Lote(proyecto=self.proyecto, id_lote="00001")
+        self.lote.plano_original.save("plano.pdf", ContentFile(b"0123456789" * 10), save=False)
+        self.lote.save()
+
+    def _urls(self):
+        return [
+            reverse("descargar_documento", args=[self.lote.id, "plano_original"]),
+            reverse("preview_documento", args=[self.lote.id, "plano_original"]),
+            reverse("descargar_zip", args=[self.lote.id]),
+            reverse("exportar_proyecto", args=[self.proyecto.id]),
+        ]
+
+    def test_sin_permiso_403_en_todas_las_rutas(self):
+        self.client.force_login(self.sin_permiso)
+        for url in self._urls():
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_descarga_completa_y_por_rango(self):
+        self.client.force_login(self.con_permiso)
+        url = reverse("descargar_documento", args=[self.lote.id, "plano_original"])
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(b"".join(respuesta.streaming_content), b"0123456789" * 10)
+
+        respuesta = self.client.get(url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(respuesta["Content-Range"], "bytes 10-19/100")
+        self.assertEqual(b"".join(respuesta.streaming_content), b"0123456789")
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=respuesta["ETag"]).status_code, 304)
+
+    @override_settings(DESCARGAS_MODO="x-accel-redirect")
+    def test_x_accel_redirect(self):
+        self.client.force_login(self.con_permiso)
+        respuesta = self.client.get(reverse("descargar_documento", args=[self.lote.id, "plano_original"]))
+        self.assertEqual(respuesta["X-Accel-Redirect"], f"/media-protegida/{self.lote.plano_original.name}")
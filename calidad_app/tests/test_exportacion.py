@@ -0,0 +1,66 @@
+import io
+import os
+import zipfile
+from datetime import datetime
+
+from django.core.files.base import ContentFile, File
+from django.test import SimpleTestCase
+
+from calidad_app.zipstream import nombre_entrada, zip_paralelo
+
+FECHA = datetime(2024, 5, 6, 7, 8, 10)
+
+
+def _zip(partes) -> zipfile.ZipFile:
+    return zipfile.ZipFile(io.BytesIO(b"".join(partes)))
+
+
+class ArchivoRoto(ContentFile):
+    """Falla al leerse, como un documento que desapareció del disco."""
+
+    def chunks(self, chunk_size=None):
+        raise OSError("no se puede leer")
+
+
+class ZipParaleloTests(SimpleTestCase):
+    def test_ida_y_vuelta_y_omitidos(self):
+        pdf = b"%PDF-1.4 " + b"BT /F1 12 Tf (texto) Tj ET " * 5000
+        aleatorio = os.urandom(50_000)
+        entradas = [
+            ("L1/plano.pdf", ContentFile(pdf, name="plano.pdf"), FECHA),
+            ("L1/escaneo.pdf", ContentFile(aleatorio, name="escaneo.pdf"), FECHA),
+            ("L1/foto.jpg", ContentFile(aleatorio, name="foto.jpg"), FECHA),
+            ("L2/roto.pdf", ArchivoRoto(b"zz", name="roto.pdf"), FECHA),
+        ]
+        with self.assertLogs("calidad_app.zipstream", "ERROR"):
+            z = _zip(zip_paralelo(entradas, trabajadores=2, omitidos=["L3/ausente.pdf"]))
+
+        self.assertIsNone(z.testzip())
+        self.assertEqual(z.namelist(), ["L1/plano.pdf", "L1/escaneo.pdf", "L1/foto.jpg", "OMITIDOS.txt"])
+        self.assertEqual(z.read("L1/plano.pdf"), pdf)
+        self.assertEqual(z.read("L1/escaneo.pdf"), aleatorio)
+        # En la exportación el PDF compresible se comprime; el que no se reduce va sin comprimir.
+        self.assertEqual(z.getinfo("L1/plano.pdf").compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(z.getinfo("L1/escaneo.pdf").compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(z.getinfo("L1/foto.jpg").compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(z.getinfo("L1/plano.pdf").date_time, (2024, 5, 6, 7, 8, 10))
+        omitidos = z.read("OMITIDOS.txt").decode()
+        self.assertIn("L2/roto.pdf", omitidos)
+        self.assertIn("L3/ausente.pdf", omitidos)
+
+    def test_descarga_interrumpida_cierra_los_archivos(self):
+        # File y no ContentFile: el close() de ContentFile no hace nada.
+        archivos = [File(io.BytesIO(os.urandom(1000)), name=f"{i}.jpg") for i in range(3)]
+        partes = zip_paralelo([(a.name, a, FECHA) for a in archivos], trabajadores=1)
+        next(partes)  # encabezado de la primera entrada, todavía sin leerla
+        partes.close()
+        self.assertTrue(all(a.closed for a in archivos))
+
+
+class NombreEntradaTests(SimpleTestCase):
+    def test_sin_separadores_ni_rutas_relativas(self):
+        self.assertEqual(nombre_entrada("00012"), "00012")
+        self.assertEqual(nombre_entrada("A/B"), "A_B")
+        self.assertEqual(nombre_entrada("..\\..\\x"), ".._.._x")
+        self.assertEqual(nombre_entrada(".."), "_")
+        self.assertEqual(nombre_entrada("  "), "_")
@@ -0,0 +1,55 @@
+from datetime import date
+
+from django.test import TestCase
+
+from calidad_app.models import Lote, Proyecto
+from calidad_app.paginacion import CursorInvalido, paginar
+
+ORDEN = ("-fecha", "id_lote")
+
+
+class PaginarTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        proyecto = Proyecto.objects.create(nombre="P", piezas_totales=100)
+        # Varias fechas repetidas: el desempate por id_lote debe cruzar páginas.
+        fechas = [date(2024, 1, 1)] * 4 + [date(2024, 1, 2)] * 3 + [date(2024, 1, 3)]
+        for i, fecha in enumerate(fechas):
+            Lote.objects.create(proyecto=proyecto, id_lote=f"{i:05d}", fecha=fecha)
+        cls.esperado = list(Lote.objects.order_by(*ORDEN).values_list("id_lote", flat=True))
+
+    def _ids(self, pagina):
+        return [lote.id_lote for lote in pagina]
+
+    def test_avanzar_por_todas_las_paginas(self):
+        vistos, cursor, paginas = [], None, 0
+        while True:
+            pagina = paginar(Lote.objects.all(), ORDEN, despues=cursor, tamano=3)
+            vistos += self._ids(pagina)
+            paginas += 1
+            if not pagina.siguiente:
+                break
+            cursor = pagina.siguiente
+        self.assertEqual(vistos, self.esperado)
+        self.assertEqual(paginas, 3)
+
+    def test_retroceder(self):
+        primera = paginar(Lote.objects.all(), ORDEN, tamano=3)
+        segunda = paginar(Lote.objects.all(), ORDEN, despues=primera.siguiente, tamano=3)
+        self.assertIsNone(primera.anterior)
+        self.assertEqual(self._ids(segunda), self.esperado[3:6])
+
+        atras = paginar(Lote.objects.all(), ORDEN, antes=segunda.anterior, tamano=3)
+        self.assertEqual(self._ids(atras), self.esperado[:3])
+        self.assertIsNone(atras.anterior)  # ya es la primera
+        self.assertIsNotNone(atras.siguiente)
+
+    def test_ultima_pagina_exacta(self):
+        pagina = paginar(Lote.objects.all(), ORDEN, tamano=len(self.esperado))
+        self.assertEqual(self._ids(pagina), self.esperado)
+        self.assertIsNone(pagina.siguiente)
+
+    def test_cursor_invalido(self):
+        for cursor in ("no-es-base64!", "W10", "WzEsMiwzXQ"):  # basura, [], [1,2,3]
+            with self.subTest(cursor=cursor), self.assertRaises(CursorInvalido):
+                paginar(Lote.objects.all(), ORDEN, despues=cursor)
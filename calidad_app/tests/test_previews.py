@@ -0,0 +1,38 @@
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.db.models.fields.files import FieldFile
+from django.test import SimpleTestCase
+
+from calidad_app import previews
+from calidad_app.models import Lote
+from calidad_app.storage import AlmacenamientoDeduplicado
+
+
+class ClaveMiniaturaTests(SimpleTestCase):
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        self.storage = AlmacenamientoDeduplicado(location=directorio)
+
+    def _documento(self, nombre):
+        archivo = FieldFile(None, Lote._meta.get_field("evidencia_fotografica"), nombre)
+        archivo.storage = self.storage
+        return archivo
+
+    def _guardar(self, nombre, datos):
+        return self._documento(self.storage.save(nombre, ContentFile(datos)))
+
+    def test_nombre_reutilizado_con_otro_contenido(self):
+        viejo = self._guardar("lotes/2024/01/00001_foto.jpg", b"foto vieja")
+        clave_vieja = previews.clave(viejo)
+        self.assertEqual(previews.clave(viejo), clave_vieja)
+
+        self.storage.delete(viejo.name)
+        nuevo = self._guardar("lotes/2024/01/00001_foto.jpg", b"foto nueva, otra")
+        self.assertEqual(nuevo.name, viejo.name)
+        self.assertNotEqual(previews.clave(nuevo), clave_vieja)
+
+    def test_documento_ausente_sin_clave(self):
+        self.assertIsNone(previews.clave(self._documento("lotes/2024/01/no_existe.jpg")))
@@ -0,0 +1,95 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase
+
+from calidad_app import produccion
+from calidad_app.models import Lote, ProduccionDiaria, Proyecto
+
+DIA_1 = date(2024, 3, 1)
+DIA_2 = date(2024, 3, 2)
+
+
+class LoteGuardadoTests(TestCase):
+    """El acumulado que mantienen las señales coincide con recalcularlo desde Lote."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.p1 = Proyecto.objects.create(nombre="P1", piezas_totales=1000)
+        cls.p2 = Proyecto.objects.create(nombre="P2", piezas_totales=1000)
+        cls.usuario = get_user_model().objects.create_user("operador", password="x")
+
+    def filas(self):
+        return set(ProduccionDiaria.objects.values_list("proyecto_id", "dia", "subido_por_id", "lotes", "piezas"))
+
+    def assertConsistente(self):
+        incremental = self.filas()
+        produccion.reconstruir()
+        self.assertEqual(incremental, self.filas())
+
+    def test_alta_y_edicion(self):
+        lote = Lote.objects.create(proyecto=self.p1, id_lote="00001", fecha=DIA_1, numero_partes=10)
+        Lote.objects.create(proyecto=self.p1, id_lote="00002", fecha=DIA_1, numero_partes=5)
+        self.assertEqual(self.filas(), {(self.p1.pk, DIA_1, None, 2, 15)})
+
+        lote.numero_partes = 12
+        lote.save()
+        self.assertEqual(self.filas(), {(self.p1.pk, DIA_1, None, 2, 17)})
+        self.assertConsistente()
+
+    def test_mover_de_dia_proyecto_y_responsable(self):
+        lote = Lote.objects.create(proyecto=self.p1, id_lote="00001", fecha=DIA_1, numero_partes=10)
+
+        lote.fecha = DIA_2
+        lote.save()
+        self.assertEqual(self.filas(), {(self.p1.pk, DIA_2, None, 1, 10)})  # la fila vacía se borra
+
+        lote.proyecto = self.p2
+        lote.subido_por = self.usuario
+        lote.save()
+        self.assertEqual(self.filas(), {(self.p2.pk, DIA_2, self.usuario.pk, 1, 10)})
+        self.assertConsistente()
+
+    def test_borrado(self):
+        lote = Lote.objects.create(proyecto=self.p1, id_lote="00001", fecha=DIA_1, numero_partes=10)
+        Lote.objects.create(proyecto=self.p1, id_lote="00002", fecha=DIA_1, numero_partes=5)
+        lote.delete()
+        self.assertEqual(self.filas(), {(self.p1.pk, DIA_1, None, 1, 5)})
+        Lote.objects.all().delete()
+        self.assertEqual(self.filas(), set())
+
+    def test_campos_diferidos(self):
+        lote = Lote.objects.create(proyecto=self.p1, id_lote="00001", fecha=DIA_1, numero_partes=3)
+
+        diferido = Lote.objects.only("id", "numero_partes").get(pk=lote.pk)
+        diferido.numero_partes = 7
+        diferido.save()
+        self.assertEqual(self.filas(), {(self.p1.pk, DIA_1, None, 1, 7)})
+
+        Lote.objects.only("id").get(pk=lote.pk).delete()
+        self.assertEqual(self.filas(), set())
+
+    def test_usuario_borrado_pasa_a_sin_responsable(self):
+        otro = get_user_model().objects.create_user("temporal", password="x")
+        Lote.objects.create(proyecto=self.p1, id_lote="00001", fecha=DIA_1, numero_partes=4, subido_por=otro)
+        Lote.objects.create(proyecto=self.p1, id_lote="00002", fecha=DIA_1, numero_partes=6)
+        otro.delete()
+        self.assertEqual(self.filas(), {(self.p1.pk, DIA_1, None, 2, 10)})
+        self.assertConsistente()
+
+
+class TransaccionTests(TransactionTestCase):
+    def test_si_falla_el_acumulado_no_queda_el_lote(self):
+        proyecto = Proyecto.objects.create(nombre="P", piezas_totales=10)
+        lote = Lote.objects.create(proyecto=proyecto, id_lote="00001", fecha=DIA_1, numero_partes=4)
+
+        with mock.patch.object(produccion, "aplicar", side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            Lote.objects.create(proyecto=proyecto, id_lote="00002", fecha=DIA_1, numero_partes=5)
+        self.assertFalse(Lote.objects.filter(id_lote="00002").exists())
+
+        lote.numero_partes = 9
+        with mock.patch.object(produccion, "aplicar", side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            lote.save()
+        self.assertEqual(Lote.objects.get(pk=lote.pk).numero_partes, 4)
+        self.assertEqual(ProduccionDiaria.objects.get().piezas, 4)
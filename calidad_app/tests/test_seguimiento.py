@@ -0,0 +1,42 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from calidad_app.models import AuditLog, Lote, Proyecto
+
+
+class SeguimientoCambiosTests(TestCase):
+    """Lote detecta los cambios de archivo contra lo cargado, sin releer la fila."""
+
+    @classmethod
+    def setUpTestData(cls):
+        proyecto = Proyecto.objects.create(nombre="P", piezas_totales=10)
+        cls.lote = Lote.objects.create(proyecto=proyecto, id_lote="00001", plano_original="lotes/a.pdf")
+
+    def test_sin_select_extra_al_guardar(self):
+        lote = Lote.objects.get(pk=self.lote.pk)
+        self.assertEqual(lote.changed_file_fields(), {})
+        lote.plano_original = "lotes/b.pdf"
+        self.assertEqual(lote.changed_file_fields(), {"plano_original": ("lotes/a.pdf", "lotes/b.pdf")})
+
+        with CaptureQueriesContext(connection) as ctx:
+            lote.save()
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "calidad_app_lote"' in q["sql"]])
+        self.assertEqual(lote.changed_file_fields(), {})  # lo guardado pasa a ser el original
+
+    def test_campos_diferidos(self):
+        lote = Lote.objects.only("id", "id_lote").get(pk=self.lote.pk)
+        self.assertEqual(lote.changed_file_fields(), {})
+        lote.plano_original  # carga diferida: pasa a ser el original
+        self.assertEqual(lote.changed_file_fields(), {})
+        lote.plano_original = "lotes/b.pdf"
+        lote.save()
+        self.assertEqual(AuditLog.objects.filter(lote=lote, accion="REPLACE").count(), 1)
+
+    def test_recarga_parcial_conserva_el_seguimiento(self):
+        lote = Lote.objects.get(pk=self.lote.pk)
+        lote.plano_original = "lotes/b.pdf"
+        lote.refresh_from_db(fields=["numero_partes"])
+        self.assertEqual(lote.changed_file_fields(), {"plano_original": ("lotes/a.pdf", "lotes/b.pdf")})
+        lote.refresh_from_db()
+        self.assertEqual(lote.changed_file_fields(), {})
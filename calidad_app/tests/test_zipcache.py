@@ -0,0 +1,85 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime
+from types import SimpleNamespace
+
+from django.core.files.base import File
+from django.test import SimpleTestCase, override_settings
+
+from calidad_app import zipcache
+
+
+class Ausente(File):
+    """Documento referenciado por el lote pero que ya no está en disco."""
+
+    def open(self, mode=None):
+        raise FileNotFoundError(self.name)
+
+
+def _lote(**documentos):
+    return SimpleNamespace(
+        pk=1, id_lote="00001", modificado=datetime(2024, 5, 6, 7, 8, 10),
+        FILE_FIELDS=list(documentos), **documentos,
+    )
+
+
+def _doc(nombre, datos):
+    return File(io.BytesIO(datos), name=f"lotes/2024/05/{nombre}")
+
+
+class ZipCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+        ajustes = override_settings(ZIP_CACHE_DIR=self.directorio, ZIP_CACHE_MAX_BYTES=10 ** 9)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_construir_y_reusar(self):
+        lote = _lote(reporte=_doc("00001_reporte.csv", b"a;b\n" * 100))
+        self.assertIsNone(zipcache.buscar(lote))
+
+        ruta = zipcache.construir(lote)
+        self.assertEqual(ruta, zipcache.buscar(lote))
+        with zipfile.ZipFile(ruta) as z:
+            self.assertEqual(z.read("00001_reporte.csv"), b"a;b\n" * 100)
+        self.assertEqual(zipcache.construir(lote), ruta)
+        self.assertEqual(zipcache.uso()[0], 1)
+
+    def test_la_clave_cambia_con_los_documentos(self):
+        lote = _lote(reporte=_doc("00001_reporte.csv", b"uno"))
+        clave = zipcache.clave_lote(lote)
+        lote.reporte = _doc("00001_reporte.csv", b"otro tamano")
+        self.assertNotEqual(zipcache.clave_lote(lote), clave)
+        lote.reporte = _doc("00001_reporte_v2.csv", b"uno")
+        self.assertNotEqual(zipcache.clave_lote(lote), clave)
+
+    def test_zip_incompleto_no_se_cachea(self):
+        lote = _lote(reporte=_doc("00001_reporte.csv", b"uno"), plano=Ausente(None, name="lotes/x/plano.pdf"))
+        with self.assertLogs("calidad_app.zipstream", "WARNING"):
+            partes = b"".join(zipcache.zip_lote_cacheando(lote))
+        self.assertEqual(zipfile.ZipFile(io.BytesIO(partes)).namelist(), ["00001_reporte.csv"])
+        self.assertIsNone(zipcache.buscar(lote))
+        self.assertEqual(os.listdir(self.directorio), [])  # tampoco quedan temporales
+
+    def test_descarga_interrumpida_no_deja_nada(self):
+        lote = _lote(reporte=_doc("00001_reporte.csv", os.urandom(200_000)))
+        partes = zipcache.zip_lote_cacheando(lote)
+        next(partes)
+        partes.close()
+        self.assertEqual(os.listdir(self.directorio), [])
+
+    def test_poda_lru(self):
+        rutas = []
+        for i in range(3):
+            ruta = zipcache.construir(_lote(reporte=_doc(f"{i}.csv", os.urandom(1000))))
+            os.utime(ruta, (1_700_000_000 + i, 1_700_000_000 + i))
+            rutas.append(ruta)
+        os.utime(rutas[0])  # el más viejo se vuelve a usar
+
+        tamano = rutas[1].stat().st_size
+        self.assertEqual(zipcache.podar(limite=zipcache.uso()[1] - tamano), 1)
+        self.assertEqual([r.exists() for r in rutas], [True, False, True])
@@ -0,0 +1,98 @@
+import io
+import os
+import zipfile
+import zlib
+from datetime import datetime
+from types import SimpleNamespace
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+
+from calidad_app.zipstream import ZipStream, zip_lote
+
+
+def _zip(partes) -> zipfile.ZipFile:
+    return zipfile.ZipFile(io.BytesIO(b"".join(partes)))
+
+
+class ZipStreamTests(SimpleTestCase):
+    def test_ida_y_vuelta(self):
+        texto = b"linea de reporte\n" * 5000
+        binario = os.urandom(70_000)
+        zs = ZipStream()
+        partes = []
+        partes += zs.entrada("reporte.txt", [texto[:1000], texto[1000:]], tamano=len(texto))
+        partes += zs.entrada("foto.jpg", [binario], tamano=len(binario), comprimir=False)
+        partes += zs.entrada("vacío.txt", [], tamano=0)
+        partes += zs.entrada("reporte.txt", [b"otro"], tamano=4)  # nombre repetido
+        partes += zs.cerrar()
+
+        z = _zip(partes)
+        self.assertIsNone(z.testzip())
+        self.assertEqual(z.namelist(), ["reporte.txt", "foto.jpg", "vacío.txt", "reporte_1.txt"])
+        self.assertEqual(z.read("reporte.txt"), texto)
+        self.assertEqual(z.read("foto.jpg"), binario)
+        self.assertEqual(z.read("vacío.txt"), b"")
+        self.assertEqual(z.read("reporte_1.txt"), b"otro")
+        self.assertEqual(z.getinfo("reporte.txt").compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(z.getinfo("foto.jpg").compress_type, zipfile.ZIP_STORED)
+
+    def test_tamano_desconocido_usa_zip64(self):
+        datos = b"x" * 10_000
+        zs = ZipStream()
+        z = _zip([*zs.entrada("a.txt", [datos]), *zs.cerrar()])
+        self.assertIsNone(z.testzip())
+        self.assertEqual(z.read("a.txt"), datos)
+
+    def test_entrada_comprimida(self):
+        datos = b"abc" * 10_000
+        compresor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        crudo = compresor.compress(datos) + compresor.flush()
+        zs = ZipStream()
+        partes = [*zs.entrada_comprimida("a.txt", [crudo], crc=zlib.crc32(datos), tamano=len(datos),
+                                         tamano_comprimido=len(crudo)),
+                  *zs.cerrar()]
+        z = _zip(partes)
+        self.assertIsNone(z.testzip())
+        self.assertEqual(z.read("a.txt"), datos)
+
+    def test_mas_de_65535_entradas(self):
+        # Obliga al registro de fin ZIP64 (el contador de 16 bits no alcanza).
+        zs = ZipStream()
+        partes = []
+        for i in range(65_536):
+            partes += zs.entrada_comprimida(f"{i}", [], crc=0, tamano=0, tamano_comprimido=0,
+                                            comprimir=False, fecha=datetime(2024, 1, 1))
+        partes += zs.cerrar()
+        z = _zip(partes)
+        self.assertEqual(len(z.infolist()), 65_536)
+        self.assertIsNone(z.testzip())
+
+    def test_fecha_de_la_entrada(self):
+        zs = ZipStream()
+        z = _zip([*zs.entrada("a.txt", [b"a"], tamano=1, fecha=datetime(2024, 5, 6, 7, 8, 10)), *zs.cerrar()])
+        self.assertEqual(z.getinfo("a.txt").date_time, (2024, 5, 6, 7, 8, 10))
+
+
+class ZipLoteTests(SimpleTestCase):
+    def test_formatos_ya_comprimidos_van_sin_recomprimir(self):
+        texto = b"medicion;valor\n" * 2000
+        pdf = b"%PDF-1.4 " + b"BT /F1 12 Tf (texto) Tj ET " * 2000
+        lote = SimpleNamespace(
+            pk=1,
+            FILE_FIELDS=["reporte", "plano", "foto", "vacio"],
+            reporte=ContentFile(texto, name="lotes/00001/reporte.csv"),
+            plano=ContentFile(pdf, name="lotes/00001/plano.pdf"),
+            foto=ContentFile(b"\xff\xd8" * 100, name="lotes/00001/foto.jpg"),
+            vacio=None,
+            modificado=datetime(2024, 5, 6, 7, 8, 10),
+        )
+        z = _zip(zip_lote(lote))
+
+        self.assertIsNone(z.testzip())
+        self.assertEqual(z.namelist(), ["reporte.csv", "plano.pdf", "foto.jpg"])
+        self.assertEqual(z.read("plano.pdf"), pdf)
+        self.assertEqual(z.getinfo("reporte.csv").compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(z.getinfo("plano.pdf").compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(z.getinfo("foto.jpg").compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(z.getinfo("plano.pdf").date_time, (2024, 5, 6, 7, 8, 10))
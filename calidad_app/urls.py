@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     # Auth
@@ -10,12 +10,32 @@ urlpatterns = [
     path('', views.ver_proyectos, name='ver_proyectos'),
     path('proyectos/nuevo/', views.crear_proyecto, name='crear_proyecto'),
     path('proyectos/<int:proyecto_id>/lotes/', views.lotes_por_proyecto, name='lotes_por_proyecto'),
+    path('proyectos/<int:proyecto_id>/exportar/', views.exportar_proyecto, name='exportar_proyecto'),
 
     # Lotes
     path('registrar_lote/<int:proyecto_id>/', views.registrar_lote, name='registrar_lote'),
     path('lotes/<int:lote_id>/', views.detalle_lote, name='detalle_lote'),
     path('lotes/<int:lote_id>/zip/', views.descargar_zip, name='descargar_zip'),
+    path('lotes/<int:lote_id>/documentos/<str:campo>/', views.descargar_documento, name='descargar_documento'),
+    path('lotes/<int:lote_id>/preview/<str:campo>/', views.preview_documento, name='preview_documento'),
     path('lotes/<int:lote_id>/editar/', views.editar_lote, name='editar_lote'),
+    path('lotes/buscar/', views.buscar_lotes, name='buscar_lotes'),
+    path('lotes/buscar.json', views.buscar_lotes_json, name='buscar_lotes_json'),
+    path('lotes/autocompletar/', views.autocompletar_lote, name='autocompletar_lote'),
+    path('documentos/buscar/', views.buscar_documentos, name='buscar_documentos'),
+    path('produccion/', views.tablero_produccion, name='tablero_produccion'),
+
+    # Cargas por partes (reanudables)
+    path('cargas/', views.crear_carga, name='crear_carga'),
+    path('cargas/<uuid:carga_id>/', views.carga_archivo, name='carga_archivo'),
+
+    # API JSON de solo lectura (integraciones MES/ERP)
+    path('api/proyectos/', api.proyectos, name='api_proyectos'),
+    path('api/proyectos/<int:proyecto_id>/', api.proyecto, name='api_proyecto'),
+    path('api/lotes/', api.lotes, name='api_lotes'),
+    path('api/lotes/<int:lote_id>/', api.lote, name='api_lote'),
+    path('api/lotes/<int:lote_id>/historial/', api.historial_lote, name='api_historial_lote'),
+    path('api/auditoria/', api.auditoria, name='api_auditoria'),
 
     # Registro de usuario (solicitud)
     path('registro/', views.registro_usuario, name='registro_usuario'),
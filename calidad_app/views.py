@@ -1,25 +1,46 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required, user_passes_test, permission_required
 from django.contrib.auth.views import LoginView, LogoutView
 from django.contrib.auth import get_user_model
-from django.http import HttpResponse, HttpResponseNotAllowed
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
 from django.contrib import messages
-from django.db.models import Sum
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+from django.utils.text import slugify
 
 from django.contrib.auth.models import Group, Permission
 
-from .models import Proyecto, Lote, PerfilUsuario, AuditLog
+from .models import Proyecto, Lote, PerfilUsuario, CargaArchivo
 from .forms import (
     ProyectoForm,
     LoteForm,
     LoteAdminForm,
     CustomUserCreationForm,
     CustomAuthenticationForm,
+    ExportarProyectoForm,
+    BuscarLotesForm,
+    TableroProduccionForm,
+    TIPOS_DOCUMENTO,
+    validar_nombre_documento,
 )
+from .basedatos import solo_lectura
+from .condicional import agregados_proyectos, pagina_condicional
+from .paginacion import CursorInvalido, paginar
+from . import busqueda
+from . import cache
+from . import cargas
+from . import descargas
+from . import previews
+from . import produccion
+from .zipstream import nombre_zip_lote, nombre_entrada, entradas_lote, zip_paralelo
+from . import zipcache
 
-import zipfile
 import os
-from io import BytesIO
+from datetime import timedelta
 
 
 # =====================
@@ -189,21 +210,44 @@ def eliminar_usuario_activo(request, user_id):
 # =====================
 # Proyectos / Lotes
 # =====================
+ORDEN_PROYECTOS = {
+    'recientes': ('-creado', 'nombre'),
+    'nombre': ('nombre',),
+    'avance': ('avance_pct', 'nombre'),
+    '-avance': ('-avance_pct', 'nombre'),
+    'restantes': ('-piezas_restantes', 'nombre'),
+}
+
+
+def _firma_proyectos(request):
+    # La lista sale de la caché versionada: su versión ya cambia con cada
+    # alta/cambio/baja de proyectos o lotes, sin consultar la BD.
+    return {'proyectos': cache.version('proyectos')}
+
+
 @login_required
+@solo_lectura()
+@pagina_condicional(_firma_proyectos)
 def ver_proyectos(request):
-    proyectos = Proyecto.objects.all()
-    for proyecto in proyectos:
-        producidas = proyecto.lotes.aggregate(s=Sum('numero_partes'))['s'] or 0
-        total = proyecto.piezas_totales or 0
-        avance = round((producidas / total) * 100.0, 2) if total > 0 else 0.0
-        faltantes = max(total - producidas, 0) if total > 0 else 0
+    """
+    Lista de proyectos con su avance, calculado en una sola consulta
+    (ProyectoQuerySet.con_avance). Ordenable/filtrable por avance en la BD.
+    El resultado sale de la caché versionada mientras no cambien proyectos/lotes.
+    """
+    estado = request.GET.get('estado', '')
+    if estado not in ('en_curso', 'terminados'):
+        estado = ''
 
-        proyecto.avance = avance
-        proyecto.piezas_completadas = producidas
-        proyecto.piezas_restantes = faltantes
-        proyecto.total = total
+    orden = request.GET.get('orden', 'recientes')
+    if orden not in ORDEN_PROYECTOS:
+        orden = 'recientes'
+    proyectos = cache.proyectos(ORDEN_PROYECTOS[orden], estado)
 
-    return render(request, 'ver_proyectos.html', {'proyectos': proyectos})
+    return render(request, 'ver_proyectos.html', {
+        'proyectos': proyectos,
+        'orden': orden,
+        'estado': estado,
+    })
 
 
 @login_required
@@ -221,11 +265,137 @@ def crear_proyecto(request):
     return render(request, 'crear_proyecto.html', {'form': form})
 
 
+ORDEN_LOTES = ('-fecha', 'id_lote')
+
+
+def _firma_lotes_proyecto(request, proyecto_id):
+    agregados = agregados_proyectos(Proyecto.objects.filter(pk=proyecto_id))
+    return agregados if agregados['n'] else None  # 404: que corra la vista
+
+
 @login_required
+@solo_lectura()
+@pagina_condicional(_firma_lotes_proyecto)
 def lotes_por_proyecto(request, proyecto_id):
+    """
+    Lotes del proyecto paginados por cursor sobre (-fecha, id_lote), con el
+    responsable precargado: el costo por página no depende de su profundidad.
+    """
     proyecto = get_object_or_404(Proyecto, id=proyecto_id)
-    lotes = Lote.objects.filter(proyecto=proyecto).order_by('-fecha', 'id_lote')
-    return render(request, 'lotes_por_proyecto.html', {'proyecto': proyecto, 'lotes': lotes})
+    lotes = Lote.objects.filter(proyecto=proyecto).select_related('subido_por')
+    try:
+        pagina = paginar(
+            lotes, ORDEN_LOTES,
+            despues=request.GET.get('despues'),
+            antes=request.GET.get('antes'),
+            tamano=getattr(settings, 'LOTES_POR_PAGINA', 50),
+        )
+    except CursorInvalido:
+        return redirect('lotes_por_proyecto', proyecto_id=proyecto.id)
+
+    for lote in pagina.items:
+        lote.miniatura = previews.url(lote, 'evidencia_fotografica')
+
+    return render(request, 'lotes_por_proyecto.html', {
+        'proyecto': proyecto,
+        'lotes': pagina.items,
+        'pagina': pagina,
+        'export_form': ExportarProyectoForm(),
+    })
+
+
+def _buscar_lotes(request):
+    """(form, página) de la búsqueda de lotes entre proyectos; página None si el filtro no es válido."""
+    form = BuscarLotesForm(request.GET or None)
+    if request.GET and not form.is_valid():
+        return form, None
+    lotes = Lote.objects.select_related('proyecto', 'subido_por')
+    if form.is_bound:
+        lotes = form.filtrar(lotes)
+    pagina = paginar(
+        lotes, ORDEN_LOTES,
+        despues=request.GET.get('despues'),
+        antes=request.GET.get('antes'),
+        tamano=getattr(settings, 'LOTES_POR_PAGINA', 50),
+    )
+    return form, pagina
+
+
+@login_required
+@solo_lectura()
+def buscar_lotes(request):
+    """
+    Búsqueda de lotes entre proyectos por prefijo de id_lote, proyecto, rango de
+    fechas, responsable y documentación completa; paginada por cursor.
+    """
+    try:
+        form, pagina = _buscar_lotes(request)
+    except CursorInvalido:
+        return redirect('buscar_lotes')
+
+    filtros = request.GET.copy()
+    filtros.pop('despues', None)
+    filtros.pop('antes', None)
+    return render(request, 'buscar_lotes.html', {
+        'form': form,
+        'pagina': pagina,
+        'lotes': pagina.items if pagina else [],
+        'filtros': filtros.urlencode(),
+    })
+
+
+def _lote_json(lote):
+    return {
+        'id': lote.id,
+        'id_lote': lote.id_lote,
+        'proyecto': {'id': lote.proyecto_id, 'nombre': lote.proyecto.nombre},
+        'fecha': lote.fecha.isoformat(),
+        'numero_partes': lote.numero_partes,
+        'subido_por': lote.subido_por.username if lote.subido_por else None,
+        'completo': lote.num_faltantes == 0,
+        'faltantes': lote.num_faltantes,
+        'url': reverse('detalle_lote', args=[lote.id]),
+    }
+
+
+@login_required
+@solo_lectura()
+def buscar_lotes_json(request):
+    """Misma búsqueda que buscar_lotes, en JSON (cursores en 'siguiente'/'anterior')."""
+    try:
+        form, pagina = _buscar_lotes(request)
+    except CursorInvalido as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if pagina is None:
+        return JsonResponse({'errores': form.errors.get_json_data()}, status=400)
+    return JsonResponse({
+        'resultados': [_lote_json(lote) for lote in pagina.items],
+        'siguiente': pagina.siguiente,
+        'anterior': pagina.anterior,
+    })
+
+
+@login_required
+@solo_lectura()
+def autocompletar_lote(request):
+    """
+    Sugerencias de id_lote por prefijo: rango sobre el índice único de id_lote,
+    solo las columnas necesarias y pocos resultados.
+    """
+    prefijo = request.GET.get('q', '').strip()[:20]
+    if not prefijo:
+        return JsonResponse({'resultados': []})
+    try:
+        limite = max(1, min(int(request.GET.get('limite', 10)), 50))
+    except ValueError:
+        limite = 10
+    filas = (Lote.objects.con_prefijo(prefijo)
+             .order_by('id_lote')
+             .values_list('id', 'id_lote', 'proyecto__nombre')[:limite])
+    return JsonResponse({'resultados': [
+        {'id': id_, 'id_lote': id_lote, 'proyecto': proyecto, 'url': reverse('detalle_lote', args=[id_])}
+        for id_, id_lote, proyecto in filas
+    ]})
 
 
 @login_required
@@ -238,24 +408,14 @@ def registrar_lote(request, proyecto_id):
     proyecto = get_object_or_404(Proyecto, id=proyecto_id)
 
     if request.method == 'POST':
-        form = LoteForm(request.POST, request.FILES, proyecto=proyecto)
+        form = LoteForm(request.POST, request.FILES, proyecto=proyecto, usuario=request.user)
         if form.is_valid():
             lote = form.save(commit=False)
             lote.proyecto = proyecto
             lote.subido_por = request.user  # firma
-            lote.save()
-
-            # Auditoría inicial de archivos cargados
-            for field in Lote.FILE_FIELDS:
-                f = getattr(lote, field, None)
-                if f and getattr(f, "name", ""):
-                    AuditLog.objects.create(
-                        lote=lote,
-                        campo=field,
-                        accion=AuditLog.Accion.UPLOAD,
-                        usuario=request.user,
-                        detalle="Carga inicial"
-                    )
+            with transaction.atomic():
+                lote.save()  # la auditoría la registra la señal post_save
+                transaction.on_commit(form.liberar_cargas)
 
             messages.success(request, "Lote registrado correctamente.")
             return redirect('detalle_lote', lote_id=lote.id)
@@ -267,7 +427,7 @@ def registrar_lote(request, proyecto_id):
             if errores:
                 messages.error(request, "No se pudo guardar el lote. " + " | ".join(errores))
     else:
-        form = LoteForm(proyecto=proyecto)
+        form = LoteForm(proyecto=proyecto, usuario=request.user)
 
     return render(request, 'registrar_lote.html', {'form': form, 'proyecto': proyecto})
 
@@ -280,34 +440,16 @@ def editar_lote(request, lote_id):
     Permite reemplazar/eliminar archivos, corregir datos y cambiar 'subido_por'.
     """
     lote = get_object_or_404(Lote, id=lote_id)
-
-    # Snapshot previo para auditar archivos
-    old_files = {f: (getattr(lote, f).name if getattr(lote, f) else '') for f in Lote.FILE_FIELDS}
     old_subido_por_id = lote.subido_por_id
 
     if request.method == 'POST':
-        form = LoteAdminForm(request.POST, request.FILES, instance=lote, proyecto=lote.proyecto)
+        form = LoteAdminForm(request.POST, request.FILES, instance=lote, proyecto=lote.proyecto,
+                             usuario=request.user)
         if form.is_valid():
-            lote = form.save()
-
-            # Auditar reemplazos / eliminaciones de archivos
-            for field in Lote.FILE_FIELDS:
-                newf = getattr(lote, field, None)
-                newname = newf.name if newf else ''
-                oldname = old_files.get(field, '')
-                cleared = request.POST.get(f'{field}-clear') == 'on'  # ClearableFileInput
-
-                if cleared and oldname:
-                    AuditLog.objects.create(
-                        lote=lote, campo=field, accion=AuditLog.Accion.REPLACE,
-                        usuario=request.user, detalle="Archivo eliminado"
-                    )
-                elif newname and newname != oldname:
-                    accion = AuditLog.Accion.UPLOAD if not oldname else AuditLog.Accion.REPLACE
-                    AuditLog.objects.create(
-                        lote=lote, campo=field, accion=accion,
-                        usuario=request.user, detalle="Edición de lote"
-                    )
+            # Reemplazos / eliminaciones de archivos los audita la señal post_save
+            with transaction.atomic():
+                lote = form.save()
+                transaction.on_commit(form.liberar_cargas)
 
             # Aviso si cambió el responsable
             if old_subido_por_id != lote.subido_por_id:
@@ -318,55 +460,272 @@ def editar_lote(request, lote_id):
         else:
             messages.error(request, "Corrige los errores del formulario.")
     else:
-        form = LoteAdminForm(instance=lote, proyecto=lote.proyecto)
+        form = LoteAdminForm(instance=lote, proyecto=lote.proyecto, usuario=request.user)
 
     return render(request, 'editar_lote.html', {'form': form, 'proyecto': lote.proyecto, 'lote': lote})
 
 
+# =====================
+# Cargas por partes (reanudables)
+# =====================
+def _estado_carga(carga):
+    return {
+        'id': str(carga.id),
+        'nombre': carga.nombre,
+        'tamano': carga.tamano,
+        'recibido': carga.recibido,
+        'completa': carga.completa,
+        'parte_max': settings.CARGA_PARTE_MAX,
+    }
+
+
+@login_required
+@permission_required('calidad_app.add_lote', raise_exception=True)
+def crear_carga(request):
+    """Inicia una subida por partes: recibe 'nombre' y 'tamano' (bytes)."""
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    nombre = os.path.basename(request.POST.get('nombre', '')).strip()
+    try:
+        tamano = int(request.POST.get('tamano', ''))
+    except ValueError:
+        return JsonResponse({'error': "'tamano' inválido."}, status=400)
+    if not nombre or tamano < 0:
+        return JsonResponse({'error': "Faltan 'nombre' o 'tamano'."}, status=400)
+    if tamano > settings.CARGA_TAMANO_MAX:
+        return JsonResponse({'error': 'El archivo excede el tamaño máximo.'}, status=413)
+    try:
+        validar_nombre_documento(nombre)
+    except ValidationError as e:
+        return JsonResponse({'error': ' '.join(e.messages)}, status=400)
+
+    carga = cargas.crear(request.user, nombre, tamano)
+    return JsonResponse(_estado_carga(carga), status=201)
+
+
+@login_required
+@permission_required('calidad_app.add_lote', raise_exception=True)
+def carga_archivo(request, carga_id):
+    """
+    GET: estado (para reanudar). PATCH: agrega el fragmento del cuerpo en el
+    offset indicado por el encabezado 'Upload-Offset'. DELETE: cancela.
+    """
+    carga = get_object_or_404(CargaArchivo, pk=carga_id, usuario=request.user)
+
+    if request.method == 'GET':
+        return JsonResponse(_estado_carga(carga))
+    if request.method == 'DELETE':
+        carga.descartar()
+        return HttpResponse(status=204)
+    if request.method != 'PATCH':
+        return HttpResponseNotAllowed(['GET', 'PATCH', 'DELETE'])
+
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+    except ValueError:
+        return JsonResponse({'error': "Falta el encabezado 'Upload-Offset'."}, status=400)
+    try:
+        carga = cargas.escribir_parte(carga, offset, request, settings.CARGA_PARTE_MAX)
+    except cargas.ParteInvalida as e:
+        carga.refresh_from_db()
+        return JsonResponse({'error': str(e), **_estado_carga(carga)}, status=e.status)
+    return JsonResponse(_estado_carga(carga))
+
+
+def _firma_lote(request, lote_id):
+    fila = Lote.objects.filter(pk=lote_id).values('modificado', 'proyecto__modificado').first()
+    if fila is None:
+        return None
+    return {
+        'lote': fila['modificado'],
+        'proyecto': fila['proyecto__modificado'],
+        'ultimo': max(fila['modificado'], fila['proyecto__modificado']),
+    }
+
+
 @login_required
+@solo_lectura()
+@pagina_condicional(_firma_lote)
 def detalle_lote(request, lote_id):
     lote = get_object_or_404(Lote, id=lote_id)
-    return render(request, 'detalle_lote.html', {'lote': lote})
+    miniaturas = {field: previews.url(lote, field) for field in Lote.FILE_FIELDS}
+    return render(request, 'detalle_lote.html', {'lote': lote, 'miniaturas': miniaturas})
+
+
+@login_required
+@solo_lectura()
+def buscar_documentos(request):
+    """
+    Búsqueda de texto completo en el contenido de los documentos de lote
+    (índice FTS5, ver busqueda.py), ordenada por relevancia.
+    """
+    q = request.GET.get('q', '').strip()
+    resultados = busqueda.buscar(q, limite=getattr(settings, 'BUSQUEDA_RESULTADOS', 50)) if q else []
+
+    lotes = Lote.objects.select_related('proyecto').in_bulk({r['lote_id'] for r in resultados})
+    etiquetas = dict(TIPOS_DOCUMENTO)
+    for r in resultados:
+        r['lote'] = lotes.get(r['lote_id'])
+        r['documento'] = etiquetas.get(r['campo'], r['campo'])
+    resultados = [r for r in resultados if r['lote'] is not None]
+
+    return render(request, 'buscar_documentos.html', {
+        'q': q,
+        'resultados': resultados,
+        'disponible': busqueda.disponible(),
+    })
+
+
+@login_required
+@permission_required('calidad_app.view_lote', raise_exception=True)
+@solo_lectura()
+def descargar_documento(request, lote_id, campo):
+    """
+    Documento del lote tras revisar sesión y permiso. La transferencia la hace
+    el proxy (X-Accel-Redirect/X-Sendfile) o Django con Range/ETag (ver descargas.py).
+    ?descargar=1 lo envía como adjunto en vez de abrirlo en el navegador.
+    """
+    if campo not in Lote.FILE_FIELDS:
+        raise Http404
+    lote = get_object_or_404(Lote, id=lote_id)
+    archivo = getattr(lote, campo)
+    if not archivo:
+        raise Http404
+    try:
+        return descargas.servir(request, archivo, adjunto='descargar' in request.GET)
+    except FileNotFoundError:
+        raise Http404
 
 
 @login_required
+@permission_required('calidad_app.view_lote', raise_exception=True)
+@solo_lectura()
+def preview_documento(request, lote_id, campo):
+    """
+    Miniatura ya generada de un documento del lote. Si aún no existe se
+    encola su generación y se responde 404 (la plantilla oculta la imagen).
+    """
+    if campo not in Lote.FILE_FIELDS:
+        raise Http404
+    lote = get_object_or_404(Lote, id=lote_id)
+    archivo = getattr(lote, campo)
+    nombre = getattr(archivo, 'name', '') or ''
+    if not nombre or not previews.soporta(nombre):
+        raise Http404
+    clave = previews.clave(archivo)
+    if clave is None:
+        raise Http404
+    try:
+        response = FileResponse(open(previews.ruta_preview(clave), 'rb'), content_type='image/jpeg')
+    except FileNotFoundError:
+        previews.programar(lote, [campo])
+        raise Http404
+    # La URL lleva ?v=<clave>, así que la miniatura puede cachearse sin revalidar.
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+
+@login_required
+@permission_required('calidad_app.view_lote', raise_exception=True)
+@solo_lectura()
 def descargar_zip(request, lote_id):
     """
-    Crea un ZIP en memoria con los archivos presentes del lote.
+    Descarga en streaming un ZIP con los archivos presentes del lote.
+    Los formatos ya comprimidos (pdf/jpg/png/docx/xlsx) se guardan sin recomprimir.
+    Si el ZIP ya está en la caché en disco se sirve directo desde ahí; si no,
+    se construye mientras se envía y queda cacheado para la siguiente descarga.
     """
     lote = get_object_or_404(Lote, id=lote_id)
+    ruta = zipcache.buscar(lote)
+    if ruta is not None:
+        try:
+            return FileResponse(open(ruta, 'rb'), as_attachment=True,
+                                filename=nombre_zip_lote(lote), content_type='application/zip')
+        except FileNotFoundError:
+            pass  # podado entre la búsqueda y la apertura: se reconstruye
 
-    zip_buffer = BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for archivo in [
-            lote.analisis_espectrometrico,
-            lote.tolerancia_geometrica,
-            lote.pruebas_mecanicas,   # documento único (dureza + tensión)
-            lote.evidencia_fotografica,
-            lote.plano_original,
-        ]:
-            if not archivo or not getattr(archivo, 'name', ''):
-                continue
-
-            arcname = os.path.basename(archivo.name)
-
-            if hasattr(archivo, 'path'):
-                try:
-                    zip_file.write(archivo.path, arcname)
-                    continue
-                except Exception:
-                    pass
-
-            try:
-                archivo.open('rb')
-                try:
-                    zip_file.writestr(arcname, archivo.read())
-                finally:
-                    archivo.close()
-            except Exception:
-                pass
-
-    zip_buffer.seek(0)
-    response = HttpResponse(zip_buffer.getvalue(), content_type='application/zip')
-    response['Content-Disposition'] = f'attachment; filename={str(lote.id_lote).zfill(5)}.zip'
+    response = StreamingHttpResponse(zipcache.zip_lote_cacheando(lote), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename={nombre_zip_lote(lote)}'
     return response
+
+
+@login_required
+@permission_required('calidad_app.view_lote', raise_exception=True)
+@solo_lectura()
+def exportar_proyecto(request, proyecto_id):
+    """
+    Exporta en un solo ZIP (streaming) los documentos de los lotes del proyecto,
+    con una carpeta por id_lote. Filtros opcionales por rango de fechas y tipo
+    de documento (nombres de Lote.FILE_FIELDS).
+    """
+    proyecto = get_object_or_404(Proyecto, id=proyecto_id)
+    form = ExportarProyectoForm(request.GET)
+    if not form.is_valid():
+        errores = [e for errs in form.errors.values() for e in errs]
+        messages.error(request, "No se pudo exportar. " + " | ".join(errores))
+        return redirect('lotes_por_proyecto', proyecto_id=proyecto.id)
+
+    campos = form.cleaned_data['tipos'] or Lote.FILE_FIELDS
+    lotes = Lote.objects.filter(proyecto=proyecto).order_by('fecha', 'id_lote')
+    if form.cleaned_data['fecha_desde']:
+        lotes = lotes.filter(fecha__gte=form.cleaned_data['fecha_desde'])
+    if form.cleaned_data['fecha_hasta']:
+        lotes = lotes.filter(fecha__lte=form.cleaned_data['fecha_hasta'])
+    con_documento = Q()
+    for campo in campos:
+        con_documento |= Q(**{f'{campo}__isnull': False}) & ~Q(**{campo: ''})
+    lotes = lotes.filter(con_documento)
+
+    omitidos = []
+
+    def entradas():
+        for lote in lotes.iterator(chunk_size=200):
+            for arcname, archivo in entradas_lote(lote, campos, carpeta=f'{nombre_entrada(lote.id_lote)}/', omitidos=omitidos):
+                yield arcname, archivo, lote.modificado
+
+    trabajadores = getattr(settings, 'EXPORTACION_TRABAJADORES', None)
+    response = StreamingHttpResponse(zip_paralelo(entradas(), trabajadores=trabajadores, omitidos=omitidos),
+                                     content_type='application/zip')
+    nombre = slugify(proyecto.nombre) or f'proyecto-{proyecto.id}'
+    response['Content-Disposition'] = f'attachment; filename={nombre}.zip'
+    return response
+
+
+# =====================
+# Tablero de producción
+# =====================
+@login_required
+@permission_required('calidad_app.view_proyecto', raise_exception=True)
+@solo_lectura()
+def tablero_produccion(request):
+    """
+    Piezas producidas por día o semana (barras) y acumulado contra
+    piezas_totales (líneas), más el reparto por responsable. Lee solo el
+    acumulado ProduccionDiaria: el costo no depende del número de lotes.
+    """
+    form = TableroProduccionForm(request.GET or None)
+    datos = form.cleaned_data if form.is_valid() else {}
+    proyecto = datos.get('proyecto')
+    hasta = datos.get('hasta') or timezone.localdate()
+    desde = datos.get('desde') or hasta - timedelta(days=getattr(settings, 'TABLERO_DIAS', 90))
+    agrupar = datos.get('agrupar') or 'dia'
+
+    ids = [proyecto.id] if proyecto else None
+    if proyecto:
+        meta = proyecto.piezas_totales
+    else:
+        meta = Proyecto.objects.aggregate(total=Sum('piezas_totales'))['total'] or 0
+    serie = produccion.serie(ids, desde, hasta, agrupar)
+    responsables = produccion.por_responsable(ids, desde, hasta)
+
+    return render(request, 'tablero_produccion.html', {
+        'form': form,
+        'proyecto': proyecto,
+        'desde': desde,
+        'hasta': hasta,
+        'meta': meta,
+        'total_periodo': sum(serie['piezas']),
+        'lotes_periodo': sum(serie['lotes']),
+        'responsables': responsables,
+        'grafica': {**serie, 'meta': meta, 'agrupar': agrupar},
+    })
@@ -0,0 +1,160 @@
+"""
+Caché en disco de los ZIP de lote ya construidos.
+
+La clave se arma con el id del lote, su fecha de modificación y el nombre y
+tamaño actual de cada documento: guardar el lote o reemplazar un archivo
+(p.ej. desde editar_lote) produce otra clave, así que la entrada vieja deja de
+usarse sola y termina saliendo por la poda LRU.
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+from .zipstream import zip_lote
+
+
+def _directorio() -> Path | None:
+    ruta = getattr(settings, "ZIP_CACHE_DIR", None)
+    return Path(ruta) if ruta else None
+
+
+def activa() -> bool:
+    return _directorio() is not None
+
+
+def _limite() -> int:
+    return int(getattr(settings, "ZIP_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+
+def clave_lote(lote) -> str:
+    h = hashlib.sha256()
+    h.update(f"{lote.pk}|{lote.id_lote}|{lote.modificado.isoformat()}".encode())
+    for field in lote.FILE_FIELDS:
+        archivo = getattr(lote, field, None)
+        nombre = getattr(archivo, "name", "") or ""
+        tamano = -1
+        if nombre:
+            try:
+                tamano = archivo.size
+            except Exception:
+                pass
+        h.update(f"|{field}={nombre}:{tamano}".encode())
+    return h.hexdigest()
+
+
+def ruta_lote(lote) -> Path | None:
+    directorio = _directorio()
+    if directorio is None:
+        return None
+    return directorio / f"{clave_lote(lote)}.zip"
+
+
+def buscar(lote) -> Path | None:
+    """Ruta del ZIP cacheado (y lo marca como usado recientemente), o None."""
+    ruta = ruta_lote(lote)
+    if ruta is None:
+        return None
+    try:
+        os.utime(ruta)
+    except FileNotFoundError:
+        return None
+    return ruta
+
+
+def zip_lote_cacheando(lote):
+    """
+    Genera el ZIP del lote por fragmentos y a la vez lo escribe en la caché.
+    Si la descarga se interrumpe o faltó algún documento (no se pudo abrir),
+    el temporal se descarta: la clave ya cuenta con ese archivo y el ZIP
+    incompleto quedaría cacheado para siempre.
+    """
+    ruta = ruta_lote(lote)
+    if ruta is None:
+        yield from zip_lote(lote)
+        return
+
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=ruta.parent, suffix=".tmp")
+    completo = False
+    omitidos = []
+    try:
+        with os.fdopen(fd, "wb") as destino:
+            for chunk in zip_lote(lote, omitidos):
+                destino.write(chunk)
+                yield chunk
+        if not omitidos:
+            os.replace(tmp, ruta)
+            completo = True
+    finally:
+        if not completo:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+    podar()
+
+
+def construir(lote) -> Path | None:
+    """Construye (si hace falta) el ZIP cacheado del lote y devuelve su ruta (None si no quedó cacheado)."""
+    ruta = buscar(lote)
+    if ruta is None:
+        for _ in zip_lote_cacheando(lote):
+            pass
+        ruta = buscar(lote)
+    return ruta
+
+
+def _entradas():
+    directorio = _directorio()
+    if directorio is None or not directorio.exists():
+        return []
+    entradas = []
+    for ruta in directorio.glob("*.zip"):
+        try:
+            st = ruta.stat()
+        except FileNotFoundError:
+            continue
+        entradas.append((st.st_mtime, st.st_size, ruta))
+    return entradas
+
+
+def uso() -> tuple[int, int]:
+    """(número de archivos, bytes ocupados)."""
+    entradas = _entradas()
+    return len(entradas), sum(e[1] for e in entradas)
+
+
+def podar(limite: int | None = None) -> int:
+    """Borra los ZIP usados hace más tiempo hasta quedar bajo el límite. Devuelve cuántos borró."""
+    limite = _limite() if limite is None else limite
+    entradas = sorted(_entradas())
+    total = sum(e[1] for e in entradas)
+    borrados = 0
+    for _, tamano, ruta in entradas:
+        if total <= limite:
+            break
+        try:
+            ruta.unlink()
+        except FileNotFoundError:
+            pass
+        total -= tamano
+        borrados += 1
+    return borrados
+
+
+def purgar() -> int:
+    """Vacía la caché (incluye temporales abandonados)."""
+    directorio = _directorio()
+    if directorio is None or not directorio.exists():
+        return 0
+    borrados = 0
+    for ruta in list(directorio.glob("*.zip")) + list(directorio.glob("*.tmp")):
+        try:
+            ruta.unlink()
+            borrados += 1
+        except FileNotFoundError:
+            pass
+    return borrados
@@ -0,0 +1,390 @@
+"""
+Generación de archivos ZIP en streaming.
+
+El ZIP se produce como una secuencia de fragmentos de bytes (pensada para
+StreamingHttpResponse): cada entrada se escribe con "data descriptor", de modo
+que no hace falta conocer el CRC ni los tamaños antes de enviar los datos, y
+se usa ZIP64 cuando un archivo o el total lo requieren. La memoria por
+descarga queda acotada al tamaño de un fragmento, sin importar el tamaño del lote.
+"""
+import logging
+import os
+import struct
+import tempfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+# Formatos que ya vienen comprimidos: se guardan tal cual (ZIP_STORED).
+EXTENSIONES_COMPRIMIDAS = {"pdf", "jpg", "jpeg", "png", "docx", "xlsx", "zip", "gz"}
+
+# La exportación (zip_paralelo) comprime además PDF, DOCX y XLSX: los PDF suelen
+# traer flujos e imágenes sin comprimir y algunos generadores guardan el XML de
+# DOCX/XLSX sin DEFLATE. El trabajo corre en el pool, no en el hilo de la
+# petición, y si un archivo no se reduce se guarda tal cual.
+EXTENSIONES_COMPRIMIDAS_EXPORTACION = {"jpg", "jpeg", "png", "zip", "gz"}
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+_LIMITE_32 = 0xFFFFFFFF
+_LIMITE_16 = 0xFFFF
+_FLAG_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+_VERSION = 20
+_VERSION_ZIP64 = 45
+_ATRIBUTOS_EXTERNOS = (0o100644 & 0xFFFF) << 16
+
+
+def debe_comprimir(nombre: str, comprimidas=EXTENSIONES_COMPRIMIDAS) -> bool:
+    """True si el archivo se beneficia de DEFLATE (no es un formato de `comprimidas`)."""
+    ext = os.path.splitext(nombre)[1].lower().lstrip(".")
+    return ext not in comprimidas
+
+
+def nombre_entrada(nombre) -> str:
+    """Un componente de ruta seguro dentro del ZIP: sin separadores ni '.'/'..'."""
+    nombre = str(nombre).replace("/", "_").replace("\\", "_").strip()
+    return "_" if nombre in ("", ".", "..") else nombre
+
+
+def _fecha_dos(momento) -> tuple[int, int]:
+    momento = timezone.localtime(momento) if timezone.is_aware(momento) else momento
+    anio = max(momento.year, 1980)
+    fecha = ((anio - 1980) << 9) | (momento.month << 5) | momento.day
+    hora = (momento.hour << 11) | (momento.minute << 5) | (momento.second // 2)
+    return fecha, hora
+
+
+class ZipStream:
+    """
+    Escritor de ZIP que produce bytes en lugar de escribir a un archivo.
+
+    Uso:
+        zs = ZipStream()
+        yield from zs.entrada("a.pdf", chunks, tamano=..., comprimir=False)
+        yield from zs.cerrar()
+    """
+
+    def __init__(self):
+        self._offset = 0
+        self._central: list[bytes] = []
+        self._nombres: set[str] = set()
+
+    def _emitir(self, data: bytes) -> bytes:
+        self._offset += len(data)
+        return data
+
+    def _nombre_unico(self, arcname: str) -> str:
+        base, ext = os.path.splitext(arcname)
+        nombre, n = arcname, 1
+        while nombre in self._nombres:
+            nombre = f"{base}_{n}{ext}"
+            n += 1
+        self._nombres.add(nombre)
+        return nombre
+
+    def entrada(self, arcname: str, chunks, *, tamano: int | None = None,
+                comprimir: bool = True, fecha=None):
+        """
+        Genera los bytes de una entrada leyendo `chunks` (iterable de bytes).
+        `tamano` es una pista para decidir si la entrada necesita ZIP64.
+        """
+        arcname = self._nombre_unico(arcname)
+        nombre = arcname.encode("utf-8")
+        flags = _FLAG_DESCRIPTOR | (0 if arcname.isascii() else _FLAG_UTF8)
+        metodo = ZIP_DEFLATED if comprimir else ZIP_STORED
+        zip64 = tamano is None or tamano * 1.05 > _LIMITE_32
+        dos_fecha, dos_hora = _fecha_dos(fecha or timezone.now())
+        offset_local = self._offset
+
+        if zip64:
+            extra = struct.pack("<HHQQ", 0x0001, 16, 0, 0)
+            tamanos = (_LIMITE_32, _LIMITE_32)
+        else:
+            extra = b""
+            tamanos = (0, 0)
+        yield self._emitir(struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50,
+            _VERSION_ZIP64 if zip64 else _VERSION, flags, metodo,
+            dos_hora, dos_fecha, 0, *tamanos, len(nombre), len(extra),
+        ) + nombre + extra)
+
+        crc = 0
+        tamano_real = 0
+        tamano_comprimido = 0
+        compresor = zlib.compressobj(6, zlib.DEFLATED, -15) if comprimir else None
+        for chunk in chunks:
+            if not chunk:
+                continue
+            crc = zlib.crc32(chunk, crc)
+            tamano_real += len(chunk)
+            data = compresor.compress(chunk) if compresor else chunk
+            if data:
+                tamano_comprimido += len(data)
+                yield self._emitir(data)
+        if compresor:
+            data = compresor.flush()
+            tamano_comprimido += len(data)
+            if data:
+                yield self._emitir(data)
+
+        if zip64:
+            descriptor = struct.pack("<IIQQ", 0x08074B50, crc, tamano_comprimido, tamano_real)
+        else:
+            descriptor = struct.pack("<IIII", 0x08074B50, crc, tamano_comprimido, tamano_real)
+        yield self._emitir(descriptor)
+
+        self._registrar_central(
+            nombre, flags, metodo, dos_hora, dos_fecha, crc,
+            tamano_comprimido, tamano_real, offset_local, zip64,
+        )
+
+    def entrada_comprimida(self, arcname: str, chunks, *, crc: int, tamano: int,
+                           tamano_comprimido: int, comprimir: bool = True, fecha=None):
+        """
+        Escribe una entrada cuyos datos ya vienen comprimidos (DEFLATE crudo) o
+        almacenados, con CRC y tamaños conocidos de antemano.
+        """
+        arcname = self._nombre_unico(arcname)
+        nombre = arcname.encode("utf-8")
+        flags = 0 if arcname.isascii() else _FLAG_UTF8
+        metodo = ZIP_DEFLATED if comprimir else ZIP_STORED
+        zip64 = tamano >= _LIMITE_32 or tamano_comprimido >= _LIMITE_32
+        dos_fecha, dos_hora = _fecha_dos(fecha or timezone.now())
+        offset_local = self._offset
+
+        if zip64:
+            extra = struct.pack("<HHQQ", 0x0001, 16, tamano, tamano_comprimido)
+            tamanos = (_LIMITE_32, _LIMITE_32)
+        else:
+            extra = b""
+            tamanos = (tamano_comprimido, tamano)
+        yield self._emitir(struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50,
+            _VERSION_ZIP64 if zip64 else _VERSION, flags, metodo,
+            dos_hora, dos_fecha, crc, *tamanos, len(nombre), len(extra),
+        ) + nombre + extra)
+        for chunk in chunks:
+            if chunk:
+                yield self._emitir(chunk)
+
+        self._registrar_central(
+            nombre, flags, metodo, dos_hora, dos_fecha, crc,
+            tamano_comprimido, tamano, offset_local, zip64,
+        )
+
+    def _registrar_central(self, nombre, flags, metodo, dos_hora, dos_fecha, crc,
+                           tamano_comprimido, tamano_real, offset_local, zip64=False):
+        campos64 = []
+        if tamano_real >= _LIMITE_32:
+            campos64.append(tamano_real)
+            tamano_real = _LIMITE_32
+        if tamano_comprimido >= _LIMITE_32:
+            campos64.append(tamano_comprimido)
+            tamano_comprimido = _LIMITE_32
+        if offset_local >= _LIMITE_32:
+            campos64.append(offset_local)
+            offset_local = _LIMITE_32
+        extra = b""
+        if campos64:
+            extra = struct.pack(f"<HH{len(campos64)}Q", 0x0001, 8 * len(campos64), *campos64)
+        version = _VERSION_ZIP64 if (zip64 or campos64) else _VERSION
+
+        self._central.append(struct.pack(
+            "<IHHHHHHIIIHHHHHII", 0x02014B50,
+            (3 << 8) | version, version, flags, metodo, dos_hora, dos_fecha,
+            crc, tamano_comprimido, tamano_real, len(nombre), len(extra), 0,
+            0, 0, _ATRIBUTOS_EXTERNOS, offset_local,
+        ) + nombre + extra)
+
+    def cerrar(self):
+        """Genera el directorio central y el registro de fin de archivo."""
+        inicio = self._offset
+        for registro in self._central:
+            yield self._emitir(registro)
+        tamano = self._offset - inicio
+        total = len(self._central)
+
+        if total >= _LIMITE_16 or inicio >= _LIMITE_32 or tamano >= _LIMITE_32:
+            offset_zip64 = self._offset
+            yield self._emitir(struct.pack(
+                "<IQHHIIQQQQ", 0x06064B50, 44, _VERSION_ZIP64, _VERSION_ZIP64,
+                0, 0, total, total, tamano, inicio,
+            ))
+            yield self._emitir(struct.pack("<IIQI", 0x07064B50, 0, offset_zip64, 1))
+            total = min(total, _LIMITE_16)
+            tamano = min(tamano, _LIMITE_32)
+            inicio = min(inicio, _LIMITE_32)
+
+        yield self._emitir(struct.pack(
+            "<IHHHHIIH", 0x06054B50, 0, 0, total, total, tamano, inicio, 0,
+        ))
+
+
+# ======================================
+# Lotes
+# ======================================
+def nombre_zip_lote(lote) -> str:
+    return f"{str(lote.id_lote).zfill(5)}.zip"
+
+
+def _leer_archivo(archivo):
+    try:
+        yield from archivo.chunks(CHUNK_SIZE)
+    finally:
+        archivo.close()
+
+
+def entradas_lote(lote, campos=None, carpeta: str = "", omitidos: list | None = None):
+    """
+    (arcname, archivo abierto) por cada documento presente del lote.
+    Los archivos que no se pueden abrir se omiten (como en la descarga
+    original), se registran en el log y, si se pasa, se agregan a `omitidos`.
+    """
+    for field in campos or lote.FILE_FIELDS:
+        archivo = getattr(lote, field, None)
+        if not archivo or not getattr(archivo, "name", ""):
+            continue
+        arcname = f"{carpeta}{nombre_entrada(os.path.basename(archivo.name))}"
+        try:
+            archivo.open("rb")
+        except Exception:
+            logger.warning("ZIP: no se pudo abrir %s (lote %s); se omite.", archivo.name, lote.pk, exc_info=True)
+            if omitidos is not None:
+                omitidos.append(arcname)
+            continue
+        yield arcname, archivo
+
+
+def _deflate_a_temporal(archivo):
+    """
+    Comprime un archivo abierto a un temporal en disco (DEFLATE crudo).
+    Corre en el pool: zlib libera el GIL, así que varios hilos usan varios núcleos.
+    """
+    tmp = tempfile.TemporaryFile()
+    crc = tamano = 0
+    compresor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    try:
+        for chunk in _leer_archivo(archivo):
+            crc = zlib.crc32(chunk, crc)
+            tamano += len(chunk)
+            tmp.write(compresor.compress(chunk))
+        tmp.write(compresor.flush())
+    except BaseException:
+        tmp.close()
+        raise
+    tamano_comprimido = tmp.tell()
+    tmp.seek(0)
+    return tmp, crc, tamano, tamano_comprimido
+
+
+def _leer_temporal(tmp):
+    with tmp:
+        while chunk := tmp.read(CHUNK_SIZE):
+            yield chunk
+
+
+def zip_paralelo(entradas, *, trabajadores: int | None = None, omitidos: list | None = None):
+    """
+    Genera un ZIP a partir de `entradas` (iterable de (arcname, archivo
+    abierto, fecha de la entrada)).
+
+    Las entradas que se comprimen se procesan en un pool de hilos con una
+    ventana acotada de trabajo adelantado; las ya comprimidas se copian en
+    línea. Si DEFLATE no reduce un archivo, se vuelve a leer y se guarda tal
+    cual. El orden de salida se respeta y el primer byte sale en cuanto
+    termina la primera entrada, sin esperar al resto.
+
+    Un archivo que falla al leerse no corta la descarga: se registra en el log
+    y se lista en OMITIDOS.txt al final del ZIP, junto con los que ya vengan en
+    `omitidos` (p.ej. de entradas_lote, que se consume antes de cerrar el ZIP).
+    """
+    trabajadores = trabajadores or os.cpu_count() or 1
+    ventana = trabajadores * 2
+    zs = ZipStream()
+    pendientes = deque()
+    it = iter(entradas)
+
+    with ThreadPoolExecutor(max_workers=trabajadores) as pool:
+        def llenar():
+            while len(pendientes) < ventana:
+                try:
+                    arcname, archivo, fecha = next(it)
+                except StopIteration:
+                    return
+                comprimir = debe_comprimir(arcname, EXTENSIONES_COMPRIMIDAS_EXPORTACION)
+                futuro = pool.submit(_deflate_a_temporal, archivo) if comprimir else None
+                pendientes.append((arcname, archivo, fecha, futuro))
+
+        omitidos = [] if omitidos is None else omitidos
+        actual = None
+        try:
+            llenar()
+            while pendientes:
+                arcname, archivo, fecha, futuro = actual = pendientes.popleft()
+                llenar()
+                if futuro is None:
+                    yield from zs.entrada(
+                        arcname, _leer_archivo(archivo),
+                        tamano=archivo.size, comprimir=False, fecha=fecha,
+                    )
+                    continue
+                try:
+                    tmp, crc, tamano, tamano_comprimido = futuro.result()
+                except Exception:
+                    logger.exception("ZIP: no se pudo leer %s; se omite.", arcname)
+                    omitidos.append(arcname)
+                    continue
+                if tamano_comprimido >= tamano:
+                    # No se redujo: se relee el original y va sin comprimir (CRC ya calculado).
+                    tmp.close()
+                    try:
+                        archivo.open("rb")
+                    except Exception:
+                        logger.exception("ZIP: no se pudo reabrir %s; se omite.", arcname)
+                        omitidos.append(arcname)
+                        continue
+                    yield from zs.entrada_comprimida(
+                        arcname, _leer_archivo(archivo), crc=crc, tamano=tamano,
+                        tamano_comprimido=tamano, comprimir=False, fecha=fecha,
+                    )
+                    continue
+                yield from zs.entrada_comprimida(
+                    arcname, _leer_temporal(tmp), crc=crc, tamano=tamano,
+                    tamano_comprimido=tamano_comprimido, fecha=fecha,
+                )
+            actual = None
+            if omitidos:
+                texto = "No se pudieron leer estos archivos:\n" + "".join(f"{a}\n" for a in omitidos)
+                yield from zs.entrada("OMITIDOS.txt", [texto.encode()], tamano=len(texto))
+            yield from zs.cerrar()
+        finally:
+            # Descarga interrumpida: cancela lo adelantado y libera archivos/temporales,
+            # también los de la entrada que se estaba enviando.
+            if actual is not None:
+                pendientes.appendleft(actual)
+            for _, archivo, _, futuro in pendientes:
+                if futuro is not None and not futuro.cancel():
+                    try:
+                        futuro.result()[0].close()
+                    except Exception:
+                        pass
+                archivo.close()
+
+
+def zip_lote(lote, omitidos: list | None = None):
+    """Genera el ZIP de un lote por fragmentos. Los documentos que no se pudieron abrir van a `omitidos`."""
+    zs = ZipStream()
+    for arcname, archivo in entradas_lote(lote, omitidos=omitidos):
+        yield from zs.entrada(
+            arcname, _leer_archivo(archivo),
+            tamano=archivo.size, comprimir=debe_comprimir(arcname), fecha=lote.modificado,
+        )
+    yield from zs.cerrar()
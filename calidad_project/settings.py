@@ -9,14 +9,18 @@ ALLOWED_HOSTS = []
 
 INSTALLED_APPS = [
     'django.contrib.admin', 'django.contrib.auth', 'django.contrib.contenttypes',
-    'django.contrib.sessions', 'django.contrib.messages', 'django.contrib.staticfiles',
+    'django.contrib.sessions', 'django.contrib.messages',
+    'whitenoise.runserver_nostatic',  # runserver sirve estáticos igual que producción
+    'django.contrib.staticfiles',
     'widget_tweaks',
     'calidad_app',
     
 ]
 
 MIDDLEWARE = [
+    'calidad_app.middleware.RendimientoMiddleware',  # primero: mide la petición completa
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',  # estáticos antes de sesión/autenticación
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -53,6 +57,21 @@ DATABASES = {
     }
 }
 
+# SQLite en producción (calidad_app/basedatos.py), solo con SQLITE_PRODUCCION=1:
+# WAL y pragmas al conectar, y una conexión de solo lectura para las vistas de
+# consulta (@solo_lectura; SQLITE_LECTURA=0 la desactiva). Apagado, SQLite
+# queda como lo configura Django y no se toca el modo del archivo.
+# SQLITE_PRAGMAS sobrescribe calidad_app.basedatos.PRAGMAS (None = no aplicar).
+SQLITE_PRODUCCION = os.environ.get('SQLITE_PRODUCCION', '0') == '1'
+SQLITE_PRAGMAS = {}
+if SQLITE_PRODUCCION and os.environ.get('SQLITE_LECTURA', '1') == '1':
+    DATABASES['lectura'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"{(BASE_DIR / 'db.sqlite3').as_uri()}?mode=ro",
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['calidad_app.basedatos.LecturaRouter']
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME':'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME':'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -70,10 +89,49 @@ STATICFILES_DIRS = [
     BASE_DIR / 'calidad_app' / 'static',
     BASE_DIR / 'theme' / 'static'
 ]
+# collectstatic copia aquí los archivos con hash en el nombre (styles.3f2a….css)
+# y sus variantes .gz/.br; WhiteNoise los sirve con Cache-Control inmutable
+# de un año y elige la variante según Accept-Encoding.
+STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Descarga de documentos (calidad_app/descargas.py): la vista revisa permisos
+# y delega el envío al proxy con 'x-accel-redirect' (nginx, location interna
+# DESCARGAS_ACCEL_PREFIJO -> MEDIA_ROOT) o 'x-sendfile' (Apache/lighttpd).
+# Vacío: lo envía Django (con Range/ETag).
+DESCARGAS_MODO = os.environ.get('DESCARGAS_MODO', '')
+DESCARGAS_ACCEL_PREFIJO = '/media-protegida/'
+
+STORAGES = {
+    # Documentos de lote deduplicados por SHA-256 (ver calidad_app/storage.py)
+    'default': {'BACKEND': 'calidad_app.storage.AlmacenamientoDeduplicado'},
+    'staticfiles': {'BACKEND': 'calidad_app.estaticos.EstaticosComprimidos'},
+}
+
+# Caché compartida entre procesos (en disco): datos de proyecto versionados
+# (calidad_app/cache.py). Con Redis/Memcached basta cambiar el BACKEND.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'django',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+CACHE_PROYECTOS = 'default'
+
+# Sesión y usuario desde la caché (calidad_app/autenticacion.py): sin
+# consultas de autenticación por petición mientras no cambien.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+AUTHENTICATION_BACKENDS = [
+    'calidad_app.autenticacion.CachedModelBackend',
+    # Las sesiones abiertas antes del cambio guardan este backend; se mantiene
+    # para no cerrarlas (solo esas consultan la BD hasta el próximo login).
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'ver_proyectos'
 LOGOUT_REDIRECT_URL = 'login'
@@ -82,4 +140,48 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'calidad_app.CustomUser'
 
-
+# Lotes por página en lotes_por_proyecto (paginación por cursor)
+LOTES_POR_PAGINA = 50
+
+# Exportación de documentos por proyecto: hilos de compresión (None = núcleos disponibles)
+EXPORTACION_TRABAJADORES = None
+
+# Subidas por partes (reanudables) de documentos de lote
+CARGAS_DIR = BASE_DIR / 'cargas'
+CARGA_TAMANO_MAX = 2 * 1024 ** 3       # por archivo
+CARGA_PARTE_MAX = 16 * 1024 ** 2       # por fragmento (PATCH)
+
+# Miniaturas de documentos (generadas en segundo plano)
+PREVIEWS_DIR = BASE_DIR / 'cache' / 'previews'
+PREVIEW_TAMANO = 320
+TAREAS_PROCESOS = 2
+
+# Caché en disco de ZIPs de lote (None la desactiva) y su tope en bytes (LRU)
+ZIP_CACHE_DIR = BASE_DIR / 'cache' / 'zips'
+ZIP_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+# Archivo de auditoría (manage.py archivar_auditoria): segmentos comprimidos
+# con las filas de AuditLog más antiguas que la retención.
+AUDITORIA_ARCHIVO_DIR = BASE_DIR / 'archivo' / 'auditoria'
+AUDITORIA_RETENCION_DIAS = 365
+
+# Instrumentación por petición (calidad_app.middleware.RendimientoMiddleware):
+# fracción de peticiones medidas (0 = apagado) y umbrales del log de lentas.
+RENDIMIENTO_MUESTREO = float(os.environ.get('RENDIMIENTO_MUESTREO', '0'))
+RENDIMIENTO_PETICION_LENTA_MS = 1000
+RENDIMIENTO_CONSULTA_LENTA_MS = 100
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        # Los mensajes de rendimiento ya son JSON: una línea por evento.
+        'json': {'format': '{"ts": "%(asctime)s", "logger": "%(name)s", "evento": %(message)s}'},
+    },
+    'handlers': {
+        'rendimiento': {'class': 'logging.StreamHandler', 'formatter': 'json'},
+    },
+    'loggers': {
+        'calidad_app.rendimiento': {'handlers': ['rendimiento'], 'level': 'WARNING', 'propagate': False},
+    },
+}